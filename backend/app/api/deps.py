@@ -2,19 +2,22 @@
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
+from jose import JWTError, jwt
 from pydantic import ValidationError
 
 from backend.app.core import security
 from backend.app.core.config import settings
-from backend.app.models.user import User, TokenData, db_users  # Using in-memory store
+from backend.app.core.token_cache import token_cache
+from backend.app.models.user import User, TokenData
+from backend.app.db.user_repository import user_repository
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
 
-def get_current_user(token: str = Depends(reusable_oauth2)) -> User:
+def _verify_token(token: str) -> TokenData:
+    # Full signature check; the result is cached until the token expires
     try:
         payload = security.decode_access_token(token)
         if payload is None:
@@ -45,14 +48,38 @@ def get_current_user(token: str = Depends(reusable_oauth2)) -> User:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db_users.get(token_data.user_id)  # Fetch user from "DB"
+    if "exp" in payload:  # Never cache tokens that don't expire
+        token_cache.put(token, token_data, expires_at=payload["exp"])
+    return token_data
+
+
+async def get_user_for_token(token: str) -> User:
+    """Resolve a bearer token to its user; also used where OAuth2 headers aren't available (WebSockets)."""
+    token_data = token_cache.get(token)
+    if token_data is None:
+        token_data = _verify_token(token)
+
+    # Cached public projection of the stored UserInDB; rebuilt only when the record changes
+    user = await user_repository.get_public(token_data.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    # Convert UserInDB to User (Pydantic model for response, if needed or just use UserInDB directly)
-    return User.model_validate(user)  # Pydantic V2
+    return user
+
+
+def token_expires_at(token: str) -> Optional[float]:
+    """The `exp` claim of a token already verified by get_user_for_token (long-lived connections)."""
+    try:
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return None
+    return float(expires_at) if expires_at is not None else None
+
+
+async def get_current_user(token: str = Depends(reusable_oauth2)) -> User:
+    return await get_user_for_token(token)
 
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -7,7 +7,9 @@ from backend.app.api.v1.endpoints import (
     users,
     subscriptions,
     payments,
-    code_assistant
+    code_assistant,
+    projects,
+    jobs
 )
 
 api_router = APIRouter()
@@ -15,4 +17,6 @@ api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(subscriptions.router, prefix="/subscriptions", tags=["Subscriptions"])
 api_router.include_router(payments.router, prefix="/payments", tags=["Payments"])
-api_router.include_router(code_assistant.router, prefix="/assist", tags=["Code Assistant"])
\ No newline at end of file
+api_router.include_router(code_assistant.router, prefix="/assist", tags=["Code Assistant"])
+api_router.include_router(projects.router, prefix="/projects", tags=["Projects"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
\ No newline at end of file
@@ -1,17 +1,35 @@
 # backend/app/api/v1/endpoints/code_assistant.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from backend.app.models.user import User, SubscriptionPlan
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from backend.app.models.user import User, UserRole, SubscriptionPlan
 from backend.app.models.code_assistant import (
-    CodeGenerationRequest, CodeGenerationResponse,
+    CodeGenerationRequest, CodeGenerationResponse, CodeGenerationChunk,
     CodeExplanationRequest, CodeExplanationResponse,
-    CodeRefactorRequest, CodeRefactorResponse
+    CodeRefactorRequest, CodeRefactorResponse,
+    CompletionRequest, CompletionResponse,
+    BatchAssistRequest, BatchAssistResponse, BatchOperation, BatchOperationResult
 )
+from backend.app.core.config import settings
+from backend.app.services.admission_queue import AdmissionRejectedError
 from backend.app.services.code_assistant_service import code_assistant_service
-from backend.app.api.deps import get_current_active_user
-from backend.app.models.subscription import PLANS_DETAILS  # To check feature availability
+from backend.app.services.code_diff import PatchError, UnknownBaseError
+from backend.app.services.inference_backend import InferenceError, InferenceTimeoutError
+from backend.app.services.job_queue import job_queue
+from backend.app.services.project_workspace import ProjectNotFoundError
+from backend.app.api.deps import get_current_active_user, get_user_for_token, token_expires_at
+from backend.app.services.context_assembly import plan_details  # To check feature availability
 
 router = APIRouter()
 
+UNKNOWN_BASE_DETAIL = "The code for base_hash is no longer available; send the full code_block."
+
 
 def check_feature_access(user: User, required_feature_level: int):
     """
@@ -21,9 +39,9 @@ def check_feature_access(user: User, required_feature_level: int):
     1: Medium access (e.g., Premium plan)
     2: Full access (e.g., Pro plan)
     """
-    user_plan_details = PLANS_DETAILS.get(SubscriptionPlan(user.subscription_plan))  # Ensure enum value is used
+    user_plan_details = plan_details(user)
     if not user_plan_details:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid subscription plan.")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This feature requires an active subscription.")
 
     # Using project_understanding_level as a proxy for feature tier for this example
     if user_plan_details.project_understanding_level < required_feature_level:
@@ -33,6 +51,48 @@ def check_feature_access(user: User, required_feature_level: int):
         )
 
 
+def check_generation_access(user: User):
+    # Example: Basic code generation might be available to all, but advanced features within it might be tiered.
+    # For simplicity, let's say Basic plan has some generation, Pro has more.
+    if user.subscription_plan == SubscriptionPlan.NONE:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Code generation requires an active subscription.")
+
+
+def check_premium_access(user: User, feature: str):
+    # Example: explanation and refactoring might require at least Premium
+    if user.subscription_plan not in [SubscriptionPlan.PREMIUM, SubscriptionPlan.PRO]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail=f"{feature} requires a Premium or Pro plan.")
+    # check_feature_access(user, 1) # Level 1 for explanation and refactoring
+
+
+def operation_error(exc: Exception) -> Tuple[int, str]:
+    """
+    Status code and message for a failed operation reported in-band (WebSocket messages,
+    batch items), matching what the app's exception handlers answer for a single request.
+    """
+    if isinstance(exc, HTTPException):
+        return exc.status_code, str(exc.detail)
+    if isinstance(exc, ValidationError):
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)
+    if isinstance(exc, AdmissionRejectedError):
+        if exc.per_user:
+            return status.HTTP_429_TOO_MANY_REQUESTS, "Too many of your requests are already waiting for the code model."
+        return status.HTTP_503_SERVICE_UNAVAILABLE, "The code model is at capacity, please retry shortly."
+    if isinstance(exc, InferenceTimeoutError):
+        return status.HTTP_504_GATEWAY_TIMEOUT, "The code model took too long to respond."
+    if isinstance(exc, InferenceError):
+        return status.HTTP_502_BAD_GATEWAY, "The code model is currently unavailable."
+    if isinstance(exc, ProjectNotFoundError):
+        return status.HTTP_404_NOT_FOUND, "Project not found."
+    if isinstance(exc, UnknownBaseError):
+        return status.HTTP_409_CONFLICT, UNKNOWN_BASE_DETAIL
+    if isinstance(exc, PatchError):
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, str(exc)
+    raise exc
+
+
 @router.post("/generate-code", response_model=CodeGenerationResponse)
 async def generate_code_endpoint(
         request: CodeGenerationRequest,
@@ -41,11 +101,7 @@ async def generate_code_endpoint(
     """
     Generate code based on a natural language prompt.
     """
-    # Example: Basic code generation might be available to all, but advanced features within it might be tiered.
-    # For simplicity, let's say Basic plan has some generation, Pro has more.
-    if current_user.subscription_plan == SubscriptionPlan.NONE:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Code generation requires an active subscription.")
+    check_generation_access(current_user)
 
     # Example: Tiered generation capability (e.g., model quality or context length)
     # This logic would be inside the service, but a high-level check can be here too.
@@ -60,6 +116,158 @@ async def generate_code_endpoint(
     return await code_assistant_service.generate_code(request, current_user)
 
 
+@router.post("/generate-code/stream")
+async def stream_generate_code_endpoint(
+        request: CodeGenerationRequest,
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Generate code as Server-Sent Events: one `data:` event per CodeGenerationChunk, the
+    last one with done=True. The response is pulled token by token, so a slow reader
+    slows generation down, and a disconnect cancels it (closing the model stream).
+    """
+    check_generation_access(current_user)
+
+    async def events():
+        async for chunk in _generation_chunks(request, current_user):
+            yield f"data: {chunk.model_dump_json(exclude_none=True)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # Don't let proxies buffer tokens
+    )
+
+
+async def _generation_chunks(request: CodeGenerationRequest, user: User) -> AsyncIterator[CodeGenerationChunk]:
+    # The stream has started (SSE headers sent, or mid-WebSocket), so any failure the app would
+    # answer with a status code (queue full, unknown project, ...) ends it with an error chunk
+    try:
+        async for chunk in code_assistant_service.stream_generate_code(request, user):
+            yield chunk
+    except Exception as e:
+        _, error = operation_error(e)  # Re-raises what it doesn't map
+        yield CodeGenerationChunk(done=True, error=error)
+
+
+async def _send_generation(websocket: WebSocket, request: CodeGenerationRequest, user: User):
+    async for chunk in _generation_chunks(request, user):
+        await websocket.send_text(chunk.model_dump_json(exclude_none=True))
+
+
+@router.websocket("/generate-code/ws")
+async def generate_code_websocket(websocket: WebSocket, token: str = Query(...)):
+    """
+    Streaming code generation over a WebSocket (authenticated with `?token=<access token>`).
+    Each text message is a CodeGenerationRequest; the reply is a sequence of CodeGenerationChunk
+    messages. Sending a new request, or {"cancel": true}, cancels the generation in progress.
+    """
+    try:
+        current_user = await get_user_for_token(token)
+        check_generation_access(current_user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    generation: Optional[asyncio.Task] = None
+    try:
+        while True:
+            message = await websocket.receive_text()
+            if generation is not None:
+                generation.cancel()
+            try:
+                payload = json.loads(message)
+                if isinstance(payload, dict) and payload.get("cancel"):
+                    continue
+                request = CodeGenerationRequest.model_validate(payload)
+            except ValueError as e:  # Malformed JSON or a pydantic ValidationError
+                await websocket.send_text(CodeGenerationChunk(done=True, error=str(e)).model_dump_json(exclude_none=True))
+                continue
+            generation = asyncio.create_task(_send_generation(websocket, request, current_user))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if generation is not None:
+            generation.cancel()
+
+
+async def _send_completion(websocket: WebSocket, request: CompletionRequest, user: User):
+    try:
+        response = await code_assistant_service.complete_code(request, user)
+    except (InferenceError, AdmissionRejectedError) as e:
+        _, error = operation_error(e)
+        response = CompletionResponse(document_id=request.document_id, request_id=request.request_id, error=error)
+    await websocket.send_text(response.model_dump_json(exclude_none=True))
+
+
+@router.websocket("/complete/ws")
+async def complete_code_websocket(websocket: WebSocket, token: str = Query(...)):
+    """
+    Autocompletion over a persistent WebSocket, authenticated once per connection with
+    `?token=<access token>`. Each text message is a CompletionRequest, answered with a
+    CompletionResponse. A new request for a document supersedes the one still running for
+    it: that one is cancelled, model call included, and gets no reply. {"cancel": "<document_id>"}
+    cancels without a new request. The connection is closed when the token expires, idle or
+    not, and at the next request once the user is deactivated or loses generation access.
+    """
+    try:
+        current_user = await get_user_for_token(token)
+        check_generation_access(current_user)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    expires_at = token_expires_at(token)
+
+    await websocket.accept()
+    running: Dict[str, asyncio.Task] = {}  # Document id -> its completion in progress
+
+    def finished(document_id: str, task: asyncio.Task) -> None:
+        if running.get(document_id) is task:
+            del running[document_id]
+
+    try:
+        while True:
+            try:
+                timeout = None if expires_at is None else max(0.0, expires_at - time.time())
+                message = await asyncio.wait_for(websocket.receive_text(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+                break
+            try:
+                # Cached unless the user changed, so a plan downgrade applies from the next request
+                current_user = await get_user_for_token(token)
+                check_generation_access(current_user)
+            except HTTPException as e:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+                break
+            document_id = ""
+            try:
+                payload = json.loads(message)
+                if isinstance(payload, dict):
+                    document_id = str(payload.get("document_id") or payload.get("cancel") or "")
+                    if "cancel" in payload:
+                        superseded = running.pop(document_id, None)
+                        if superseded is not None:
+                            superseded.cancel()
+                        continue
+                request = CompletionRequest.model_validate(payload)
+            except ValueError as e:  # Malformed JSON or a pydantic ValidationError
+                await websocket.send_text(CompletionResponse(document_id=document_id, error=str(e)).model_dump_json(exclude_none=True))
+                continue
+            superseded = running.pop(request.document_id, None)
+            if superseded is not None:
+                superseded.cancel()
+            task = asyncio.create_task(_send_completion(websocket, request, current_user))
+            running[request.document_id] = task
+            task.add_done_callback(lambda task, document_id=request.document_id: finished(document_id, task))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in running.values():
+            task.cancel()
+
+
 @router.post("/explain-code", response_model=CodeExplanationResponse)
 async def explain_code_endpoint(
         request: CodeExplanationRequest,
@@ -68,11 +276,7 @@ async def explain_code_endpoint(
     """
     Explain a given block of code.
     """
-    # Example: This feature might require at least Premium
-    if current_user.subscription_plan not in [SubscriptionPlan.PREMIUM, SubscriptionPlan.PRO]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Code explanation requires a Premium or Pro plan.")
-    # check_feature_access(current_user, 1) # Level 1 for explanation
+    check_premium_access(current_user, "Code explanation")
 
     return await code_assistant_service.explain_code(request, current_user)
 
@@ -85,16 +289,122 @@ async def refactor_code_endpoint(
     """
     Suggest refactorings for a given block of code.
     """
-    # Example: This feature might require at least Premium
-    if current_user.subscription_plan not in [SubscriptionPlan.PREMIUM, SubscriptionPlan.PRO]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Code refactoring requires a Premium or Pro plan.")
-    # check_feature_access(current_user, 1) # Level 1 for refactoring
+    check_premium_access(current_user, "Code refactoring")
 
     return await code_assistant_service.refactor_code(request, current_user)
 
+
+def check_batch_size(batch: BatchAssistRequest):
+    if len(batch.operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"A batch can hold at most {settings.BATCH_MAX_OPERATIONS} operations.")
+
+
+def prepare_operation(operation: str, payload: Dict[str, Any], user: User) -> Tuple[BaseModel, Callable]:
+    """
+    Validate an operation given by name (batch items, jobs) and apply the plan check of its
+    own endpoint. Returns the request and the service method that runs it.
+    """
+    if operation == "generate":
+        check_generation_access(user)
+        return CodeGenerationRequest.model_validate(payload), code_assistant_service.generate_code
+    if operation == "explain":
+        check_premium_access(user, "Code explanation")
+        return CodeExplanationRequest.model_validate(payload), code_assistant_service.explain_code
+    if operation == "refactor":
+        check_premium_access(user, "Code refactoring")
+        return CodeRefactorRequest.model_validate(payload), code_assistant_service.refactor_code
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown operation: {operation}")
+
+
+async def _run_operation(
+        index: int, operation: BatchOperation, user: User, slots: asyncio.Semaphore
+) -> BatchOperationResult:
+    # One batch item; failures are returned, not raised
+    try:
+        request, run = prepare_operation(operation.operation, operation.request, user)
+        async with slots:
+            result = await run(request, user)
+    except Exception as e:
+        status_code, error = operation_error(e)
+        return BatchOperationResult(index=index, operation=operation.operation, status_code=status_code, error=error)
+    return BatchOperationResult(index=index, operation=operation.operation, status_code=status.HTTP_200_OK, result=result)
+
+
+async def _batch_results(batch: BatchAssistRequest, user: User) -> AsyncIterator[BatchOperationResult]:
+    """
+    Run a batch's operations concurrently, at most `max_concurrency` (capped by
+    BATCH_MAX_CONCURRENCY) at a time, yielding each result as it completes. Closing the
+    iterator early (the client went away) cancels the operations still pending.
+    """
+    slots = asyncio.Semaphore(min(batch.max_concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY))
+    tasks = [
+        asyncio.create_task(_run_operation(index, operation, user, slots))
+        for index, operation in enumerate(batch.operations)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/batch", response_model=BatchAssistResponse, response_model_exclude_none=True)
+async def batch_assist_endpoint(batch: BatchAssistRequest, current_user: User = Depends(get_current_active_user)):
+    """
+    Run many generate/explain/refactor operations in one request, concurrently. Results come
+    back in request order, each with the status code its single-operation endpoint would
+    have answered, so one failing operation doesn't fail the batch.
+    """
+    check_batch_size(batch)
+    results: List[Optional[BatchOperationResult]] = [None] * len(batch.operations)
+    async for result in _batch_results(batch, current_user):
+        results[result.index] = result
+    return BatchAssistResponse(results=results)
+
+
+@router.post("/batch/stream")
+async def stream_batch_assist_endpoint(batch: BatchAssistRequest, current_user: User = Depends(get_current_active_user)):
+    """
+    Same as /batch, but streams newline-delimited JSON: one BatchOperationResult per line,
+    in completion order (see `index`), as soon as each operation finishes.
+    """
+    check_batch_size(batch)  # Before the 200 response starts
+
+    async def lines():
+        async for result in _batch_results(batch, current_user):
+            yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@router.get("/cache-stats", response_model=Dict[str, float])
+async def get_response_cache_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    Hit/miss counters of the response caches and of coalesced in-flight requests,
+    for tuning cache size and TTL (admin only).
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    stats = code_assistant_service.cache.stats() if code_assistant_service.cache is not None else {}
+    if code_assistant_service.semantic_cache is not None:
+        stats.update({f"semantic_{name}": value for name, value in code_assistant_service.semantic_cache.stats().items()})
+    stats.update({f"single_flight_{name}": value for name, value in code_assistant_service.flights.stats().items()})
+    return stats
+
+@router.get("/queue-stats", response_model=Dict[str, Dict[str, float]])
+async def get_admission_queue_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    Queue length, admissions, rejections and queue wait percentiles per plan, and the
+    background job counters under "jobs" (admin only).
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    stats = code_assistant_service.admission.stats() if code_assistant_service.admission is not None else {}
+    stats["jobs"] = job_queue.stats()
+    return stats
+
 # Add more endpoints for other features:
-# - Autocompletion (might need WebSockets for real-time or a different interaction model)
 # - Test Generation
 # - Vulnerability Detection
-# - Multi-file analysis (more complex, might involve project uploads or git integrations)
\ No newline at end of file
+# - Git integrations for projects (uploads are under /projects)
\ No newline at end of file
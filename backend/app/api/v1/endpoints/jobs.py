@@ -0,0 +1,105 @@
+# backend/app/api/v1/endpoints/jobs.py
+import json
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+
+from backend.app.core.config import settings
+from backend.app.models.job import JobInfo, JobStatus, JobSubmit
+from backend.app.models.user import User
+from backend.app.services.job_queue import job_queue
+from backend.app.api.deps import get_current_active_user
+from backend.app.api.v1.endpoints.code_assistant import prepare_operation
+
+router = APIRouter()
+
+
+async def run_job_operation(operation: str, payload: Dict[str, Any], user: User) -> Dict[str, Any]:
+    # Job runner: the same checks and service call as the operation's own endpoint, with the user as of now
+    request, run = prepare_operation(operation, payload, user)
+    response = await run(request, user)
+    return response.model_dump(mode="json", exclude_none=True)
+
+
+@router.post("", response_model=JobInfo, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(job_in: JobSubmit, current_user: User = Depends(get_current_active_user)):
+    """
+    Run a generate, explain or refactor operation in the background, e.g. a refactoring of
+    a large code block that would outlast an HTTP timeout. The request is validated (and
+    the plan checked) right away; follow the job with GET /jobs/{id}?wait=..., or
+    /jobs/{id}/events, then fetch /jobs/{id}/result.
+    """
+    try:
+        request, _ = prepare_operation(job_in.operation, job_in.request, current_user)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await job_queue.submit(current_user, job_in.operation, request.model_dump(mode="json", exclude_unset=True))
+
+
+@router.get("", response_model=List[JobInfo])
+async def list_jobs(current_user: User = Depends(get_current_active_user)):
+    """Your most recent jobs, newest first."""
+    return await job_queue.list(current_user)
+
+
+@router.get("/{job_id}", response_model=JobInfo)
+async def get_job(
+        job_id: str,
+        wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish before answering (long-poll)"),
+        current_user: User = Depends(get_current_active_user)
+):
+    if wait > 0:
+        return await job_queue.wait(job_id, current_user, min(wait, settings.JOB_MAX_WAIT_SECONDS))
+    return await job_queue.get(job_id, current_user)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+        job_id: str,
+        wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish (long-poll)"),
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    The operation's response once the job has succeeded. A failed job answers with the
+    status code and detail its endpoint would have; an unfinished one with 202 and the job.
+    """
+    job = await job_queue.wait(job_id, current_user, min(wait, settings.JOB_MAX_WAIT_SECONDS))
+    if job.status == JobStatus.SUCCEEDED:
+        return JSONResponse(content=await job_queue.result(job_id, current_user))
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=job.status_code or status.HTTP_500_INTERNAL_SERVER_ERROR, detail=job.error)
+    if job.status == JobStatus.CANCELLED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The job was cancelled.")
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job.model_dump(mode="json", exclude_none=True))
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Server-Sent Events: a `status` event (the job) now and on every status change, then,
+    if the job succeeded, a `result` event with the operation's response. The stream ends
+    when the job has finished.
+    """
+    await job_queue.get(job_id, current_user)  # 404 before the stream starts
+
+    async def events():
+        async for job in job_queue.events(job_id, current_user):
+            yield f"event: status\ndata: {job.model_dump_json(exclude_none=True)}\n\n"
+            if job.status == JobStatus.SUCCEEDED:
+                result = await job_queue.result(job_id, current_user)
+                yield f"event: result\ndata: {json.dumps(result, separators=(',', ':'))}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Cancel a queued or running job; a finished job is returned unchanged."""
+    return await job_queue.cancel(job_id, current_user)
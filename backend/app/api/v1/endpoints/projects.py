@@ -0,0 +1,107 @@
+# backend/app/api/v1/endpoints/projects.py
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from backend.app.models.user import User
+from backend.app.models.project import (
+    ProjectCreate, ProjectFilesUpdate, ProjectIndexUpdate, ProjectInfo, SymbolDefinition, SymbolLookup
+)
+from backend.app.services.context_assembly import project_understanding_level
+from backend.app.services.project_workspace import project_store
+from backend.app.api.deps import get_current_active_user
+from backend.app.api.v1.endpoints.code_assistant import check_feature_access
+
+router = APIRouter()
+
+MULTI_FILE_LEVEL = 1  # project_understanding_level needed for projects ("Multi-file Understanding")
+FULL_PROJECT_LEVEL = 2  # ... and for embedding retrieval over the whole project ("Full Project Understanding")
+
+
+def get_project_user(current_user: User = Depends(get_current_active_user)) -> User:
+    check_feature_access(current_user, MULTI_FILE_LEVEL)
+    return current_user
+
+
+@router.post("", response_model=ProjectInfo, status_code=status.HTTP_201_CREATED)
+async def create_project(project_in: ProjectCreate, current_user: User = Depends(get_project_user)):
+    """
+    Create an empty project workspace. Pass its id as `project_id` to the /assist endpoints
+    to have definitions from the project added to the request's context.
+    """
+    project = await project_store.create(current_user, project_in.name)
+    if project_understanding_level(current_user) >= FULL_PROJECT_LEVEL:
+        await project_store.enable_retrieval(project)  # Kept current by every upload from the start
+    return project.info()
+
+
+@router.get("", response_model=List[ProjectInfo])
+async def list_projects(current_user: User = Depends(get_project_user)):
+    return await project_store.list(current_user)
+
+
+@router.get("/{project_id}", response_model=ProjectInfo)
+async def get_project(project_id: str, current_user: User = Depends(get_project_user)):
+    return (await project_store.get(project_id, current_user)).info()
+
+
+@router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_project(project_id: str, current_user: User = Depends(get_project_user)):
+    await project_store.delete(project_id, current_user)
+
+
+@router.put("/{project_id}/files", response_model=ProjectIndexUpdate)
+async def update_project_files(
+        project_id: str,
+        update: ProjectFilesUpdate,
+        current_user: User = Depends(get_project_user)
+):
+    """
+    Add or overwrite individual files and delete others. Files whose content is unchanged
+    since the last upload are not re-indexed, so re-sending a whole project is cheap.
+    """
+    project = await project_store.get(project_id, current_user)
+    return await project_store.update(project, {file.path: file.content for file in update.files}, update.deleted)
+
+
+@router.put("/{project_id}/archive", response_model=ProjectIndexUpdate)
+async def upload_project_archive(
+        project_id: str,
+        request: Request,
+        replace: bool = Query(True, description="Remove project files missing from the archive"),
+        current_user: User = Depends(get_project_user)
+):
+    """
+    Upload a repository as a zip or tar(.gz) archive in the request body. Only text files
+    are kept; version control, dependency and cache directories are ignored.
+    """
+    project = await project_store.get(project_id, current_user)
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > project_store.max_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"Archives are limited to {project_store.max_bytes} bytes.")
+    return await project_store.update_from_archive(project, bytes(data), replace=replace)
+
+
+@router.get("/{project_id}/symbols/{name}", response_model=SymbolLookup)
+async def lookup_symbol(
+        project_id: str,
+        name: str,
+        include_source: bool = False,
+        current_user: User = Depends(get_project_user)
+):
+    """
+    Where `name` is defined in the project, and which files mention it.
+    """
+    project = await project_store.get(project_id, current_user)
+    definitions = [
+        SymbolDefinition(
+            **definition._asdict(),
+            end_line=project.end_line(definition),
+            source=project.source(definition) if include_source else None,
+        )
+        for definition in project.index.lookup(name)
+    ]
+    return SymbolLookup(name=name, definitions=definitions, referenced_in=project.referenced_in(name))
@@ -5,7 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Dict
 
 from backend.app.models.subscription import SubscriptionPlanDetail, PLANS_DETAILS, UserSubscriptionStatus, PlanName
-from backend.app.models.user import User, db_users
+from backend.app.models.user import User, UserRole, SubscriptionPlan
+from backend.app.db.user_repository import user_repository
+from backend.app.services.subscription_sweeper import subscription_sweeper
 from backend.app.api.deps import get_current_active_user
 
 router = APIRouter()
@@ -24,14 +26,18 @@ async def get_user_subscription_status(current_user: User = Depends(get_current_
     """
     Get the current user's subscription status.
     """
-    # In a real app, this data comes from the user's record in the database
+    # Expired plans are downgraded by the background sweeper; the time check covers
+    # the short window before it runs.
     is_active_subscription = False
-    if current_user.subscription_expires_at:
-        is_active_subscription = current_user.subscription_expires_at > datetime.now(timezone.utc)
+    current_plan = None
+    if current_user.subscription_plan != SubscriptionPlan.NONE:
+        current_plan = PlanName(current_user.subscription_plan.value.title())  # "pro" -> PlanName "Pro"
+        if current_user.subscription_expires_at:
+            is_active_subscription = current_user.subscription_expires_at > datetime.now(timezone.utc)
 
     return UserSubscriptionStatus(
         user_id=current_user.id,
-        current_plan=current_user.subscription_plan,
+        current_plan=current_plan,
         expires_at=current_user.subscription_expires_at,
         is_active=is_active_subscription
     )
@@ -49,9 +55,9 @@ async def cancel_subscription(current_user: User = Depends(get_current_active_us
     2. Update the local user record's subscription_plan to 'none' or set an expiry.
     """
     # Placeholder logic for in-memory user store
-    user_in_db = db_users.get(current_user.id)
+    user_in_db = await user_repository.get(current_user.id)
     if user_in_db:
-        if user_in_db.subscription_plan != PlanName.NONE:
+        if user_in_db.subscription_plan != SubscriptionPlan.NONE:
             # For simplicity, set to None immediately. Real world: set to expire at end of current period.
             print(f"User {current_user.email} cancelling plan {user_in_db.subscription_plan.value}.")
             # user_in_db.subscription_plan = PlanName.NONE
@@ -62,4 +68,14 @@ async def cancel_subscription(current_user: User = Depends(get_current_active_us
         else:
             return {"message": "No active subscription to cancel."}
 
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
\ No newline at end of file
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+
+
+@router.get("/expiry-sweeper", response_model=Dict[str, float])
+async def get_expiry_sweeper_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    Records processed and lag of the subscription expiry sweeper (admin only).
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return subscription_sweeper.stats()
\ No newline at end of file
@@ -1,45 +1,50 @@
 # backend/app/api/v1/endpoints/users.py
-from fastapi import APIRouter, Depends, HTTPException
-from backend.app.models.user import User, UserUpdate, db_users  # Using in-memory store
+from fastapi import APIRouter, Depends, HTTPException, status
+from backend.app.models.user import User, UserUpdate
+from backend.app.db.user_repository import user_repository, EmailAlreadyRegisteredError
 from backend.app.api.deps import get_current_active_user
-from backend.app.core.security import get_password_hash
+from backend.app.core.security import password_hasher
+from backend.app.core.token_cache import token_cache
 
 router = APIRouter()
 
 
 @router.get("/{user_id}", response_model=User)
-def read_user_by_id(user_id: int, current_user: User = Depends(get_current_active_user)):
+async def read_user_by_id(user_id: int, current_user: User = Depends(get_current_active_user)):
     """
     Get a specific user by id. For admins or the user themselves.
     """
     if current_user.id != user_id and current_user.role != "admin":  # Add role check if admin exists
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    user = db_users.get(user_id)
+    user = await user_repository.get_public(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return User.model_validate(user)
+    return user
 
 
 @router.put("/me", response_model=User)
-def update_user_me(user_in: UserUpdate, current_user: User = Depends(get_current_active_user)):
+async def update_user_me(user_in: UserUpdate, current_user: User = Depends(get_current_active_user)):
     """
     Update own user.
     """
     user_data = user_in.model_dump(exclude_unset=True)
 
-    db_user = db_users.get(current_user.id)
+    if "password" in user_data:
+        password = user_data.pop("password")
+        if password:
+            user_data["hashed_password"] = await password_hasher.hash(password)
+
+    try:
+        db_user = await user_repository.update(current_user.id, **user_data)
+    except EmailAlreadyRegisteredError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists",
+        )
     if not db_user:  # Should not happen if token is valid
         raise HTTPException(status_code=404, detail="User not found")
 
-    if "password" in user_data and user_data["password"]:
-        hashed_password = get_password_hash(user_data["password"])
-        db_user.hashed_password = hashed_password
-        del user_data["password"]
-
-    for field, value in user_data.items():
-        if hasattr(db_user, field):
-            setattr(db_user, field, value)
-
-    db_users[current_user.id] = db_user  # Update in-memory store
-    return User.model_validate(db_user)
\ No newline at end of file
+    # Cached claims (e.g. the email in `sub`) may no longer match the record
+    token_cache.invalidate_user(current_user.id)
+    return await user_repository.get_public(db_user.id)
\ No newline at end of file
@@ -1,7 +1,7 @@
 # backend/app/core/config.py
 import os
 from dotenv import load_dotenv
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic.v1 import BaseSettings
 
@@ -13,10 +13,34 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
 
+    # Password hashing process pool (bcrypt runs outside the API worker)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Jobs queued or running before new ones get a 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # Verified JWT claims cache (0 disables it)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+
     # Database (placeholder - use a real DB URL in production)
     # SQLALCHEMY_DATABASE_URL: str = "sqlite:///./test.db"
     # For in-memory demonstration:
     DATABASE_URL: str = "sqlite+aiosqlite:///./temp_db.sqlite3"
+    # "sqlite" (DATABASE_URL), or a process-local store lost on restart:
+    # "memory" (dict of models) or "columnar" (compact column arrays for large user counts)
+    USER_STORE_BACKEND: str = "sqlite"
+    # Durable mode for the "columnar" store: snapshot + append-only log in this directory
+    USER_STORE_JOURNAL_DIR: Optional[str] = None
+    USER_STORE_FSYNC_INTERVAL_SECONDS: float = 0.01  # Group-commit window for log fsyncs
+    USER_STORE_COMPACT_EVERY: int = 100000  # Log records between snapshots
+    DATABASE_POOL_SIZE: int = 4  # Reader connections; writes use one extra connection
+    DATABASE_WRITE_BATCH_SIZE: int = 64  # Max writes committed in one transaction
+    # How often each worker picks up user changes made by other workers (max cache staleness)
+    WORKER_SYNC_INTERVAL_SECONDS: float = 0.5
+    USER_CACHE_MAX_ENTRIES: int = 100000  # Public user projections each worker keeps (LRU)
+
+    # Background downgrade of expired subscriptions (0 disables the sweeper)
+    SUBSCRIPTION_SWEEP_INTERVAL_SECONDS: float = 60
+    SUBSCRIPTION_SWEEP_BATCH_SIZE: int = 500
 
 
     PROJECT_NAME: str = "Ultimate Code Assistant"
@@ -34,6 +58,78 @@ class Settings(BaseSettings):
     # Crypto Payment Gateway (Example - conceptual)
     CRYPTO_API_KEY: str = os.getenv("CRYPTO_API_KEY", "your_crypto_gw_api_key")
 
+    # Code model backend: "template" (placeholder output) or "http" (model server at INFERENCE_BASE_URL)
+    INFERENCE_BACKEND: str = "template"
+    INFERENCE_BASE_URL: str = os.getenv("INFERENCE_BASE_URL", "http://127.0.0.1:8100")
+    INFERENCE_API_KEY: Optional[str] = os.getenv("INFERENCE_API_KEY")
+    INFERENCE_TIMEOUT_SECONDS: float = 60
+    INFERENCE_CONNECT_TIMEOUT_SECONDS: float = 5
+    INFERENCE_MAX_CONNECTIONS: int = 64  # Keep-alive pool size
+    INFERENCE_MAX_CONCURRENCY: int = 32  # Calls in flight at once
+    # Micro-batching of concurrent non-streaming calls to the model server (0 disables)
+    INFERENCE_BATCH_WINDOW_MS: float = 5
+    INFERENCE_BATCH_MAX_SIZE: int = 16
+
+    # Autocompletion (/assist/complete/ws)
+    COMPLETION_TIMEOUT_SECONDS: float = 2  # Per model call; a late completion is discarded by the editor anyway
+    COMPLETION_MAX_CONTEXT_TOKENS: int = 2048  # Prefix sent to the model, at most the plan's context limit
+    COMPLETION_MAX_SUFFIX_CHARS: int = 2000
+
+    # Refactoring: formatting, import sorting, dead code and duplicated literals in Python
+    # code are done without the model (see services/local_refactor.py)
+    LOCAL_REFACTOR_ENABLED: bool = True
+    # Code of recent refactor requests and results, by hash, for follow-ups sending base_hash + patch
+    # (kept in RESPONSE_CACHE_DISK_PATH too, if set, so any worker can serve them)
+    REFACTOR_BASE_MAX_ENTRIES: int = 1024
+    REFACTOR_BASE_TTL_SECONDS: float = 3600
+
+    # Batch assist (/assist/batch)
+    BATCH_MAX_OPERATIONS: int = 100
+    BATCH_MAX_CONCURRENCY: int = 8  # Per batch; above ADMISSION_MAX_QUEUED_PER_USER, operations would be shed with 429
+
+    # Asynchronous jobs (/jobs): a SQLite job table, run by worker tasks of the API process
+    JOB_DB_PATH: str = os.getenv("JOB_DB_PATH", "./jobs.sqlite3")
+    JOB_WORKERS: int = 4  # Jobs run at once per API process
+    JOB_MAX_ACTIVE_PER_USER: int = 20  # Queued or running
+    JOB_RESULT_TTL_SECONDS: float = 86400  # Finished jobs are deleted after this long
+    JOB_HEARTBEAT_SECONDS: float = 5  # How often a process marks the jobs it runs as alive
+    JOB_STALE_AFTER_SECONDS: float = 30  # Running jobs without a heartbeat for this long are queued again
+    JOB_MAX_WAIT_SECONDS: float = 60  # Longest long-poll (?wait=)
+
+    # Exact-match cache of /assist responses (RESPONSE_CACHE_MAX_ENTRIES=0 disables the in-memory tier)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600
+    RESPONSE_CACHE_DISK_PATH: Optional[str] = os.getenv("RESPONSE_CACHE_DISK_PATH")  # SQLite file shared by workers
+    RESPONSE_CACHE_DISK_MAX_ENTRIES: int = 100000
+
+    # Opt-in near-duplicate prompt cache for /assist/generate-code (entries expire with RESPONSE_CACHE_TTL_SECONDS)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 100000
+    SEMANTIC_CACHE_DIMENSIONS: int = 128
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Minimum cosine similarity to reuse a generation
+
+    # Admission queue in front of code model calls (ADMISSION_MAX_CONCURRENCY=0 disables it)
+    ADMISSION_MAX_CONCURRENCY: int = 32  # Model calls running at once
+    ADMISSION_MAX_QUEUED: int = 256  # Waiting calls before new ones are shed
+    ADMISSION_MAX_QUEUED_PER_USER: int = 8
+    ADMISSION_PLAN_WEIGHTS: Dict[str, int] = {"basic": 1, "premium": 2, "pro": 4}  # Share of free slots per plan
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Project workspaces (uploaded source + symbol index) for multi-file context. Projects are stored in a
+    # SQLite file shared by workers; each worker indexes the ones it serves on first use
+    PROJECT_DB_PATH: str = os.getenv("PROJECT_DB_PATH", "./projects.sqlite3")
+    PROJECT_MAX_PER_USER: int = 5
+    PROJECT_MAX_FILES: int = 20000
+    PROJECT_MAX_FILE_BYTES: int = 1_000_000  # Larger files are skipped
+    PROJECT_MAX_BYTES: int = 200_000_000  # Source per project, and the largest archive accepted
+    PROJECT_CONTEXT_SHARE: float = 0.5  # Share of the plan's context token budget for project definitions
+    PROJECT_MAX_LOADED: int = 100  # Indexed workspaces each worker keeps in memory (LRU); evicted ones are rebuilt
+    # Embedding retrieval over project chunks (Pro: full project understanding)
+    PROJECT_RETRIEVAL_DIR: Optional[str] = os.getenv("PROJECT_RETRIEVAL_DIR")  # Memory-mapped vectors; temp dir if unset
+    PROJECT_RETRIEVAL_DIMENSIONS: int = 128  # 512 bytes per chunk
+    PROJECT_RETRIEVAL_TOP_K: int = 8  # Chunks retrieved per request, added as the budget allows
+    PROJECT_CHUNK_MAX_LINES: int = 40
+
     # Allowed origins for CORS
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost", "http://localhost:8000"] # Add frontend URL if different
 
@@ -0,0 +1,81 @@
+# backend/app/core/token_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from backend.app.core.config import settings
+from backend.app.models.user import TokenData
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of already-verified JWT claims, keyed by a digest of the token.
+    Entries are dropped once the token's `exp` has passed, and can be invalidated per user.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[TokenData, float]]" = OrderedDict()
+        self._digests_by_user: Dict[int, Set[str]] = {}
+
+    def get(self, token: str) -> Optional[TokenData]:
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            token_data, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(digest)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return token_data
+
+    def put(self, token: str, token_data: TokenData, expires_at: float) -> None:
+        if self.max_entries <= 0 or token_data.user_id is None:
+            return
+        digest = token_digest(token)
+        with self._lock:
+            if digest in self._entries:
+                self._remove(digest)
+            self._entries[digest] = (token_data, expires_at)
+            self._digests_by_user.setdefault(token_data.user_id, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for digest in list(self._digests_by_user.get(user_id, ())):
+                self._remove(digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests_by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _remove(self, digest: str) -> None:
+        # Caller holds the lock
+        token_data, _ = self._entries.pop(digest)
+        user_digests = self._digests_by_user.get(token_data.user_id)
+        if user_digests is not None:
+            user_digests.discard(digest)
+            if not user_digests:
+                del self._digests_by_user[token_data.user_id]
+
+
+token_cache = VerifiedTokenCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
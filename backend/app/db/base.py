@@ -0,0 +1,20 @@
+# backend/app/db/base.py
+from typing import Optional
+
+from backend.app.models.user import SubscriptionPlan
+
+
+class EmailAlreadyRegisteredError(ValueError):
+    """Raised when an insert or update would give two users the same email."""
+
+
+def normalize_email(email: str) -> str:
+    # Emails are matched case-insensitively; the stored value keeps the user's casing.
+    return email.strip().lower()
+
+
+def subscription_deadline(user) -> Optional[float]:
+    """Unix timestamp at which `user`'s paid plan lapses, or None if there is nothing to expire."""
+    if user.subscription_plan == SubscriptionPlan.NONE or user.subscription_expires_at is None:
+        return None
+    return user.subscription_expires_at.timestamp()
@@ -0,0 +1,341 @@
+# backend/app/db/columnar_user_repository.py
+import asyncio
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.app.db.base import EmailAlreadyRegisteredError, normalize_email, subscription_deadline
+from backend.app.db.expiry_index import ExpiryIndex
+from backend.app.db.user_journal import UserJournal
+from backend.app.models.user import User, UserInDB, UserRole, SubscriptionPlan
+
+# Enums are stored as one-byte codes into these tables
+ROLES: List[UserRole] = list(UserRole)
+PLANS: List[SubscriptionPlan] = list(SubscriptionPlan)
+ROLE_CODES: Dict[UserRole, int] = {role: code for code, role in enumerate(ROLES)}
+PLAN_CODES: Dict[SubscriptionPlan, int] = {plan: code for code, plan in enumerate(PLANS)}
+
+NO_EXPIRY = math.nan
+
+# Field -> attribute holding its column
+COLUMNS = {
+    "email": "_emails",
+    "full_name": "_full_names",
+    "hashed_password": "_hashed_passwords",
+    "is_active": "_active",
+    "role": "_roles",
+    "subscription_plan": "_plans",
+    "subscription_expires_at": "_expires_at",
+}
+
+
+class UserRow:
+    """
+    Read-only view of one row of a ColumnarUserRepository.
+    Exposes the same attributes as UserInDB without materializing a pydantic model.
+    """
+
+    __slots__ = ("_table", "_slot")
+
+    def __init__(self, table: "ColumnarUserRepository", slot: int):
+        self._table = table
+        self._slot = slot
+
+    @property
+    def id(self) -> int:
+        return self._slot + 1
+
+    @property
+    def email(self) -> str:
+        return self._table._emails[self._slot]
+
+    @property
+    def full_name(self) -> Optional[str]:
+        return self._table._full_names[self._slot]
+
+    @property
+    def hashed_password(self) -> str:
+        return self._table._hashed_passwords[self._slot]
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self._table._active[self._slot])
+
+    @property
+    def role(self) -> UserRole:
+        return ROLES[self._table._roles[self._slot]]
+
+    @property
+    def subscription_plan(self) -> SubscriptionPlan:
+        return PLANS[self._table._plans[self._slot]]
+
+    @property
+    def subscription_expires_at(self) -> Optional[datetime]:
+        expires_at = self._table._expires_at[self._slot]
+        if math.isnan(expires_at):
+            return None
+        return datetime.fromtimestamp(expires_at, tz=timezone.utc)
+
+    def to_public(self) -> User:
+        # Row data was validated when written
+        return User.model_construct(**{field: getattr(self, field) for field in User.model_fields})
+
+
+class ColumnarUserRepository:
+    """
+    Compact in-memory user table (single process only).
+    Each field is a column: strings in lists, flags and interned enum codes in
+    bytearrays, expiry timestamps in a float64 array. Ids are dense, so a user's
+    row is simply `id - 1`. Lookups return `UserRow` views instead of models, which
+    keeps per-user memory small; full scans read the columns directly (`iter_columns`).
+    Writes return a `UserInDB` snapshot, so later writes do not change what a caller holds.
+    Public projections of the `cache_size` most recently read users are cached until
+    their row version changes.
+    State is lost on restart unless a `UserJournal` is given, in which case every
+    write is logged durably and the table is restored from snapshot + log on connect.
+    Exposes the same API as InMemoryUserRepository.
+    """
+
+    def __init__(self, journal: Optional[UserJournal] = None, cache_size: int = 100000):
+        self._journal = journal
+        self.cache_size = cache_size
+        self._compaction: Optional[asyncio.Task] = None
+        self._lock = threading.RLock()
+        self._emails: List[str] = []
+        self._full_names: List[Optional[str]] = []
+        self._hashed_passwords: List[str] = []
+        self._active = bytearray()
+        self._roles = bytearray()
+        self._plans = bytearray()
+        self._expires_at = array("d")
+        self._versions = array("q")
+        # Public projection of each recently read row, with the row version it was built from
+        self._public: "OrderedDict[int, Tuple[User, int]]" = OrderedDict()
+        self._ids_by_email: Dict[str, int] = {}
+        self._expiry = ExpiryIndex()
+
+    async def connect(self) -> None:
+        if self._journal is None:
+            return
+        columns = self._journal.load_snapshot()
+        snapshot_lsn = 0
+        if columns is not None:
+            self._load_columns(columns)
+            snapshot_lsn = columns["lsn"]
+        for record in self._journal.replay(after_lsn=snapshot_lsn):
+            self._apply_record(record)
+        await self._journal.open()
+
+    async def close(self) -> None:
+        if self._journal is not None:
+            if self._compaction is not None:
+                await self._compaction
+            await self._journal.close()
+
+    def add_change_listener(self, listener) -> None:
+        # Single-process store: every change is made (and invalidated) locally
+        pass
+
+    async def count(self) -> int:
+        return len(self._emails)
+
+    def _row(self, user_id: int) -> Optional[UserRow]:
+        slot = user_id - 1
+        if 0 <= slot < len(self._emails):
+            return UserRow(self, slot)
+        return None
+
+    async def get(self, user_id: int) -> Optional[UserRow]:
+        return self._row(user_id)
+
+    async def get_public(self, user_id: int) -> Optional[User]:
+        row = self._row(user_id)
+        if row is None:
+            return None
+        version = self._versions[row._slot]
+        cached = self._public.get(user_id)
+        if cached is not None and cached[1] == version:
+            self._public.move_to_end(user_id)
+            return cached[0]
+        public = row.to_public()
+        self._public[user_id] = (public, version)
+        self._public.move_to_end(user_id)
+        while len(self._public) > self.cache_size:
+            self._public.popitem(last=False)
+        return public
+
+    async def version(self, user_id: int) -> Optional[int]:
+        row = self._row(user_id)
+        return self._versions[row._slot] if row is not None else None
+
+    async def get_by_email(self, email: str) -> Optional[UserRow]:
+        user_id = self._ids_by_email.get(normalize_email(email))
+        return self._row(user_id) if user_id is not None else None
+
+    def iter_rows(self) -> Iterator[UserRow]:
+        """Scan every user in id order."""
+        for slot in range(len(self._emails)):
+            yield UserRow(self, slot)
+
+    def iter_columns(self, *fields: str) -> Iterator[Tuple]:
+        """
+        Scan `fields` of every user in id order, as tuples of the stored values rather than
+        row views: `is_active` as 0/1, `role` and `subscription_plan` as their index in
+        ROLES / PLANS, `subscription_expires_at` as a POSIX timestamp (NaN when none).
+        """
+        return zip(*(getattr(self, COLUMNS[field]) for field in fields))
+
+    async def create(self, **fields) -> UserInDB:
+        key = normalize_email(fields["email"])
+        with self._lock:
+            if key in self._ids_by_email:
+                raise EmailAlreadyRegisteredError(fields["email"])
+            user = UserInDB(id=len(self._emails) + 1, **fields)  # Validate before storing
+            self._emails.append(user.email)
+            self._full_names.append(user.full_name)
+            self._hashed_passwords.append(user.hashed_password)
+            self._active.append(user.is_active)
+            self._roles.append(ROLE_CODES[user.role])
+            self._plans.append(PLAN_CODES[user.subscription_plan])
+            self._expires_at.append(_to_timestamp(user.subscription_expires_at))
+            self._versions.append(1)
+            self._ids_by_email[key] = user.id
+            self._expiry.schedule(user.id, subscription_deadline(user))
+            self._log_row(user.id - 1)
+        await self._wait_durable()
+        return user
+
+    async def update(self, user_id: int, **fields) -> Optional[UserInDB]:
+        fields = {field: value for field, value in fields.items() if field in UserInDB.model_fields and field != "id"}
+        with self._lock:
+            row = self._row(user_id)
+            if row is None:
+                return None
+            slot = row._slot
+
+            old_key = normalize_email(row.email)
+            new_key = old_key
+            if fields.get("email") is not None:
+                new_key = normalize_email(fields["email"])
+                owner_id = self._ids_by_email.get(new_key)
+                if owner_id is not None and owner_id != user_id:
+                    raise EmailAlreadyRegisteredError(fields["email"])
+
+            current = {field: getattr(row, field) for field in UserInDB.model_fields}
+            user = UserInDB.model_validate({**current, **fields})  # Validate before writing columns
+
+            self._emails[slot] = user.email
+            self._full_names[slot] = user.full_name
+            self._hashed_passwords[slot] = user.hashed_password
+            self._active[slot] = user.is_active
+            self._roles[slot] = ROLE_CODES[user.role]
+            self._plans[slot] = PLAN_CODES[user.subscription_plan]
+            self._expires_at[slot] = _to_timestamp(user.subscription_expires_at)
+            self._versions[slot] += 1
+            self._expiry.schedule(user_id, subscription_deadline(user))
+
+            if new_key != old_key:
+                del self._ids_by_email[old_key]
+                self._ids_by_email[new_key] = user_id
+            self._log_row(slot)
+        await self._wait_durable()
+        return user
+
+    async def update_subscription(
+            self, user_id: int, plan: SubscriptionPlan, expires_at: Optional[datetime]
+    ) -> Optional[UserInDB]:
+        return await self.update(user_id, subscription_plan=plan, subscription_expires_at=expires_at)
+
+    async def expire_due_subscriptions(self, now: float, limit: int) -> List[Tuple[int, float]]:
+        with self._lock:
+            due = self._expiry.pop_due(now, limit)
+        for user_id, _ in due:
+            await self.update(user_id, subscription_plan=SubscriptionPlan.NONE)
+        return due
+
+    # --- Durability (only used with a journal) ---------------------------------
+
+    def _log_row(self, slot: int) -> None:
+        # Caller holds the lock, so log order matches the order changes were applied
+        if self._journal is None:
+            return
+        expires_at = self._expires_at[slot]
+        self._journal.append({
+            "id": slot + 1,
+            "email": self._emails[slot],
+            "full_name": self._full_names[slot],
+            "hashed_password": self._hashed_passwords[slot],
+            "is_active": self._active[slot],
+            "role": self._roles[slot],
+            "plan": self._plans[slot],
+            "expires_at": None if math.isnan(expires_at) else expires_at,
+            "version": self._versions[slot],
+        })
+
+    async def _wait_durable(self) -> None:
+        if self._journal is None:
+            return
+        if self._journal.should_compact():
+            with self._lock:
+                columns = {
+                    "emails": list(self._emails),
+                    "full_names": list(self._full_names),
+                    "hashed_passwords": list(self._hashed_passwords),
+                    "active": bytearray(self._active),
+                    "roles": bytearray(self._roles),
+                    "plans": bytearray(self._plans),
+                    "expires_at": array("d", self._expires_at),
+                    "versions": array("q", self._versions),
+                }
+                lsn = self._journal.rotate()
+            self._compaction = asyncio.create_task(self._journal.write_snapshot(columns, lsn))
+        await self._journal.wait_durable()
+
+    def _load_columns(self, columns) -> None:
+        self._emails = columns["emails"]
+        self._full_names = columns["full_names"]
+        self._hashed_passwords = columns["hashed_passwords"]
+        self._active = columns["active"]
+        self._roles = columns["roles"]
+        self._plans = columns["plans"]
+        self._expires_at = columns["expires_at"]
+        self._versions = columns["versions"]
+        self._ids_by_email = {normalize_email(email): slot + 1 for slot, email in enumerate(self._emails)}
+        none_code = PLAN_CODES[SubscriptionPlan.NONE]
+        self._expiry.load({
+            slot + 1: expires_at
+            for slot, (plan, expires_at) in enumerate(zip(self._plans, self._expires_at))
+            if plan != none_code and not math.isnan(expires_at)
+        })
+
+    def _apply_record(self, record) -> None:
+        slot = record["id"] - 1
+        values = (
+            (self._emails, record["email"]),
+            (self._full_names, record["full_name"]),
+            (self._hashed_passwords, record["hashed_password"]),
+            (self._active, record["is_active"]),
+            (self._roles, record["role"]),
+            (self._plans, record["plan"]),
+            (self._expires_at, NO_EXPIRY if record["expires_at"] is None else record["expires_at"]),
+            (self._versions, record["version"]),
+        )
+        if slot == len(self._emails):
+            for column, value in values:
+                column.append(value)
+        else:
+            self._ids_by_email.pop(normalize_email(self._emails[slot]), None)
+            for column, value in values:
+                column[slot] = value
+        self._ids_by_email[normalize_email(record["email"])] = record["id"]
+        deadline = None
+        if record["plan"] != PLAN_CODES[SubscriptionPlan.NONE]:
+            deadline = record["expires_at"]
+        self._expiry.schedule(record["id"], deadline)
+
+
+def _to_timestamp(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else NO_EXPIRY
@@ -0,0 +1,50 @@
+# backend/app/db/expiry_index.py
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+
+class ExpiryIndex:
+    """
+    Min-heap of subscription expiry timestamps for the in-memory user stores.
+    Rescheduling a user leaves its old heap entry behind; stale entries are skipped
+    when popped, so scheduling is O(log n) and popping k due entries is O(k log n).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self._deadlines: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, user_id: int, expires_at: Optional[float]) -> None:
+        """Track `user_id` until `expires_at` (a Unix timestamp), or stop tracking it if None."""
+        if expires_at is None:
+            self._deadlines.pop(user_id, None)
+            return
+        if self._deadlines.get(user_id) == expires_at:
+            return
+        self._deadlines[user_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, user_id))
+        if len(self._heap) > 2 * len(self._deadlines) + 1024:
+            self._compact()
+
+    def load(self, deadlines: Dict[int, float]) -> None:
+        """Replace the index contents in O(n), e.g. when restoring a snapshot."""
+        self._deadlines = dict(deadlines)
+        self._compact()
+
+    def pop_due(self, now: float, limit: int) -> List[Tuple[int, float]]:
+        """Remove and return up to `limit` (user_id, expires_at) pairs due at `now`, earliest first."""
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= now:
+            expires_at, user_id = heapq.heappop(self._heap)
+            if self._deadlines.get(user_id) != expires_at:
+                continue  # Rescheduled or cancelled since this entry was pushed
+            del self._deadlines[user_id]
+            due.append((user_id, expires_at))
+        return due
+
+    def _compact(self) -> None:
+        self._heap = [(expires_at, user_id) for user_id, expires_at in self._deadlines.items()]
+        heapq.heapify(self._heap)
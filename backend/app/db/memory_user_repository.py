@@ -0,0 +1,122 @@
+# backend/app/db/memory_user_repository.py
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from backend.app.db.base import EmailAlreadyRegisteredError, normalize_email, subscription_deadline
+from backend.app.db.expiry_index import ExpiryIndex
+from backend.app.models.user import User, UserInDB, SubscriptionPlan
+
+
+class InMemoryUserRepository:
+    """
+    In-memory user store (state is lost on restart, and not shared between worker processes).
+    Keeps the primary id map and a unique, case-normalized email index in sync,
+    so lookups by either key are O(1) regardless of the number of accounts.
+    Each record also carries a version and a prebuilt, immutable `User` projection
+    that is only rebuilt when the record changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._users_by_id: Dict[int, UserInDB] = {}
+        self._ids_by_email: Dict[str, int] = {}
+        self._public_by_id: Dict[int, User] = {}
+        self._versions: Dict[int, int] = {}
+        self._expiry = ExpiryIndex()
+        self._next_id = 1
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def add_change_listener(self, listener) -> None:
+        # Single-process store: every change is made (and invalidated) locally
+        pass
+
+    async def count(self) -> int:
+        return len(self._users_by_id)
+
+    async def get(self, user_id: int) -> Optional[UserInDB]:
+        return self._users_by_id.get(user_id)
+
+    async def get_public(self, user_id: int) -> Optional[User]:
+        """Return the cached public projection, without revalidating the record."""
+        return self._public_by_id.get(user_id)
+
+    async def version(self, user_id: int) -> Optional[int]:
+        return self._versions.get(user_id)
+
+    async def get_by_email(self, email: str) -> Optional[UserInDB]:
+        user_id = self._ids_by_email.get(normalize_email(email))
+        if user_id is None:
+            return None
+        return self._users_by_id.get(user_id)
+
+    async def create(self, **fields) -> UserInDB:
+        """
+        Insert a new user, allocating its id. `fields` are the UserInDB fields except `id`.
+        """
+        key = normalize_email(fields["email"])
+        with self._lock:
+            if key in self._ids_by_email:
+                raise EmailAlreadyRegisteredError(fields["email"])
+            user = UserInDB(id=self._next_id, **fields)
+            self._next_id += 1
+            self._store(user, User.model_validate(user))
+            self._ids_by_email[key] = user.id
+        return user
+
+    async def update(self, user_id: int, **fields) -> Optional[UserInDB]:
+        """
+        Apply `fields` to an existing user. Email changes re-key the index atomically.
+        Records are replaced, not mutated, so previously returned objects stay consistent.
+        Returns the updated user, or None if it does not exist.
+        """
+        fields = {field: value for field, value in fields.items() if field in UserInDB.model_fields}
+        with self._lock:
+            user = self._users_by_id.get(user_id)
+            if user is None:
+                return None
+
+            old_key = normalize_email(user.email)
+            new_key = old_key
+            if fields.get("email") is not None:
+                new_key = normalize_email(fields["email"])
+                owner_id = self._ids_by_email.get(new_key)
+                if owner_id is not None and owner_id != user_id:
+                    raise EmailAlreadyRegisteredError(fields["email"])
+
+            user = user.model_copy(update=fields)
+            public = User.model_validate(user)  # Validates the change before it is committed
+            self._store(user, public)
+
+            if new_key != old_key:
+                del self._ids_by_email[old_key]
+                self._ids_by_email[new_key] = user_id
+        return user
+
+    async def update_subscription(
+            self, user_id: int, plan: SubscriptionPlan, expires_at: Optional[datetime]
+    ) -> Optional[UserInDB]:
+        return await self.update(user_id, subscription_plan=plan, subscription_expires_at=expires_at)
+
+    async def expire_due_subscriptions(self, now: float, limit: int) -> List[Tuple[int, float]]:
+        """
+        Downgrade up to `limit` users whose paid subscription expired at or before `now`.
+        Returns (user_id, expires_at) for each downgraded user, earliest first.
+        """
+        with self._lock:
+            due = self._expiry.pop_due(now, limit)
+            for user_id, _ in due:
+                await self.update(user_id, subscription_plan=SubscriptionPlan.NONE)
+        return due
+
+    def _store(self, user: UserInDB, public: User) -> None:
+        # Caller holds the lock
+        self._users_by_id[user.id] = user
+        self._public_by_id[user.id] = public
+        self._versions[user.id] = self._versions.get(user.id, 0) + 1
+        self._expiry.schedule(user.id, subscription_deadline(user))
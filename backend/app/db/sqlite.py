@@ -0,0 +1,149 @@
+# backend/app/db/sqlite.py
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+# Statements are kept as constant strings so sqlite3's per-connection statement
+# cache can reuse the prepared form instead of recompiling on every call.
+STATEMENT_CACHE_SIZE = 256
+
+
+def sqlite_path_from_url(database_url: str) -> str:
+    # "sqlite+aiosqlite:///./temp_db.sqlite3" -> "./temp_db.sqlite3"
+    _, _, path = database_url.partition(":///")
+    if not path:
+        raise ValueError(f"Unsupported SQLite database URL: {database_url}")
+    return path
+
+
+class SQLitePool:
+    """
+    Small aiosqlite connection pool for a WAL-mode database.
+    Reads are spread over `size` reader connections. All writes go through a single
+    writer connection and are grouped into one transaction per batch, which is how
+    SQLite wants to be written to (one writer at a time, few fsyncs).
+    """
+
+    def __init__(self, database_url: str, size: int = 4, write_batch_size: int = 64):
+        self.path = sqlite_path_from_url(database_url)
+        self.size = size
+        self.write_batch_size = write_batch_size
+        self._readers: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._writes: "asyncio.Queue[Tuple[str, Sequence[Any], asyncio.Future]]" = asyncio.Queue()
+        self._write_task: Optional[asyncio.Task] = None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(
+            self.path,
+            isolation_level=None,  # Transactions are managed explicitly by the writer
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def open(self) -> None:
+        if self._writer is not None:
+            return
+        # Queues must belong to the running loop
+        self._readers = asyncio.Queue()
+        self._writes = asyncio.Queue()
+        self._writer = await self._connect()
+        for _ in range(self.size):
+            conn = await self._connect()
+            self._reader_connections.append(conn)
+            self._readers.put_nowait(conn)
+        self._write_task = asyncio.create_task(self._write_loop())
+
+    async def close(self) -> None:
+        if self._write_task is not None:
+            self._write_task.cancel()
+            try:
+                await self._write_task
+            except asyncio.CancelledError:
+                pass
+            self._write_task = None
+        for conn in self._reader_connections:
+            await conn.close()
+        self._reader_connections.clear()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    async def executescript(self, script: str) -> None:
+        """Run DDL directly on the writer connection (startup only)."""
+        await self._writer.executescript(script)
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[sqlite3.Row]:
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        async with self.reader() as conn:
+            async with conn.execute(sql, params) as cursor:
+                return list(await cursor.fetchall())
+
+    async def write(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        """
+        Queue a write and wait until its batch is committed.
+        Returns any rows produced by the statement (e.g. from a RETURNING clause).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((sql, params, future))
+        return await future
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self.write_batch_size and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch: List[Tuple[str, Sequence[Any], asyncio.Future]]) -> None:
+        results = []
+        try:
+            await self._writer.execute("BEGIN IMMEDIATE")
+            for sql, params, future in batch:
+                try:
+                    async with self._writer.execute(sql, params) as cursor:
+                        rows = list(await cursor.fetchall())
+                    results.append((future, rows, None))
+                except sqlite3.Error as e:
+                    # Only this statement is rolled back; the rest of the batch still commits
+                    results.append((future, None, e))
+            await self._writer.execute("COMMIT")
+        except Exception as e:
+            # Whatever failed, it fails this batch only: the loop must keep serving later writes
+            try:
+                if self._writer.in_transaction:
+                    await self._writer.execute("ROLLBACK")
+            except Exception as rollback_error:
+                print(f"SQLite writer: rollback after {e!r} failed: {rollback_error!r}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, rows, error in results:
+            if future.done():  # Caller went away
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(rows)
@@ -0,0 +1,287 @@
+# backend/app/db/sqlite_user_repository.py
+import asyncio
+import sqlite3
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Tuple
+
+from backend.app.db.sqlite import SQLitePool
+from backend.app.db.base import EmailAlreadyRegisteredError, normalize_email
+from backend.app.models.user import User, UserInDB, UserRole, SubscriptionPlan
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL,
+    email_key TEXT NOT NULL UNIQUE,
+    full_name TEXT,
+    hashed_password TEXT NOT NULL,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    role TEXT NOT NULL DEFAULT 'user',
+    subscription_plan TEXT NOT NULL DEFAULT 'none',
+    subscription_expires_at REAL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+-- Only paid plans can expire, so the expiry index skips everyone else
+CREATE INDEX IF NOT EXISTS users_subscription_expiry
+    ON users (subscription_expires_at) WHERE subscription_plan != 'none';
+
+-- Change feed read by every worker process to invalidate its in-process caches
+CREATE TABLE IF NOT EXISTS user_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    changed_at REAL NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS users_changed AFTER UPDATE ON users
+BEGIN
+    INSERT INTO user_changes (user_id, version, changed_at)
+    VALUES (NEW.id, NEW.version, (julianday('now') - 2440587.5) * 86400.0);
+END;
+"""
+
+USER_COLUMNS = (
+    "id, email, full_name, hashed_password, is_active, role, "
+    "subscription_plan, subscription_expires_at, version"
+)
+SELECT_BY_ID = f"SELECT {USER_COLUMNS} FROM users WHERE id = ?"
+SELECT_BY_EMAIL_KEY = f"SELECT {USER_COLUMNS} FROM users WHERE email_key = ?"
+COUNT_USERS = "SELECT COUNT(*) FROM users"
+INSERT_USER = (
+    "INSERT INTO users (email, email_key, full_name, hashed_password, is_active, role, "
+    "subscription_plan, subscription_expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    f"RETURNING {USER_COLUMNS}"
+)
+SELECT_LAST_CHANGE = "SELECT COALESCE(MAX(seq), 0) FROM user_changes"
+SELECT_CHANGES_SINCE = "SELECT seq, user_id, version FROM user_changes WHERE seq > ? ORDER BY seq"
+PRUNE_CHANGES = "DELETE FROM user_changes WHERE changed_at < ?"
+UPDATE_SUBSCRIPTION = (
+    "UPDATE users SET subscription_plan = ?, subscription_expires_at = ?, version = version + 1 "
+    f"WHERE id = ? RETURNING {USER_COLUMNS}"
+)
+EXPIRE_DUE_SUBSCRIPTIONS = (
+    "UPDATE users SET subscription_plan = 'none', version = version + 1 WHERE id IN ("
+    "SELECT id FROM users WHERE subscription_plan != 'none' AND subscription_expires_at <= ? "
+    f"ORDER BY subscription_expires_at LIMIT ?) RETURNING {USER_COLUMNS}"
+)
+
+# Fields a caller may change through update(); each is stored in the column of the same name
+UPDATABLE_COLUMNS = (
+    "email", "full_name", "hashed_password", "is_active", "role",
+    "subscription_plan", "subscription_expires_at",
+)
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value is not None else None
+
+
+def _to_column(field: str, value):
+    if field == "subscription_expires_at":
+        return _to_timestamp(value)
+    if field in ("role", "subscription_plan") and value is not None:
+        return value.value
+    return value
+
+
+def _row_to_user(row: sqlite3.Row) -> UserInDB:
+    # Rows were validated when written, so skip pydantic validation on the read path
+    expires_at = row["subscription_expires_at"]
+    return UserInDB.model_construct(
+        id=row["id"],
+        email=row["email"],
+        full_name=row["full_name"],
+        hashed_password=row["hashed_password"],
+        is_active=bool(row["is_active"]),
+        role=UserRole(row["role"]),
+        subscription_plan=SubscriptionPlan(row["subscription_plan"]),
+        subscription_expires_at=(
+            datetime.fromtimestamp(expires_at, tz=timezone.utc) if expires_at is not None else None
+        ),
+    )
+
+
+class SQLiteUserRepository:
+    """
+    User and subscription store persisted in the SQLite database at DATABASE_URL.
+    Exposes the same API as InMemoryUserRepository.
+
+    Safe to share between several worker processes: ids come from SQLite's
+    AUTOINCREMENT, and every update is recorded in `user_changes` by a trigger.
+    Each process polls that feed every `sync_interval` seconds and drops cached
+    projections that another process has changed, so they are never staler than that.
+    At most `cache_size` projections are kept, least recently used evicted first.
+    """
+
+    def __init__(
+            self,
+            database_url: str,
+            pool_size: int = 4,
+            write_batch_size: int = 64,
+            sync_interval: float = 0.5,
+            change_retention: float = 3600,
+            cache_size: int = 100000,
+    ):
+        self.pool = SQLitePool(database_url, size=pool_size, write_batch_size=write_batch_size)
+        self.sync_interval = sync_interval
+        self.change_retention = change_retention
+        self.cache_size = cache_size
+        # Public projections of rows written or read by this process, with their row version
+        self._cached: "OrderedDict[int, Tuple[User, int]]" = OrderedDict()
+        self._change_seq = 0
+        self._change_listeners: List[Callable[[int], None]] = []
+        self._sync_task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        await self.pool.open()
+        await self.pool.executescript(SCHEMA)
+        row = await self.pool.fetchone(SELECT_LAST_CHANGE)
+        self._change_seq = row[0]
+        self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def close(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        await self.pool.close()
+
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        """Call `listener(user_id)` whenever another process changes a user."""
+        self._change_listeners.append(listener)
+
+    async def count(self) -> int:
+        row = await self.pool.fetchone(COUNT_USERS)
+        return row[0]
+
+    async def get(self, user_id: int) -> Optional[UserInDB]:
+        row = await self.pool.fetchone(SELECT_BY_ID, (user_id,))
+        return _row_to_user(row) if row is not None else None
+
+    async def get_by_email(self, email: str) -> Optional[UserInDB]:
+        row = await self.pool.fetchone(SELECT_BY_EMAIL_KEY, (normalize_email(email),))
+        return _row_to_user(row) if row is not None else None
+
+    async def get_public(self, user_id: int) -> Optional[User]:
+        cached = self._cached.get(user_id)
+        if cached is not None:
+            self._cached.move_to_end(user_id)
+            return cached[0]
+        row = await self.pool.fetchone(SELECT_BY_ID, (user_id,))
+        if row is None:
+            return None
+        return self._remember(row)
+
+    async def version(self, user_id: int) -> Optional[int]:
+        if user_id not in self._cached and await self.get_public(user_id) is None:
+            return None
+        return self._cached[user_id][1]
+
+    async def create(self, **fields) -> UserInDB:
+        user = UserInDB(id=0, **fields)  # Validate before writing; id is assigned by SQLite
+        try:
+            rows = await self.pool.write(INSERT_USER, (
+                user.email,
+                normalize_email(user.email),
+                user.full_name,
+                user.hashed_password,
+                user.is_active,
+                user.role.value,
+                user.subscription_plan.value,
+                _to_timestamp(user.subscription_expires_at),
+            ))
+        except sqlite3.IntegrityError:
+            raise EmailAlreadyRegisteredError(fields["email"])
+        self._remember(rows[0])
+        return _row_to_user(rows[0])
+
+    async def update(self, user_id: int, **fields) -> Optional[UserInDB]:
+        fields = {field: value for field, value in fields.items() if field in UPDATABLE_COLUMNS}
+        current = await self.get(user_id)
+        if current is None:
+            return None
+        if not fields:
+            return current
+        User.model_validate(current.model_copy(update=fields))  # Validate before writing
+
+        assignments = [f"{field} = ?" for field in fields]
+        params = [_to_column(field, value) for field, value in fields.items()]
+        if fields.get("email") is not None:
+            assignments.append("email_key = ?")
+            params.append(normalize_email(fields["email"]))
+        # Only the changed columns are written, so concurrent updates to other fields are not lost
+        sql = (
+            f"UPDATE users SET {', '.join(assignments)}, version = version + 1 "
+            f"WHERE id = ? RETURNING {USER_COLUMNS}"
+        )
+        try:
+            rows = await self.pool.write(sql, (*params, user_id))
+        except sqlite3.IntegrityError:
+            raise EmailAlreadyRegisteredError(fields["email"])
+        if not rows:
+            return None
+        self._remember(rows[0])
+        return _row_to_user(rows[0])
+
+    async def update_subscription(
+            self, user_id: int, plan: SubscriptionPlan, expires_at: Optional[datetime]
+    ) -> Optional[UserInDB]:
+        rows = await self.pool.write(UPDATE_SUBSCRIPTION, (plan.value, _to_timestamp(expires_at), user_id))
+        if not rows:
+            return None
+        self._remember(rows[0])
+        return _row_to_user(rows[0])
+
+    async def expire_due_subscriptions(self, now: float, limit: int) -> List[Tuple[int, float]]:
+        """
+        Downgrade up to `limit` users whose paid subscription expired at or before `now`,
+        using the partial expiry index. Safe to run from several workers at once.
+        """
+        rows = await self.pool.write(EXPIRE_DUE_SUBSCRIPTIONS, (now, limit))
+        for row in rows:
+            self._remember(row)
+        # Earliest expiry first, like the other backends
+        return sorted(((row["id"], row["subscription_expires_at"]) for row in rows), key=lambda due: (due[1], due[0]))
+
+    async def sync_changes(self) -> int:
+        """Apply changes made by other processes since the last sync. Returns how many were applied."""
+        rows = await self.pool.fetchall(SELECT_CHANGES_SINCE, (self._change_seq,))
+        applied = 0
+        for row in rows:
+            self._change_seq = row["seq"]
+            user_id = row["user_id"]
+            cached = self._cached.get(user_id)
+            if cached is not None and cached[1] >= row["version"]:
+                continue  # Our own write, or already seen
+            self._cached.pop(user_id, None)
+            for listener in self._change_listeners:
+                listener(user_id)
+            applied += 1
+        return applied
+
+    async def _sync_loop(self) -> None:
+        last_prune = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync_changes()
+                if time.monotonic() - last_prune > self.change_retention / 2:
+                    await self.pool.write(PRUNE_CHANGES, (time.time() - self.change_retention,))
+                    last_prune = time.monotonic()
+            except Exception as e:  # Keep syncing: a dead loop would leave the cache stale for good
+                print(f"User change feed sync failed: {e!r}")
+
+    def _remember(self, row: sqlite3.Row) -> User:
+        user = _row_to_user(row)
+        public = User.model_construct(**{field: getattr(user, field) for field in User.model_fields})
+        self._cached[user.id] = (public, row["version"])
+        self._cached.move_to_end(user.id)
+        while len(self._cached) > self.cache_size:
+            self._cached.popitem(last=False)
+        return public
@@ -0,0 +1,284 @@
+# backend/app/db/user_journal.py
+import asyncio
+import glob
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+SNAPSHOT_FILE = "users.snapshot"
+SNAPSHOT_MAGIC = b"CORDAUS1"
+# Column sections stored in a snapshot, in file order: (name, kind)
+# "bytes" -> bytearray, "d"/"q" -> array typecode, "json" -> JSON list of strings (decoded in C)
+SNAPSHOT_SECTIONS = (
+    ("active", "bytes"),
+    ("roles", "bytes"),
+    ("plans", "bytes"),
+    ("expires_at", "d"),
+    ("versions", "q"),
+    ("emails", "json"),
+    ("full_names", "json"),
+    ("hashed_passwords", "json"),
+)
+# magic, lsn, row count, then the byte length of every section
+SNAPSHOT_HEADER = struct.Struct("<8sQQ" + "Q" * len(SNAPSHOT_SECTIONS))
+
+
+def _segment_name(first_lsn: int) -> str:
+    return f"log-{first_lsn:020d}.jsonl"
+
+
+def _fsync_directory(directory: str) -> None:
+    # Makes a file's creation or rename durable, not just its contents
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_all(files: List[Any], directory: Optional[str] = None) -> None:
+    for f in files:
+        os.fsync(f.fileno())
+    if directory is not None:
+        _fsync_directory(directory)
+
+
+class UserJournal:
+    """
+    Durability for the columnar user store: an append-only log of row states plus
+    a periodic binary snapshot of all columns.
+
+    Every mutation is appended as one JSON line tagged with a log sequence number (lsn).
+    Appends are fsynced in groups every `fsync_interval` seconds; callers await
+    `wait_durable()` before acknowledging a write. After `compact_every` records the
+    store captures its columns, a new log segment is started, and the snapshot is
+    rewritten in a thread; older segments are then deleted. Startup maps the snapshot
+    and replays only the log records newer than it.
+    """
+
+    def __init__(self, directory: str, fsync_interval: float = 0.01, compact_every: int = 100000):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.lsn = 0
+        self.records_since_snapshot = 0
+        self.compacting = False
+        self._file = None
+        self._retired_files = []  # Segments rotated out but not yet fsynced and closed
+        self._segment_first_lsn = 1
+        self._segment_created = False  # The directory entry of a new segment still needs an fsync
+        self._group: Optional[asyncio.Future] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._closed: Optional[asyncio.Event] = None  # Set once close() has synced the last appends
+        self._close_error: Optional[OSError] = None
+
+    # --- Startup -------------------------------------------------------------
+
+    def load_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Return the snapshot's columns (plus "lsn" and "count"), or None if there is none."""
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) < SNAPSHOT_HEADER.size:
+            return None
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, lsn, count, *lengths = SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a user snapshot")
+            columns: Dict[str, Any] = {"lsn": lsn, "count": count}
+            offset = SNAPSHOT_HEADER.size
+            view = memoryview(mm)
+            try:
+                for (name, kind), length in zip(SNAPSHOT_SECTIONS, lengths):
+                    section = view[offset:offset + length]
+                    offset += length
+                    if kind == "bytes":
+                        columns[name] = bytearray(section)
+                    elif kind == "json":
+                        columns[name] = json.loads(str(section, "utf-8"))
+                    else:
+                        column = array(kind)
+                        column.frombytes(section)
+                        columns[name] = column
+                    section.release()
+            finally:
+                view.release()
+        self.lsn = lsn
+        return columns
+
+    def replay(self, after_lsn: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yield log records newer than `after_lsn`, oldest first, from every segment. A torn
+        final write (a line cut short by a crash) is truncated off its segment, so appends
+        after recovery start on a clean line; an unreadable complete line is skipped.
+        """
+        for path in sorted(glob.glob(os.path.join(self.directory, "log-*.jsonl"))):
+            good = 0  # Offset just past the last complete line
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    good += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        print(f"User journal: skipped an unreadable record in {path}")
+                        continue
+                    if record["lsn"] > after_lsn:
+                        self.lsn = max(self.lsn, record["lsn"])
+                        self.records_since_snapshot += 1
+                        yield record
+            if good < os.path.getsize(path):
+                print(f"User journal: truncating a torn write at offset {good} of {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+                    os.fsync(f.fileno())
+
+    async def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_segment()
+        self._wake = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """
+        Stop the flush loop and fsync everything appended. Groups still waiting are settled
+        with the result of that final sync, as is any wait_durable() called meanwhile.
+        """
+        if self._closed is not None:
+            await self._closed.wait()
+            return
+        self._closed = asyncio.Event()
+        try:
+            if self._flush_task is not None:
+                self._wake.set()
+                await self._flush_task  # Settles the group in flight, then returns
+                self._flush_task = None
+            group, self._group = self._group, None
+            if self._file is not None:
+                try:
+                    await self._sync()
+                except OSError as e:
+                    self._close_error = e
+                    if group is not None:
+                        group.set_exception(e)
+                    raise
+                finally:
+                    for f in self._retired_files + [self._file]:
+                        f.close()
+                    self._retired_files = []
+                    self._file = None
+            if group is not None:
+                group.set_result(None)
+        finally:
+            self._closed.set()
+
+    # --- Writes --------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Buffer one record. The caller must serialize appends (the store's lock)."""
+        self.lsn += 1
+        self.records_since_snapshot += 1
+        record["lsn"] = self.lsn
+        self._file.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    async def wait_durable(self) -> None:
+        """Wait until everything appended so far has been fsynced (group commit)."""
+        if self._closed is not None:  # Closing: the final sync covers every append
+            await self._closed.wait()
+            if self._close_error is not None:
+                raise self._close_error
+            return
+        if self._group is None:
+            self._group = asyncio.get_running_loop().create_future()
+            self._wake.set()
+        await asyncio.shield(self._group)
+
+    async def _flush_loop(self) -> None:
+        while self._closed is None:
+            await self._wake.wait()
+            self._wake.clear()
+            await asyncio.sleep(self.fsync_interval)  # Let concurrent writers join the group
+            group, self._group = self._group, None
+            try:
+                await self._sync()
+            except OSError as e:
+                if group is not None:
+                    group.set_exception(e)
+                continue
+            if group is not None:
+                group.set_result(None)
+
+    async def _sync(self) -> None:
+        files = self._retired_files + [self._file]
+        self._retired_files = []
+        directory = self.directory if self._segment_created else None
+        self._segment_created = False
+        for f in files:
+            f.flush()
+        try:
+            await asyncio.to_thread(_fsync_all, files, directory)
+        except OSError:
+            self._segment_created = self._segment_created or directory is not None
+            raise
+        for f in files[:-1]:
+            f.close()
+
+    def _open_segment(self) -> None:
+        self._segment_first_lsn = self.lsn + 1
+        path = os.path.join(self.directory, _segment_name(self._segment_first_lsn))
+        self._segment_created = self._segment_created or not os.path.exists(path)
+        self._file = open(path, "ab")
+
+    # --- Compaction ----------------------------------------------------------
+
+    def should_compact(self) -> bool:
+        return not self.compacting and self.records_since_snapshot >= self.compact_every
+
+    def rotate(self) -> int:
+        """
+        Start a new log segment. Call under the store's lock, right after capturing
+        its columns; returns the lsn the capture corresponds to.
+        """
+        self.compacting = True
+        # Still fsynced by the flush loop, so pending waiters stay durable
+        self._retired_files.append(self._file)
+        self._open_segment()
+        self.records_since_snapshot = 0
+        return self.lsn
+
+    async def write_snapshot(self, columns: Dict[str, Any], lsn: int) -> None:
+        try:
+            await asyncio.to_thread(self._write_snapshot_files, columns, lsn)
+        finally:
+            self.compacting = False
+
+    def _write_snapshot_files(self, columns: Dict[str, Any], lsn: int) -> None:
+        sections = []
+        for name, kind in SNAPSHOT_SECTIONS:
+            column = columns[name]
+            if kind == "json":
+                sections.append(json.dumps(column, separators=(",", ":")).encode("utf-8"))
+            else:
+                sections.append(bytes(column) if kind == "bytes" else column.tobytes())
+
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, lsn, len(columns["emails"]), *(len(section) for section in sections)
+            ))
+            for section in sections:
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        _fsync_directory(self.directory)
+
+        # Everything up to `lsn` is now in the snapshot
+        current = _segment_name(lsn + 1)  # The segment started by rotate()
+        for segment in glob.glob(os.path.join(self.directory, "log-*.jsonl")):
+            if os.path.basename(segment) < current:
+                os.remove(segment)
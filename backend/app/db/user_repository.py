@@ -0,0 +1,33 @@
+# backend/app/db/user_repository.py
+from backend.app.core.config import settings
+from backend.app.db.base import EmailAlreadyRegisteredError
+from backend.app.db.columnar_user_repository import ColumnarUserRepository
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.db.sqlite_user_repository import SQLiteUserRepository
+from backend.app.db.user_journal import UserJournal
+
+
+def _build_user_repository():
+    if settings.USER_STORE_BACKEND == "memory":
+        return InMemoryUserRepository()
+    if settings.USER_STORE_BACKEND == "columnar":
+        journal = None
+        if settings.USER_STORE_JOURNAL_DIR:
+            journal = UserJournal(
+                settings.USER_STORE_JOURNAL_DIR,
+                fsync_interval=settings.USER_STORE_FSYNC_INTERVAL_SECONDS,
+                compact_every=settings.USER_STORE_COMPACT_EVERY,
+            )
+        return ColumnarUserRepository(journal=journal, cache_size=settings.USER_CACHE_MAX_ENTRIES)
+    if settings.USER_STORE_BACKEND == "sqlite":
+        return SQLiteUserRepository(
+            settings.DATABASE_URL,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            write_batch_size=settings.DATABASE_WRITE_BATCH_SIZE,
+            sync_interval=settings.WORKER_SYNC_INTERVAL_SECONDS,
+            cache_size=settings.USER_CACHE_MAX_ENTRIES,
+        )
+    raise ValueError(f"Unknown USER_STORE_BACKEND: {settings.USER_STORE_BACKEND}")
+
+
+user_repository = _build_user_repository()
@@ -40,10 +40,10 @@ try:
     print("--- DEBUG: Successfully imported 'backend.app.core.config.settings' ---")
     from backend.app.api.v1.api import api_router
     print("--- DEBUG: Successfully imported 'backend.app.api.v1.api.api_router' ---")
-    from backend.app.models.user import UserInDB, UserRole, SubscriptionPlan, db_users, user_id_counter, User
+    from backend.app.models.user import UserRole, SubscriptionPlan
     print("--- DEBUG: Successfully imported 'backend.app.models.user' modules ---")
-    from backend.app.core.security import get_password_hash
-    print("--- DEBUG: Successfully imported 'backend.app.core.security.get_password_hash' ---")
+    from backend.app.db.user_repository import user_repository, EmailAlreadyRegisteredError
+    print("--- DEBUG: Successfully imported 'backend.app.db.user_repository.user_repository' ---")
 except ImportError as e:
     print(f"--- DEBUG: !!! IMPORT ERROR OCCURRED !!! ---")
     print(f"--- DEBUG: Error message: {e} ---")
@@ -73,37 +73,54 @@ except ImportError as e:
     raise # Re-raise the import error to stop execution if it occurs
 
 # If imports were successful, continue with FastAPI app setup
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta, timezone
 
+from backend.app.core.security import password_hasher, PasswordHasherBusyError
+from backend.app.core.token_cache import token_cache
+from backend.app.services.subscription_sweeper import subscription_sweeper
+from backend.app.services.code_assistant_service import code_assistant_service
+from backend.app.services.inference_backend import InferenceError, InferenceTimeoutError
+from backend.app.services.admission_queue import AdmissionRejectedError
+from backend.app.services.project_workspace import ProjectLimitError, ProjectNotFoundError
+from backend.app.services.code_diff import PatchError, UnknownBaseError
+from backend.app.services.job_queue import JobLimitError, JobNotFoundError, job_queue
+from backend.app.api.v1.endpoints.code_assistant import UNKNOWN_BASE_DETAIL, operation_error
+from backend.app.api.v1.endpoints.jobs import run_job_operation
+
 print("--- DEBUG: All project imports successful. Proceeding with FastAPI app setup. ---")
 
 
-if not db_users: # Add a default user if store is empty
-    hashed_password = get_password_hash("string")
-    db_users[user_id_counter] = UserInDB(
-        id=user_id_counter,
+async def seed_default_users():
+    if await user_repository.count(): # Add default users only if store is empty
+        return
+    try:
+        await _create_default_users()
+    except EmailAlreadyRegisteredError:
+        pass  # Another worker process seeded the shared store first
+
+
+async def _create_default_users():
+    await user_repository.create(
         email="user@example.com",
         full_name="Test User",
-        hashed_password=hashed_password,
+        hashed_password=await password_hasher.hash("string"),
         is_active=True,
         role=UserRole.USER,
         subscription_plan=SubscriptionPlan.PRO,
         subscription_expires_at=datetime.now(timezone.utc) + timedelta(days=30)
     )
-    user_id_counter += 1
-    db_users[user_id_counter] = UserInDB(
-        id=user_id_counter,
+    await user_repository.create(
         email="basic@example.com",
         full_name="Basic User",
-        hashed_password=get_password_hash("basicpass"),
+        hashed_password=await password_hasher.hash("basicpass"),
         is_active=True,
         role=UserRole.USER,
         subscription_plan=SubscriptionPlan.BASIC,
         subscription_expires_at=datetime.now(timezone.utc) + timedelta(days=30)
     )
-    user_id_counter += 1
 
 
 app = FastAPI(
@@ -123,6 +140,102 @@ if settings.BACKEND_CORS_ORIGINS:
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(AdmissionRejectedError)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejectedError):
+    if exc.per_user:
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Too many of your requests are already waiting for the code model."},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "The code model is at capacity, please retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(InferenceError)
+async def inference_error_handler(request: Request, exc: InferenceError):
+    if isinstance(exc, InferenceTimeoutError):
+        return JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": "The code model took too long to respond."},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        content={"detail": "The code model is currently unavailable."},
+    )
+
+
+@app.exception_handler(ProjectNotFoundError)
+async def project_not_found_handler(request: Request, exc: ProjectNotFoundError):
+    return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Project not found."})
+
+
+@app.exception_handler(ProjectLimitError)
+async def project_limit_handler(request: Request, exc: ProjectLimitError):
+    return JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": str(exc)})
+
+
+@app.exception_handler(UnknownBaseError)
+async def unknown_base_handler(request: Request, exc: UnknownBaseError):
+    return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": UNKNOWN_BASE_DETAIL})
+
+
+@app.exception_handler(PatchError)
+async def patch_error_handler(request: Request, exc: PatchError):
+    return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": str(exc)})
+
+
+@app.exception_handler(JobNotFoundError)
+async def job_not_found_handler(request: Request, exc: JobNotFoundError):
+    return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Job not found."})
+
+
+@app.exception_handler(JobLimitError)
+async def job_limit_handler(request: Request, exc: JobLimitError):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many of your jobs are still unfinished; wait for some to complete."},
+    )
+
+
+@app.on_event("startup")
+async def startup_user_store():
+    await user_repository.connect()
+    # Tokens cached by this worker must not outlive changes made by other workers
+    user_repository.add_change_listener(token_cache.invalidate_user)
+    await seed_default_users()
+    subscription_sweeper.start()
+    await job_queue.start(run_job_operation, operation_error)  # Resumes jobs interrupted by the last shutdown
+
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    await subscription_sweeper.stop()
+    await job_queue.stop()
+    await code_assistant_service.backend.aclose()
+    if code_assistant_service.cache is not None:
+        code_assistant_service.cache.close()
+    if code_assistant_service.bases is not None:
+        code_assistant_service.bases.close()
+    if code_assistant_service.projects is not None:
+        code_assistant_service.projects.close()
+    await user_repository.close()
+    password_hasher.shutdown()
+
+
 @app.get("/")
 async def root():
     return {"message": f"Welcome to {settings.PROJECT_NAME} API"}
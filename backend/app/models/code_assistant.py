@@ -1,6 +1,6 @@
 # backend/app/models/code_assistant.py
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Any, Literal, Union
 
 class CodeGenerationRequest(BaseModel):
     prompt: str
@@ -8,6 +8,8 @@ class CodeGenerationRequest(BaseModel):
     context: Optional[str] = None # e.g., surrounding code
     max_tokens: Optional[int] = 1024
     temperature: Optional[float] = 0.7 # Creativity vs determinism
+    allow_cached: bool = False # Accept a cached response even though temperature > 0
+    project_id: Optional[str] = None # Uploaded project to pull related definitions from (Premium/Pro)
 
 class CodeGenerationResponse(BaseModel):
     generated_code: str
@@ -15,24 +17,86 @@ class CodeGenerationResponse(BaseModel):
     confidence: Optional[float] = None # Model's confidence in the generation
     warnings: Optional[List[str]] = None
 
+class CodeGenerationChunk(BaseModel):
+    # One streamed piece of a generation; the last chunk has done=True and the response metadata
+    token: Optional[str] = None
+    done: bool = False
+    language_detected: Optional[str] = None
+    warnings: Optional[List[str]] = None
+    error: Optional[str] = None # Set on the final chunk if the model failed mid-stream
+
 class CodeExplanationRequest(BaseModel):
     code_block: str
     language: Optional[str] = None
+    context: Optional[str] = None # Related code, e.g. definitions from the project
+    project_id: Optional[str] = None
 
 class CodeExplanationResponse(BaseModel):
     explanation: str
     language_detected: Optional[str] = None
+    warnings: Optional[List[str]] = None
 
 class CodeRefactorRequest(BaseModel):
-    code_block: str
+    code_block: Optional[str] = None # Required unless base_hash is given
     language: Optional[str] = None
     refactor_goals: List[str] # e.g., ["DRY", "performance", "readability"]
+    context: Optional[str] = None # Related code, e.g. definitions from the project
+    project_id: Optional[str] = None
+    response_format: Literal["full", "diff"] = "full" # "diff": a unified diff instead of refactored_code
+    # Follow-up refactors: instead of code_block, the hash of code from an earlier response
+    # (its base_hash or result_hash), plus optionally a unified diff of the edits made since
+    base_hash: Optional[str] = None
+    patch: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_code_source(self) -> "CodeRefactorRequest":
+        if (self.code_block is None) == (self.base_hash is None):
+            raise ValueError("Send either code_block or base_hash (with an optional patch).")
+        if self.patch is not None and self.base_hash is None:
+            raise ValueError("A patch applies to the code of base_hash.")
+        return self
 
 class CodeRefactorResponse(BaseModel):
-    refactored_code: str
+    refactored_code: Optional[str] = None # Omitted with response_format="diff"
+    diff: Optional[str] = None # With response_format="diff": unified diff from the submitted code to the result
+    base_hash: Optional[str] = None # SHA-256 (hex, UTF-8) of the submitted code, which `diff` applies to
+    result_hash: Optional[str] = None # SHA-256 of the refactored code, to verify the patched result
     changes_summary: List[str]
+    warnings: Optional[List[str]] = None
+
+class CompletionRequest(BaseModel):
+    document_id: str # e.g. the file's path in the editor; a newer request for it supersedes this one
+    request_id: Optional[int] = None # Echoed back, so the client can match completions to keystrokes
+    prefix: str # Code before the cursor
+    suffix: str = "" # Code after the cursor
+    language: Optional[str] = None
+    max_tokens: int = Field(64, ge=1, le=256)
+
+class CompletionResponse(BaseModel):
+    document_id: str
+    request_id: Optional[int] = None
+    completion: str = "" # Text to insert at the cursor
+    language_detected: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchOperation(BaseModel):
+    operation: Literal["generate", "explain", "refactor"]
+    request: Dict[str, Any] # A CodeGenerationRequest, CodeExplanationRequest or CodeRefactorRequest, validated per item
+
+class BatchAssistRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(None, ge=1) # Operations run at once; capped by the server
+
+class BatchOperationResult(BaseModel):
+    index: int # Position of the operation in the request
+    operation: str
+    status_code: int # What the single-operation endpoint would have answered, e.g. 200, 403, 422, 502
+    result: Optional[Union[CodeGenerationResponse, CodeExplanationResponse, CodeRefactorResponse]] = None
+    error: Optional[str] = None
+
+class BatchAssistResponse(BaseModel):
+    results: List[BatchOperationResult] # In request order
 
 # ... other models for features like:
-# - AutocompletionRequest / AutocompletionResponse
 # - TestGenerationRequest / TestGenerationResponse
 # - VulnerabilityDetectionRequest / VulnerabilityDetectionResponse
\ No newline at end of file
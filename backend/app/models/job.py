@@ -0,0 +1,28 @@
+# backend/app/models/job.py
+from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime
+from enum import Enum
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_JOB_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+class JobSubmit(BaseModel):
+    operation: Literal["generate", "explain", "refactor"]
+    request: Dict[str, Any] # The operation's CodeGenerationRequest, CodeExplanationRequest or CodeRefactorRequest
+
+class JobInfo(BaseModel):
+    id: str
+    operation: str
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    status_code: Optional[int] = None # Once finished: what the operation's own endpoint would have answered
+    error: Optional[str] = None
@@ -0,0 +1,45 @@
+# backend/app/models/project.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class ProjectCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+
+class ProjectFile(BaseModel):
+    path: str # Relative, "/"-separated, e.g. "src/app/main.py"
+    content: str
+
+class ProjectFilesUpdate(BaseModel):
+    files: List[ProjectFile] = []
+    deleted: List[str] = [] # Paths to remove from the project
+
+class ProjectInfo(BaseModel):
+    id: str
+    name: str
+    files: int
+    symbols: int
+    size_bytes: int
+    created_at: datetime
+    updated_at: datetime
+
+class ProjectIndexUpdate(BaseModel):
+    project: ProjectInfo
+    parsed: int # Files new or changed since the last upload, (re)indexed
+    unchanged: int # Files with the same content hash as before, not parsed again
+    removed: int
+    skipped: List[str] = [] # Paths rejected (binary, too large, invalid path)
+    seconds: float
+
+class SymbolDefinition(BaseModel):
+    name: str
+    kind: str # "function", "class", "type" or "constant"
+    path: str
+    line: int
+    end_line: int
+    source: Optional[str] = None # The definition's code
+
+class SymbolLookup(BaseModel):
+    name: str
+    definitions: List[SymbolDefinition]
+    referenced_in: List[str] # Files mentioning the name
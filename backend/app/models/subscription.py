@@ -19,6 +19,7 @@ class SubscriptionPlanDetail(BaseModel):
     code_completions_limit: int  # per day or month
     code_generation_limit: int
     project_understanding_level: int # 0: none, 1: basic, 2: advanced
+    context_token_limit: int # Tokens of surrounding code sent to the model with a request
 
 # Define the available plans
 PLANS_DETAILS: Dict[PlanName, SubscriptionPlanDetail] = {
@@ -35,7 +36,8 @@ PLANS_DETAILS: Dict[PlanName, SubscriptionPlanDetail] = {
         ],
         code_completions_limit=1000,
         code_generation_limit=50,
-        project_understanding_level=0
+        project_understanding_level=0,
+        context_token_limit=1024
     ),
     PlanName.PREMIUM: SubscriptionPlanDetail(
         id=PlanName.PREMIUM,
@@ -53,7 +55,8 @@ PLANS_DETAILS: Dict[PlanName, SubscriptionPlanDetail] = {
         ],
         code_completions_limit=5000,
         code_generation_limit=200,
-        project_understanding_level=1
+        project_understanding_level=1,
+        context_token_limit=4096
     ),
     PlanName.PRO: SubscriptionPlanDetail(
         id=PlanName.PRO,
@@ -70,13 +73,14 @@ PLANS_DETAILS: Dict[PlanName, SubscriptionPlanDetail] = {
         ],
         code_completions_limit=-1, # Unlimited
         code_generation_limit=-1, # Unlimited
-        project_understanding_level=2
+        project_understanding_level=2,
+        context_token_limit=16384
     ),
 }
 
 class UserSubscriptionStatus(BaseModel):
     user_id: int
-    current_plan: PlanName
+    current_plan: Optional[PlanName] = None  # None when the user has no paid plan
     expires_at: Optional[datetime] = None
     is_active: bool
 
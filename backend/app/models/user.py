@@ -39,16 +39,14 @@ class UserInDBBase(UserBase):
         from_attributes = True # Pydantic V2, replaces orm_mode = True
 
 class User(UserInDBBase):
-    pass
+    # Public projections are cached and shared between requests, so they must not be mutated
+    class Config:
+        frozen = True
 
 class UserInDB(UserInDBBase):
     hashed_password: str
 
-# Placeholder for database storage (replace with SQLAlchemy models for a real DB)
-# This is a simplified in-memory store for demonstration.
-# In a real app, use SQLAlchemy with Alembic for migrations.
-db_users: dict[int, UserInDB] = {}
-user_id_counter = 1
+# User records live in backend.app.db.user_repository (in-memory store for demonstration).
 
 # Token models
 class Token(BaseModel):
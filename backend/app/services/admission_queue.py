@@ -0,0 +1,203 @@
+# backend/app/services/admission_queue.py
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from backend.app.core.config import settings
+from backend.app.models.user import User
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a request can't be queued for the code model; the client should retry later."""
+
+    def __init__(self, retry_after: int, per_user: bool):
+        super().__init__("Per-user queue limit reached" if per_user else "Inference queue is full")
+        self.retry_after = retry_after
+        self.per_user = per_user  # The user has too many requests queued, rather than everyone
+
+
+class _Waiter:
+    __slots__ = ("future", "user_id", "enqueued_at", "queued")
+
+    def __init__(self, future: asyncio.Future, user_id: int, enqueued_at: float):
+        self.future = future
+        self.user_id = user_id
+        self.enqueued_at = enqueued_at
+        self.queued = True
+
+
+class _Tier:
+    def __init__(self, weight: int):
+        self.weight = weight
+        self.pass_value = 0.0  # Stride-scheduling position; the non-empty tier with the lowest one goes next
+        self.users: "OrderedDict[int, Deque[_Waiter]]" = OrderedDict()  # Round-robin order
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.waits: Deque[float] = deque(maxlen=2048)  # Recent queue wait times, in seconds
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AdmissionQueue:
+    """
+    Admission control for code model calls. At most `max_concurrency` calls run at once;
+    the rest wait in one queue per subscription plan.
+
+    Free slots go to the plans in proportion to their weights (stride scheduling), and
+    within a plan to its users round-robin, so one heavy user can't starve the others.
+    The queue is bounded: when it is full, a newcomer displaces the newest request of the
+    heaviest user in the lowest-weight plan below its own, or is rejected right away.
+    A user can't have more than `max_queued_per_user` requests waiting.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            max_queued: int,
+            max_queued_per_user: int,
+            plan_weights: Dict[str, int],
+            retry_after: int = 1,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.plan_weights = plan_weights
+        self.retry_after = retry_after
+        self.running = 0
+        self.queued = 0
+        self._virtual_time = 0.0
+        self._tiers: Dict[str, _Tier] = {}
+        self._queued_by_user: Dict[int, int] = {}
+
+    def _tier(self, user: User) -> _Tier:
+        plan = user.subscription_plan.value
+        tier = self._tiers.get(plan)
+        if tier is None:
+            tier = self._tiers[plan] = _Tier(max(1, self.plan_weights.get(plan, 1)))
+        return tier
+
+    @asynccontextmanager
+    async def slot(self, user: User) -> AsyncIterator[None]:
+        await self.acquire(user)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, user: User) -> None:
+        tier = self._tier(user)
+        if self.running < self.max_concurrency and self.queued == 0:
+            self.running += 1
+            tier.admitted += 1
+            tier.waits.append(0.0)
+            return
+
+        if self._queued_by_user.get(user.id, 0) >= self.max_queued_per_user:
+            tier.rejected += 1
+            raise AdmissionRejectedError(self.retry_after, per_user=True)
+        if self.queued >= self.max_queued and not self._shed_below(tier):
+            tier.rejected += 1
+            raise AdmissionRejectedError(self.retry_after, per_user=False)
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), user.id, time.monotonic())
+        if tier.queued == 0:
+            tier.pass_value = max(tier.pass_value, self._virtual_time)  # No credit for time spent idle
+        tier.users.setdefault(user.id, deque()).append(waiter)
+        tier.queued += 1
+        self.queued += 1
+        self._queued_by_user[user.id] = self._queued_by_user.get(user.id, 0) + 1
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.queued:
+                self._unqueue(tier, waiter)
+            elif not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release()  # Admitted just as the caller went away; pass the slot on
+            raise
+
+    def release(self) -> None:
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_concurrency and self.queued:
+            tier = min((tier for tier in self._tiers.values() if tier.queued), key=lambda tier: tier.pass_value)
+            user_id, waiters = tier.users.popitem(last=False)
+            waiter = waiters.popleft()
+            if waiters:
+                tier.users[user_id] = waiters  # Back of the round-robin
+            self._unqueue(tier, waiter, remove=False)
+            if waiter.future.done():
+                continue  # Cancelled, but its caller hasn't resumed to unqueue it yet
+            self._virtual_time = tier.pass_value
+            tier.pass_value += 1 / tier.weight
+            self.running += 1
+            tier.admitted += 1
+            tier.waits.append(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+
+    def _shed_below(self, tier: _Tier) -> bool:
+        """Reject one waiter from a plan with a lower weight than `tier`; False if there is none."""
+        lower = [other for other in self._tiers.values() if other.queued and other.weight < tier.weight]
+        if not lower:
+            return False
+        victim_tier = min(lower, key=lambda other: other.weight)
+        user_id = max(victim_tier.users, key=lambda uid: len(victim_tier.users[uid]))  # The heaviest user
+        waiter = victim_tier.users[user_id][-1]
+        self._unqueue(victim_tier, waiter)
+        victim_tier.rejected += 1
+        if not waiter.future.done():
+            waiter.future.set_exception(AdmissionRejectedError(self.retry_after, per_user=False))
+        return True
+
+    def _unqueue(self, tier: _Tier, waiter: _Waiter, remove: bool = True) -> None:
+        waiter.queued = False
+        if remove:
+            waiters = tier.users.get(waiter.user_id)
+            if waiters is not None:
+                waiters.remove(waiter)
+                if not waiters:
+                    del tier.users[waiter.user_id]
+        tier.queued -= 1
+        self.queued -= 1
+        remaining = self._queued_by_user[waiter.user_id] - 1
+        if remaining:
+            self._queued_by_user[waiter.user_id] = remaining
+        else:
+            del self._queued_by_user[waiter.user_id]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {"all": {"running": self.running, "queued": self.queued, "max_concurrency": self.max_concurrency}}
+        for plan, tier in self._tiers.items():
+            waits = list(tier.waits)
+            stats[plan] = {
+                "weight": tier.weight,
+                "queued": tier.queued,
+                "admitted": tier.admitted,
+                "rejected": tier.rejected,
+                "wait_p50_ms": 1000 * _percentile(waits, 0.5),
+                "wait_p95_ms": 1000 * _percentile(waits, 0.95),
+                "wait_max_ms": 1000 * max(waits, default=0.0),
+            }
+        return stats
+
+
+def build_admission_queue() -> Optional[AdmissionQueue]:
+    if settings.ADMISSION_MAX_CONCURRENCY <= 0:
+        return None
+    return AdmissionQueue(
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        max_queued=settings.ADMISSION_MAX_QUEUED,
+        max_queued_per_user=settings.ADMISSION_MAX_QUEUED_PER_USER,
+        plan_weights=settings.ADMISSION_PLAN_WEIGHTS,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
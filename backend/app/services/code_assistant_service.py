@@ -1,79 +1,356 @@
 # backend/app/services/code_assistant_service.py
+import asyncio
+from contextlib import nullcontext
+from typing import (
+    Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+)
+
+from pydantic import BaseModel
+
 from backend.app.models.code_assistant import (
-    CodeGenerationRequest, CodeGenerationResponse,
+    CodeGenerationRequest, CodeGenerationResponse, CodeGenerationChunk,
     CodeExplanationRequest, CodeExplanationResponse,
-    CodeRefactorRequest, CodeRefactorResponse
+    CodeRefactorRequest, CodeRefactorResponse,
+    CompletionRequest, CompletionResponse
 )
 from backend.app.models.user import User
-# In a real application, you would import your AI model clients here
-# e.g., from openai import OpenAI, or your custom model interface
+from backend.app.services.admission_queue import AdmissionQueue, build_admission_queue
+from backend.app.core.config import settings
+from backend.app.services.code_diff import UnknownBaseError, apply_patch, content_hash, unified_diff
+from backend.app.services.context_assembly import (
+    AssembledContext, assemble_context, assemble_prefix, assemble_project_context, context_token_budget,
+    project_understanding_level
+)
+from backend.app.services.inference_backend import (
+    InferenceBackend, InferenceError, InferenceResult, build_inference_backend
+)
+from backend.app.services.language_detector import language_detector, language_from_prompt
+from backend.app.services.local_refactor import LocalRefactor, refactor_python
+from backend.app.services.project_workspace import ProjectStore, project_store
+from backend.app.services.response_cache import (
+    ResponseCache, cache_key, normalize_code, normalize_text, refactor_bases, response_cache
+)
+from backend.app.services.semantic_cache import SemanticCache, build_semantic_cache
+from backend.app.services.single_flight import SingleFlight
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+RequestT = TypeVar("RequestT", CodeGenerationRequest, CodeExplanationRequest, CodeRefactorRequest, CompletionRequest)
 
-# client = OpenAI(api_key="YOUR_OPENAI_API_KEY") # Example
 
 class CodeAssistantService:
+    def __init__(
+            self,
+            backend: InferenceBackend,
+            cache: Optional[ResponseCache] = None,
+            semantic_cache: Optional[SemanticCache] = None,
+            admission: Optional[AdmissionQueue] = None,
+            projects: Optional[ProjectStore] = None,
+            bases: Optional[ResponseCache] = None,
+    ):
+        # Model client (template placeholder or HTTP model server, see INFERENCE_BACKEND)
+        self.backend = backend
+        self.cache = cache
+        self.semantic_cache = semantic_cache  # Near-duplicate prompts, consulted after an exact-match miss
+        self.flights = SingleFlight()  # Identical requests in flight share one backend call
+        self.admission = admission  # Plan-weighted queue for model capacity; cache hits skip it
+        self.projects = projects  # Uploaded projects, whose definitions are added to requests naming one
+        self.bases = bases  # Code of recent refactors by hash, for follow-ups that send only a hash and a patch
+
+    def _admitted(self, current_user: User) -> AsyncContextManager[None]:
+        return self.admission.slot(current_user) if self.admission is not None else nullcontext()
+
+    def _cache_key(self, operation: str, fields: Dict[str, Any], current_user: User) -> str:
+        fields["user_tier"] = current_user.subscription_plan.value  # The model may answer differently per tier
+        if self.backend.per_user_output:
+            fields["user_id"] = current_user.id
+        return cache_key(operation, fields)
+
+    async def _cached(
+            self, key: Optional[str], response_model: Type[ResponseT], compute: Callable[[], Awaitable[ResponseT]]
+    ) -> ResponseT:
+        # key=None means the request must not be served from the cache, stored in it, or shared
+        caching = self.cache is not None and self.cache.enabled
+        if key is None:
+            if caching:
+                self.cache.record_bypass()
+            return await compute()
+        if caching:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return response_model.model_validate(cached)
+
+        async def compute_and_store() -> ResponseT:
+            response = await compute()
+            if caching:
+                await self.cache.put(key, response.model_dump())
+            return response
+
+        return await self.flights.do(key, compute_and_store)
+
+    async def _project_context(
+            self, request: RequestT, text: str, current_user: User, budget: int
+    ) -> Tuple[Optional[AssembledContext], List[str]]:
+        # Definitions from the request's project (if any) of the names used in `text`
+        if not request.project_id or self.projects is None:
+            return None, []
+        if project_understanding_level(current_user) < 1:
+            return None, ["Project context requires a Premium or Pro plan; project_id was ignored."]
+        project = await self.projects.get(request.project_id, current_user)
+        retrieved = []
+        if project_understanding_level(current_user) >= 2:  # Full project understanding: embedding search too
+            retrieved = await self.projects.retrieve(project, text, settings.PROJECT_RETRIEVAL_TOP_K)
+        return assemble_project_context(project, text, budget, retrieved), []
+
+    async def _fit_context(
+            self, request: CodeGenerationRequest, current_user: User
+    ) -> Tuple[CodeGenerationRequest, List[str]]:
+        # Project definitions first (up to PROJECT_CONTEXT_SHARE of the plan's token budget),
+        # then the request's own context, trimmed to what is left of the budget
+        budget = context_token_budget(current_user)
+        project_context, warnings = await self._project_context(
+            request, f"{request.prompt}\n{request.context or ''}", current_user,
+            int(budget * settings.PROJECT_CONTEXT_SHARE),
+        )
+        if project_context is not None:
+            budget -= project_context.tokens
+        assembled = assemble_context(request.context, budget) if request.context else None
+        if assembled is not None and assembled.truncated:
+            warnings.append(
+                f"Context trimmed from {assembled.original_tokens} to {assembled.tokens} tokens to fit your plan; "
+                "the enclosing scopes and the code nearest the cursor were kept."
+            )
+        if project_context is None and (assembled is None or not assembled.truncated):
+            return request, warnings
+        parts = [part.text for part in (project_context, assembled) if part is not None]
+        return request.model_copy(update={"context": "\n\n".join(parts)}), warnings
+
+    async def _with_project(self, request: RequestT, current_user: User) -> Tuple[RequestT, List[str]]:
+        # Explain/refactor: the code block is sent whole, and project definitions go in `context`
+        budget = int(context_token_budget(current_user) * settings.PROJECT_CONTEXT_SHARE)
+        project_context, warnings = await self._project_context(request, request.code_block, current_user, budget)
+        if project_context is None:
+            return request, warnings
+        return request.model_copy(update={"context": project_context.text}), warnings
+
+    def _base_key(self, code_hash: str, current_user: User) -> str:
+        return cache_key("refactor-base", {"hash": code_hash, "user_id": current_user.id})
+
+    async def _with_base(self, request: CodeRefactorRequest, current_user: User) -> CodeRefactorRequest:
+        # A follow-up's base_hash (+ patch) becomes the code_block it stands for
+        if request.base_hash is None:
+            return request
+        stored = await self.bases.get(self._base_key(request.base_hash, current_user)) if self.bases is not None else None
+        if stored is None:
+            raise UnknownBaseError(request.base_hash)
+        code = stored["code"]
+        if request.patch:
+            code = await asyncio.to_thread(apply_patch, code, request.patch)
+        return request.model_copy(update={"code_block": code, "base_hash": None, "patch": None})
+
+    async def _with_hashes(
+            self, request: CodeRefactorRequest, response: CodeRefactorResponse, current_user: User
+    ) -> CodeRefactorResponse:
+        base, result = request.code_block, response.refactored_code
+        update = {"base_hash": content_hash(base), "result_hash": content_hash(result)}
+        if self.bases is not None:
+            await self.bases.put(self._base_key(update["base_hash"], current_user), {"code": base})
+            if result != base:
+                await self.bases.put(self._base_key(update["result_hash"], current_user), {"code": result})
+        if request.response_format == "diff":
+            # difflib is quadratic on heavily changed blocks: off the event loop
+            update.update(refactored_code=None, diff=await asyncio.to_thread(unified_diff, base, result))
+        return response.model_copy(update=update)
+
+    @staticmethod
+    async def _refactor_locally(request: CodeRefactorRequest) -> Optional[LocalRefactor]:
+        if not settings.LOCAL_REFACTOR_ENABLED or (request.language or "").lower() != "python":
+            return None
+        # Off the event loop: large blocks take tens of milliseconds
+        return await asyncio.to_thread(refactor_python, request.code_block, request.refactor_goals)
+
+    @staticmethod
+    def _with_language(request: RequestT, prompt: Optional[str], code: Optional[str]) -> RequestT:
+        # "Auto-detect" sends no language: name it locally (a language mentioned in the prompt,
+        # else a classifier on the code) so the model call and the cache key get a concrete one
+        if request.language:
+            return request
+        language = language_from_prompt(prompt) if prompt else None
+        if language is None and code:
+            prediction = language_detector.classify(code)
+            language = prediction.language if prediction is not None else None
+        return request.model_copy(update={"language": language}) if language else request
+
     async def generate_code(self, request: CodeGenerationRequest, current_user: User) -> CodeGenerationResponse:
-        # --- THIS IS WHERE THE REAL AI MODEL INTEGRATION WOULD HAPPEN ---
-        # Pseudo-code for AI model call:
-        # response = await ai_model_client.generate(
-        #     prompt=request.prompt,
-        #     language=request.language,
-        #     context=request.context,
-        #     # Pass user subscription level to potentially use different models or apply rate limits
-        #     user_tier=current_user.subscription_plan
-        # )
-        # generated_code = response.text
-        # ----------------------------------------------------------------
-
-        # Placeholder implementation:
-        generated_code = f"// Code generated for prompt: '{request.prompt}'\n"
-        generated_code += f"// Language: {request.language or 'detected_language'}\n"
-        generated_code += f"// User: {current_user.email} (Plan: {current_user.subscription_plan.value})\n"
-        if request.language and request.language.lower() == "python":
-            generated_code += f"def generated_function_for_{request.prompt.replace(' ', '_')[:20]}():\n"
-            generated_code += f"    print(\"Hello from generated code based on: {request.prompt}\")\n"
-        elif request.language and request.language.lower() == "javascript":
-            generated_code += f"function generatedFunctionFor{request.prompt.replace(' ', '')[:20]}() {{\n"
-            generated_code += f"  console.log(\"Hello from generated code based on: {request.prompt}\");\n"
-            generated_code += "}\n"
-        else:
-            generated_code += "{\n  // Placeholder for other languages\n}\n"
-
-        # Simulate checking user limits based on subscription plan
-        # (This logic would be more robust and tied to a usage tracking system)
-        if current_user.subscription_plan == "Basic" and request.context and len(request.context) > 1000: # Example limit
-             return CodeGenerationResponse(
-                generated_code="// Context too large for Basic plan. Upgrade for more extensive context understanding.",
-                warnings=["Context length exceeds Basic plan limits."]
+        request = self._with_language(request, request.prompt, request.context)
+        request, warnings = await self._fit_context(request, current_user)
+
+        key = None
+        scope = None
+        if not request.temperature or request.allow_cached:  # Sampled output is only reused on request
+            fields = {
+                "language": (request.language or "").lower(),
+                "context": normalize_code(request.context or ""),
+                "max_tokens": request.max_tokens,
+                "temperature": request.temperature,
+            }
+            # Semantic matches must agree on everything but the prompt
+            scope = int(self._cache_key("generate-scope", dict(fields), current_user)[:15], 16)
+            key = self._cache_key("generate", {**fields, "prompt": normalize_text(request.prompt)}, current_user)
+
+        async def compute() -> CodeGenerationResponse:
+            if scope is not None and self.semantic_cache is not None:
+                similar = await self.semantic_cache.get(request.prompt, scope)
+                if similar is not None:
+                    return CodeGenerationResponse.model_validate(similar)
+            async with self._admitted(current_user):
+                result = await self.backend.generate(request, current_user)
+            response = CodeGenerationResponse(
+                generated_code=result.text,
+                language_detected=result.language or request.language or "python",
+                confidence=result.confidence
             )
+            if scope is not None and self.semantic_cache is not None:
+                self.semantic_cache.put(request.prompt, scope, response.model_dump())
+            return response
 
-        return CodeGenerationResponse(
-            generated_code=generated_code,
-            language_detected=request.language or "python", # Simplified
-            confidence=0.95 # Placeholder
-        )
+        response = await self._cached(key, CodeGenerationResponse, compute)
+        if warnings:  # Per request, so added after the (shared) cached response
+            response = response.model_copy(update={"warnings": (response.warnings or []) + warnings})
+        return response
+
+    async def stream_generate_code(
+            self, request: CodeGenerationRequest, current_user: User
+    ) -> AsyncIterator[CodeGenerationChunk]:
+        """
+        Same as generate_code, but yields tokens as the backend produces them and ends with
+        a done=True chunk. Tokens are pulled only as fast as the caller consumes them.
+        """
+        request = self._with_language(request, request.prompt, request.context)
+        request, warnings = await self._fit_context(request, current_user)
+        try:
+            async with self._admitted(current_user):
+                async for token in self.backend.stream_generate(request, current_user):
+                    yield CodeGenerationChunk(token=token)
+        except InferenceError as e:
+            # Headers are already sent, so the failure is reported in-band
+            print(f"Streaming generation failed: {e}")
+            yield CodeGenerationChunk(done=True, error="The code model failed while generating.")
+            return
+        yield CodeGenerationChunk(done=True, language_detected=request.language or "python", warnings=warnings or None)
 
     async def explain_code(self, request: CodeExplanationRequest, current_user: User) -> CodeExplanationResponse:
-        # --- REAL AI MODEL INTEGRATION FOR CODE EXPLANATION ---
-        explanation = f"This code block (language: {request.language or 'auto-detected'}) is explained as follows:\n"
-        explanation += f"... Detailed explanation of '{request.code_block[:50]}...' based on AI analysis ...\n"
-        explanation += f"Explanation requested by: {current_user.email}"
-        return CodeExplanationResponse(
-            explanation=explanation,
-            language_detected=request.language or "python" # Simplified
-        )
+        request = self._with_language(request, None, request.code_block)
+        request, warnings = await self._with_project(request, current_user)
+        key = self._cache_key("explain", {
+            "code": normalize_code(request.code_block),
+            "context": normalize_code(request.context or ""),
+            "language": (request.language or "").lower(),
+        }, current_user)
+
+        async def compute() -> CodeExplanationResponse:
+            async with self._admitted(current_user):
+                result = await self.backend.explain(request, current_user)
+            return CodeExplanationResponse(
+                explanation=result.text,
+                language_detected=result.language or request.language or "python"
+            )
+
+        response = await self._cached(key, CodeExplanationResponse, compute)
+        if warnings:
+            response = response.model_copy(update={"warnings": warnings})
+        return response
 
     async def refactor_code(self, request: CodeRefactorRequest, current_user: User) -> CodeRefactorResponse:
-        # --- REAL AI MODEL INTEGRATION FOR CODE REFACTORING ---
-        refactored_code = f"// Original code by {current_user.email}:\n/*\n{request.code_block}\n*/\n\n"
-        refactored_code += f"// Refactored code (goals: {', '.join(request.refactor_goals)}):\n"
-        refactored_code += "// ... AI-driven refactoring applied ...\n"
-        refactored_code += request.code_block.replace("  ", "    ") # Simple example: fix indentation
-        changes_summary = ["Improved indentation.", "Applied standard formatting (simulated)."]
-        if "DRY" in request.refactor_goals:
-            changes_summary.append("Identified potential for DRY principle application (simulated).")
-        return CodeRefactorResponse(
-            refactored_code=refactored_code,
-            changes_summary=changes_summary
+        """
+        Mechanical goals on Python code (formatting, import sorting, dead code, duplicated
+        literals) are done locally in milliseconds; the model is only called for the goals
+        left, on the locally refactored code.
+
+        Responses carry the hashes of the submitted and the refactored code, and with
+        response_format="diff" a unified diff in place of the refactored code. A follow-up
+        can then send a hash (plus a patch of the edits made since) instead of the code.
+        """
+        request = await self._with_base(request, current_user)
+        response = await self._refactor(request, current_user)
+        return await self._with_hashes(request, response, current_user)
+
+    async def _refactor(self, request: CodeRefactorRequest, current_user: User) -> CodeRefactorResponse:
+        request = self._with_language(request, None, request.code_block)
+        local = await self._refactor_locally(request)
+        if local is not None and not local.remaining_goals:
+            return CodeRefactorResponse(
+                refactored_code=local.code, changes_summary=local.summary, warnings=local.warnings or None
+            )
+        request, warnings = await self._with_project(request, current_user)
+        if local is not None:
+            warnings = local.warnings + warnings
+        key = self._cache_key("refactor", {
+            "code": normalize_code(request.code_block),
+            "context": normalize_code(request.context or ""),
+            "language": (request.language or "").lower(),
+            "goals": sorted({normalize_text(goal).lower() for goal in request.refactor_goals}),
+        }, current_user)
+
+        async def compute() -> CodeRefactorResponse:
+            model_request = request
+            if local is not None:
+                model_request = request.model_copy(
+                    update={"code_block": local.code, "refactor_goals": local.remaining_goals}
+                )
+            async with self._admitted(current_user):
+                result = await self.backend.refactor(model_request, current_user)
+            return CodeRefactorResponse(
+                refactored_code=result.text,
+                changes_summary=(local.summary if local is not None else []) + result.summary
+            )
+
+        response = await self._cached(key, CodeRefactorResponse, compute)
+        if warnings:
+            response = response.model_copy(update={"warnings": warnings})
+        return response
+
+    async def complete_code(self, request: CompletionRequest, current_user: User) -> CompletionResponse:
+        """
+        Fill-in-the-middle completion at the cursor. The prefix is cut to the plan's context
+        budget (at most COMPLETION_MAX_CONTEXT_TOKENS, enclosing scopes kept) and the suffix
+        to its first lines, so a keystroke costs the same in any file size.
+
+        Completions skip the response cache (they would evict the far more expensive
+        explain/refactor answers) but identical ones in flight are shared; cancelling the
+        caller cancels the model call unless another caller still waits for it.
+        """
+        budget = min(context_token_budget(current_user), settings.COMPLETION_MAX_CONTEXT_TOKENS)
+        suffix = request.suffix
+        if len(suffix) > settings.COMPLETION_MAX_SUFFIX_CHARS:
+            # Whole lines where possible; a suffix with no line break in range is cut at the limit
+            cut = suffix.rfind("\n", 0, settings.COMPLETION_MAX_SUFFIX_CHARS) + 1
+            suffix = suffix[:cut or settings.COMPLETION_MAX_SUFFIX_CHARS]
+        request = request.model_copy(update={"prefix": assemble_prefix(request.prefix, budget).text, "suffix": suffix})
+        request = self._with_language(request, None, request.prefix)
+        key = self._cache_key("complete", {
+            "prefix": request.prefix,
+            "suffix": request.suffix,
+            "language": (request.language or "").lower(),
+            "max_tokens": request.max_tokens,
+        }, current_user)
+
+        async def compute() -> InferenceResult:
+            async with self._admitted(current_user):
+                return await self.backend.complete(request, current_user)
+
+        result = await self.flights.do(key, compute)
+        return CompletionResponse(
+            document_id=request.document_id,
+            request_id=request.request_id,
+            completion=result.text,
+            language_detected=result.language or request.language,
         )
 
-code_assistant_service = CodeAssistantService()
\ No newline at end of file
+code_assistant_service = CodeAssistantService(
+    build_inference_backend(),
+    cache=response_cache,
+    semantic_cache=build_semantic_cache(),
+    admission=build_admission_queue(),
+    projects=project_store,
+    bases=refactor_bases,
+)
\ No newline at end of file
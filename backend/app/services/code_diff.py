@@ -0,0 +1,101 @@
+# backend/app/services/code_diff.py
+import difflib
+import hashlib
+import re
+from typing import List
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+NO_NEWLINE = "\\ No newline at end of file"
+DIFF_CONTEXT_LINES = 3
+
+
+class PatchError(ValueError):
+    """Raised for a patch that isn't a unified diff or doesn't apply to its base code."""
+
+
+class UnknownBaseError(LookupError):
+    """Raised for a base hash whose code this server doesn't have (expired, or never seen)."""
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 (hex) of the text as UTF-8, exactly as given: clients verify code with it."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _lines(text: str) -> List[str]:
+    # Split on "\n" only (str.splitlines also splits on \r, \f, ...), keeping the endings
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    return lines if lines[-1] else lines[:-1]
+
+
+def unified_diff(base: str, new: str) -> str:
+    """Unified diff from `base` to `new` ("" if they're equal), as `diff -u` / `git diff` write it."""
+    output = []
+    for line in difflib.unified_diff(_lines(base), _lines(new), "a/code", "b/code", n=DIFF_CONTEXT_LINES):
+        output.append(line)
+        if not line.endswith("\n"):
+            output.append(f"\n{NO_NEWLINE}\n")
+    return "".join(output)
+
+
+def apply_patch(base: str, patch: str) -> str:
+    """
+    Apply a unified diff to `base`. Hunks must match the base exactly; one whose lines moved
+    (e.g. a patch made against a slightly different version) is applied where its context
+    matches nearest to the stated line. File headers (---/+++, diff --git) are skipped.
+    """
+    source = _lines(base)
+    lines = _lines(patch)
+    i = 0
+    while i < len(lines) and not lines[i].startswith("@@"):
+        i += 1
+    if i == len(lines):
+        if patch.strip():
+            raise PatchError("The patch has no hunks (@@ -l,s +l,s @@ lines).")
+        return base
+
+    result: List[str] = []
+    position = 0  # Next base line to copy
+    while i < len(lines):
+        match = HUNK_HEADER.match(lines[i])
+        if match is None:
+            raise PatchError(f"Expected a hunk header at line {i + 1} of the patch.")
+        start, old_count = int(match.group(1)), int(match.group(2) or 1)
+        new_count = int(match.group(4) or 1)
+        old: List[str] = []
+        new: List[str] = []
+        last = ""
+        i += 1
+        while i < len(lines) and not lines[i].startswith("@@"):
+            line = lines[i]
+            kind, text = (line[:1], line[1:]) if line != "\n" else (" ", "\n")  # Editors strip the lone space
+            if line.startswith(NO_NEWLINE[:2]):
+                for target, kinds in ((old, " -"), (new, " +")):
+                    if last in kinds and target and target[-1].endswith("\n"):
+                        target[-1] = target[-1][:-1]
+            elif kind in (" ", "-", "+"):
+                if kind != "+":
+                    old.append(text)
+                if kind != "-":
+                    new.append(text)
+                last = kind
+            else:
+                raise PatchError(f"Unexpected line {i + 1} in the patch: {line[:40]!r}.")
+            i += 1
+        if len(old) != old_count or len(new) != new_count:
+            raise PatchError(f"The hunk at line {start} has a different number of lines than its header says.")
+
+        stated = start - 1 if old_count else start
+        candidates = [
+            at for at in range(position, len(source) - len(old) + 1)
+            if source[at:at + len(old)] == old
+        ]
+        if not candidates:
+            raise PatchError(f"The hunk at line {start} doesn't match the base code.")
+        at = min(candidates, key=lambda candidate: abs(candidate - stated))
+        result.extend(source[position:at])
+        result.extend(new)
+        position = at + len(old)
+    result.extend(source[position:])
+    return "".join(result)
@@ -0,0 +1,182 @@
+# backend/app/services/context_assembly.py
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from backend.app.models.subscription import PLANS_DETAILS, PlanName, SubscriptionPlanDetail
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.project_workspace import ProjectWorkspace
+from backend.app.services.retrieval_index import Chunk
+from backend.app.services.symbol_index import language_for_path
+
+# Approximates a code BPE vocabulary: short identifier pieces, digit groups, single
+# punctuation marks and newline+indentation runs each count as one token.
+TOKEN_PATTERN = re.compile(r"[A-Za-z_]{1,6}|\d{1,3}|\n[ \t]*|[^\sA-Za-z_\d]")
+
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+class AssembledContext(BaseModel):
+    text: str
+    tokens: int
+    original_tokens: int
+    truncated: bool = False
+
+
+# Comment syntax for the "path:line" header above each definition pulled from a project
+LINE_COMMENTS = {"python": "#", "ruby": "#", "shell": "#", "sql": "--"}
+
+
+def plan_details(user: User) -> Optional[SubscriptionPlanDetail]:
+    if user.subscription_plan == SubscriptionPlan.NONE:
+        return None
+    return PLANS_DETAILS[PlanName(user.subscription_plan.value.title())]
+
+
+def context_token_budget(user: User) -> int:
+    return (plan_details(user) or PLANS_DETAILS[PlanName.BASIC]).context_token_limit
+
+
+def project_understanding_level(user: User) -> int:
+    details = plan_details(user)
+    return details.project_understanding_level if details is not None else 0
+
+
+def enclosing_scopes(lines: List[str]) -> List[int]:
+    """
+    Indexes of the lines that open the scopes enclosing the end of `lines` (the cursor),
+    innermost first: walking up, each line indented less than everything below it.
+    """
+    scopes = []
+    current = None
+    for i in range(len(lines) - 1, -1, -1):
+        if not lines[i].strip():
+            continue
+        indent = _indent(lines[i])
+        if current is None:
+            current = indent
+        elif indent < current:
+            scopes.append(i)
+            current = indent
+            if indent == 0:
+                break
+    return scopes
+
+
+def assemble_context(context: str, budget: int) -> AssembledContext:
+    """
+    Fit `context` (code preceding the cursor) into `budget` tokens. The headers of the
+    enclosing scopes are kept first, innermost first, then as many lines as fit, walking
+    back from the cursor; skipped stretches are replaced by an indented "..." line.
+    """
+    original_tokens = count_tokens(context)
+    if original_tokens <= budget:
+        return AssembledContext(text=context, tokens=original_tokens, original_tokens=original_tokens)
+
+    lines = context.split("\n")
+    costs = [count_tokens(line) + 1 for line in lines]  # +1 for the newline
+    marker_cost = 2
+    kept = set()
+    remaining = budget
+
+    for i in enclosing_scopes(lines):
+        if costs[i] + marker_cost > remaining:
+            break
+        kept.add(i)
+        remaining -= costs[i] + marker_cost
+
+    for i in range(len(lines) - 1, -1, -1):
+        if i in kept:
+            continue
+        if costs[i] > remaining:
+            break
+        kept.add(i)
+        remaining -= costs[i]
+
+    output = []
+    previous = -1
+    for i in sorted(kept):
+        if i > previous + 1:
+            output.append(" " * _indent(lines[i]) + "...")
+        output.append(lines[i])
+        previous = i
+    text = "\n".join(output)
+    return AssembledContext(text=text, tokens=count_tokens(text), original_tokens=original_tokens, truncated=True)
+
+
+def assemble_prefix(prefix: str, budget: int) -> AssembledContext:
+    """
+    assemble_context for the code before a completion's cursor. Only the lines in the last
+    `budget * 8` characters are looked at (code averages well under 8 characters per token),
+    so the cost of a keystroke doesn't grow with the size of the file.
+    """
+    window = budget * 8
+    if len(prefix) > window:
+        cut = prefix.find("\n", len(prefix) - window)
+        prefix = prefix[cut + 1:] if cut != -1 else prefix[-window:]
+    return assemble_context(prefix, budget)
+
+
+def assemble_project_context(
+        project: ProjectWorkspace, text: str, budget: int, retrieved: Sequence[Tuple[Chunk, float]] = ()
+) -> Optional[AssembledContext]:
+    """
+    Code from `project` for a request whose prompt and code are `text`, in at most `budget`
+    tokens: first the definitions of the names used in `text`, most relevant first, then
+    the `retrieved` chunks (embedding search), best first. A definition too long to fit
+    whole is cut down to its first line. Code already in `text`, or overlapping code
+    already included, is left out.
+    """
+    pieces: List[str] = []
+    included: Dict[str, List[Tuple[int, int]]] = {}  # Path -> line ranges already in the context
+    remaining = budget
+    original_tokens = 0
+    truncated = False
+
+    def add(path: str, first: int, last: int, source: str, shortened: Optional[str] = None) -> None:
+        nonlocal remaining, original_tokens, truncated
+        comment = LINE_COMMENTS.get(language_for_path(path) or "", "//")
+        header = f"{comment} {path}:{first}\n"
+        cost = count_tokens(header + source) + 2  # +2 for the blank line between pieces
+        original_tokens += cost
+        if cost > remaining:
+            truncated = True
+            if shortened is None:
+                return
+            source, last = shortened, first
+            cost = count_tokens(header + source) + 2
+            if cost > remaining:
+                return
+        pieces.append(header + source)
+        included.setdefault(path, []).append((first, last))
+        remaining -= cost
+
+    for definition in project.relevant(text)[:64]:
+        if any(start <= definition.line <= end for start, end in included.get(definition.path, ())):
+            continue
+        source = project.source(definition)
+        signature = source.split("\n", 1)[0]
+        if signature.strip() in text:
+            continue  # Defined in the request itself
+        shortened = signature if signature == source else signature + "\n" + " " * (_indent(signature) + 4) + "..."
+        add(definition.path, definition.line, definition.line + source.count("\n"), source, shortened)
+
+    for chunk, _ in retrieved:
+        if any(start <= chunk.end_line and chunk.start_line <= end for start, end in included.get(chunk.path, ())):
+            continue
+        source = project.chunk_source(chunk).strip("\n")
+        if source.strip() in text:
+            continue
+        add(chunk.path, chunk.start_line, chunk.end_line, source)
+
+    if not pieces:
+        return None
+    text = "\n\n".join(pieces)
+    return AssembledContext(text=text, tokens=count_tokens(text), original_tokens=original_tokens, truncated=truncated)
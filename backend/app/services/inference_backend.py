@@ -0,0 +1,312 @@
+# backend/app/services/inference_backend.py
+import asyncio
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpx
+from pydantic import BaseModel
+
+from backend.app.core.config import settings
+from backend.app.models.code_assistant import (
+    CodeGenerationRequest, CodeExplanationRequest, CodeRefactorRequest, CompletionRequest
+)
+from backend.app.models.user import User
+from backend.app.services.micro_batcher import MicroBatcher
+
+BATCHED_OPERATIONS = ("generate", "explain", "refactor")
+TEMPLATE_CLOSERS = {"(": ")", "[": "]", "{": "}"}
+
+
+class InferenceResult(BaseModel):
+    text: str
+    language: Optional[str] = None
+    confidence: Optional[float] = None
+    summary: List[str] = []  # e.g. refactoring changes
+
+
+class InferenceError(RuntimeError):
+    """The model server failed or returned an unusable response."""
+
+
+class InferenceTimeoutError(InferenceError):
+    """The model server did not answer within the per-call timeout."""
+
+
+class InferenceBackend:
+    """Interface between CodeAssistantService and a code model."""
+
+    per_user_output = False  # True if responses embed user details and must not be shared between users
+
+    async def generate(self, request: CodeGenerationRequest, user: User) -> InferenceResult:
+        raise NotImplementedError
+
+    async def stream_generate(self, request: CodeGenerationRequest, user: User) -> AsyncIterator[str]:
+        """Yield the generated text in pieces as the model produces them (one piece by default)."""
+        result = await self.generate(request, user)
+        yield result.text
+
+    async def explain(self, request: CodeExplanationRequest, user: User) -> InferenceResult:
+        raise NotImplementedError
+
+    async def refactor(self, request: CodeRefactorRequest, user: User) -> InferenceResult:
+        raise NotImplementedError
+
+    async def complete(self, request: CompletionRequest, user: User) -> InferenceResult:
+        """Text to insert between `request.prefix` and `request.suffix` (fill-in-the-middle)."""
+        raise NotImplementedError
+
+    async def run_batch(self, operation: str, items: List[Tuple[Any, User]]) -> List[Union[InferenceResult, Exception]]:
+        """Run `operation` for every (request, user) pair; failures are returned in place, not raised."""
+        call = getattr(self, operation)
+        return await asyncio.gather(*(call(request, user) for request, user in items), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class TemplateInferenceBackend(InferenceBackend):
+    """Placeholder backend that fills string templates; no model involved."""
+
+    per_user_output = True  # Templates include the user's email
+
+    async def generate(self, request: CodeGenerationRequest, user: User) -> InferenceResult:
+        generated_code = f"// Code generated for prompt: '{request.prompt}'\n"
+        generated_code += f"// Language: {request.language or 'detected_language'}\n"
+        generated_code += f"// User: {user.email} (Plan: {user.subscription_plan.value})\n"
+        if request.language and request.language.lower() == "python":
+            generated_code += f"def generated_function_for_{request.prompt.replace(' ', '_')[:20]}():\n"
+            generated_code += f"    print(\"Hello from generated code based on: {request.prompt}\")\n"
+        elif request.language and request.language.lower() == "javascript":
+            generated_code += f"function generatedFunctionFor{request.prompt.replace(' ', '')[:20]}() {{\n"
+            generated_code += f"  console.log(\"Hello from generated code based on: {request.prompt}\");\n"
+            generated_code += "}\n"
+        else:
+            generated_code += "{\n  // Placeholder for other languages\n}\n"
+        return InferenceResult(text=generated_code, language=request.language, confidence=0.95)
+
+    async def stream_generate(self, request: CodeGenerationRequest, user: User) -> AsyncIterator[str]:
+        result = await self.generate(request, user)
+        for token in re.findall(r"\s*\S+|\s+$", result.text):
+            yield token
+            await asyncio.sleep(0)
+
+    async def explain(self, request: CodeExplanationRequest, user: User) -> InferenceResult:
+        explanation = f"This code block (language: {request.language or 'auto-detected'}) is explained as follows:\n"
+        explanation += f"... Detailed explanation of '{request.code_block[:50]}...' based on AI analysis ...\n"
+        explanation += f"Explanation requested by: {user.email}"
+        return InferenceResult(text=explanation, language=request.language)
+
+    async def refactor(self, request: CodeRefactorRequest, user: User) -> InferenceResult:
+        refactored_code = f"// Refactored code for {user.email} (goals: {', '.join(request.refactor_goals)}):\n"
+        refactored_code += "// ... AI-driven refactoring applied ...\n"
+        refactored_code += request.code_block.replace("  ", "    ")  # Simple example: fix indentation
+        changes_summary = ["Improved indentation.", "Applied standard formatting (simulated)."]
+        if "DRY" in request.refactor_goals:
+            changes_summary.append("Identified potential for DRY principle application (simulated).")
+        return InferenceResult(text=refactored_code, language=request.language, summary=changes_summary)
+
+    async def complete(self, request: CompletionRequest, user: User) -> InferenceResult:
+        # Close an opened block or bracket on the cursor's line, else nothing
+        line = request.prefix.rsplit("\n", 1)[-1]
+        indent = line[:len(line) - len(line.lstrip())]
+        last = line.rstrip()[-1:]
+        if last == ":":
+            text = f"\n{indent}    pass"
+        elif last and last in TEMPLATE_CLOSERS:
+            text = TEMPLATE_CLOSERS[last]
+        else:
+            text = ""
+        return InferenceResult(text=text, language=request.language)
+
+
+class HTTPInferenceBackend(InferenceBackend):
+    """
+    Calls a model server over HTTP (POST {base_url}/v1/{generate,explain,refactor}).
+    One pooled keep-alive client is shared by all requests; a semaphore caps how many
+    calls are in flight, and every call has its own timeout.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            timeout: float,
+            connect_timeout: float,
+            max_connections: int,
+            max_concurrency: int,
+            api_key: Optional[str] = None,
+    ):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.timeout = timeout
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60,
+            ),
+        )
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+
+    async def _call(self, operation: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> InferenceResult:
+        async with self._concurrency:
+            try:
+                response = await self._client.post(
+                    f"/v1/{operation}", json=payload, timeout=timeout or self.timeout
+                )
+                response.raise_for_status()
+                return InferenceResult(**response.json())
+            except httpx.TimeoutException as e:
+                raise InferenceTimeoutError(f"Model server timed out on {operation}") from e
+            except (httpx.HTTPError, ValueError) as e:
+                raise InferenceError(f"Model server call {operation} failed: {e}") from e
+
+    def _payload(self, operation: str, request: Any, user: User) -> Dict[str, Any]:
+        if operation == "generate":
+            return {
+                "prompt": request.prompt,
+                "language": request.language,
+                "context": request.context,
+                "max_tokens": request.max_tokens,
+                "temperature": request.temperature,
+                "user_tier": user.subscription_plan.value,
+            }
+        payload = {
+            "code": request.code_block,
+            "language": request.language,
+            "context": request.context,
+            "user_tier": user.subscription_plan.value,
+        }
+        if operation == "refactor":
+            payload["goals"] = request.refactor_goals
+        return payload
+
+    async def generate(self, request: CodeGenerationRequest, user: User) -> InferenceResult:
+        return await self._call("generate", self._payload("generate", request, user))
+
+    async def stream_generate(self, request: CodeGenerationRequest, user: User) -> AsyncIterator[str]:
+        """
+        Streams newline-delimited JSON ({"token": ...} per line) from the model server.
+        The read timeout applies between tokens, not to the whole generation; closing the
+        generator (e.g. the client went away) closes the upstream response.
+        """
+        payload = self._payload("generate", request, user)
+        payload["stream"] = True
+        async with self._concurrency:
+            try:
+                async with self._client.stream("POST", "/v1/generate", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line:
+                            token = json.loads(line).get("token")
+                            if token:
+                                yield token
+            except httpx.TimeoutException as e:
+                raise InferenceTimeoutError("Model server timed out on generate") from e
+            except (httpx.HTTPError, ValueError) as e:
+                raise InferenceError(f"Model server call generate failed: {e}") from e
+
+    async def explain(self, request: CodeExplanationRequest, user: User) -> InferenceResult:
+        return await self._call("explain", self._payload("explain", request, user))
+
+    async def refactor(self, request: CodeRefactorRequest, user: User) -> InferenceResult:
+        return await self._call("refactor", self._payload("refactor", request, user))
+
+    async def complete(self, request: CompletionRequest, user: User) -> InferenceResult:
+        # Short timeout: a late completion is useless. Cancelling the caller closes the upstream request.
+        return await self._call("complete", {
+            "prefix": request.prefix,
+            "suffix": request.suffix,
+            "language": request.language,
+            "max_tokens": request.max_tokens,
+            "user_tier": user.subscription_plan.value,
+        }, timeout=settings.COMPLETION_TIMEOUT_SECONDS)
+
+    async def run_batch(self, operation: str, items: List[Tuple[Any, User]]) -> List[Union[InferenceResult, Exception]]:
+        """One POST {base_url}/v1/{operation}/batch; per-item failures come back as {"error": ...}."""
+        async with self._concurrency:
+            try:
+                response = await self._client.post(
+                    f"/v1/{operation}/batch",
+                    json={"items": [self._payload(operation, request, user) for request, user in items]},
+                )
+                response.raise_for_status()
+                results = response.json()["results"]
+            except httpx.TimeoutException as e:
+                raise InferenceTimeoutError(f"Model server timed out on {operation} batch") from e
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                raise InferenceError(f"Model server call {operation} batch failed: {e}") from e
+        if len(results) != len(items):
+            raise InferenceError(f"Model server returned {len(results)} results for {len(items)} {operation} items")
+        return [
+            InferenceError(f"Model server failed on {operation}: {result['error']}") if "error" in result
+            else InferenceResult(**result)
+            for result in results
+        ]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class BatchingInferenceBackend(InferenceBackend):
+    """
+    Wraps another backend and merges concurrent generate/explain/refactor calls into
+    `run_batch` calls (see MicroBatcher): each operation's queue is dispatched after
+    `max_wait` seconds or `max_batch_size` requests. Streaming and completions are passed
+    through unbatched (a completion can't afford the batch window, and is often cancelled).
+    """
+
+    def __init__(self, inner: InferenceBackend, max_batch_size: int, max_wait: float):
+        self.inner = inner
+        self.per_user_output = inner.per_user_output
+        self.batchers = {
+            operation: MicroBatcher(
+                lambda items, operation=operation: inner.run_batch(operation, items), max_batch_size, max_wait
+            )
+            for operation in BATCHED_OPERATIONS
+        }
+
+    async def generate(self, request: CodeGenerationRequest, user: User) -> InferenceResult:
+        return await self.batchers["generate"].submit((request, user))
+
+    def stream_generate(self, request: CodeGenerationRequest, user: User) -> AsyncIterator[str]:
+        return self.inner.stream_generate(request, user)
+
+    async def explain(self, request: CodeExplanationRequest, user: User) -> InferenceResult:
+        return await self.batchers["explain"].submit((request, user))
+
+    async def refactor(self, request: CodeRefactorRequest, user: User) -> InferenceResult:
+        return await self.batchers["refactor"].submit((request, user))
+
+    async def complete(self, request: CompletionRequest, user: User) -> InferenceResult:
+        return await self.inner.complete(request, user)
+
+    async def run_batch(self, operation: str, items: List[Tuple[Any, User]]) -> List[Union[InferenceResult, Exception]]:
+        return await self.inner.run_batch(operation, items)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def build_inference_backend() -> InferenceBackend:
+    if settings.INFERENCE_BACKEND == "template":
+        return TemplateInferenceBackend()
+    if settings.INFERENCE_BACKEND == "http":
+        backend = HTTPInferenceBackend(
+            base_url=settings.INFERENCE_BASE_URL,
+            timeout=settings.INFERENCE_TIMEOUT_SECONDS,
+            connect_timeout=settings.INFERENCE_CONNECT_TIMEOUT_SECONDS,
+            max_connections=settings.INFERENCE_MAX_CONNECTIONS,
+            max_concurrency=settings.INFERENCE_MAX_CONCURRENCY,
+            api_key=settings.INFERENCE_API_KEY,
+        )
+        if settings.INFERENCE_BATCH_WINDOW_MS > 0 and settings.INFERENCE_BATCH_MAX_SIZE > 1:
+            backend = BatchingInferenceBackend(
+                backend,
+                max_batch_size=settings.INFERENCE_BATCH_MAX_SIZE,
+                max_wait=settings.INFERENCE_BATCH_WINDOW_MS / 1000,
+            )
+        return backend
+    raise ValueError(f"Unknown INFERENCE_BACKEND: {settings.INFERENCE_BACKEND}")
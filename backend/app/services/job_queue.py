@@ -0,0 +1,455 @@
+# backend/app/services/job_queue.py
+import asyncio
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.app.core.config import settings
+from backend.app.db.user_repository import user_repository
+from backend.app.models.job import FINISHED_JOB_STATUSES, JobInfo, JobStatus
+from backend.app.models.user import User
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    operation TEXT NOT NULL,
+    request TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    status_code INTEGER,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, created_at);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+JOB_COLUMNS = "id, operation, status, created_at, started_at, finished_at, status_code, error"
+INSERT_JOB = "INSERT INTO jobs (id, user_id, operation, request, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)"
+SELECT_JOB = f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ? AND user_id = ?"
+SELECT_USER_JOBS = f"SELECT {JOB_COLUMNS} FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?"
+SELECT_RESULT = "SELECT result FROM jobs WHERE id = ? AND user_id = ?"
+COUNT_ACTIVE = "SELECT count(*) FROM jobs WHERE user_id = ? AND status IN ('queued', 'running')"
+# Columns added after the first release of the table
+MIGRATIONS = (("owner", "ALTER TABLE jobs ADD COLUMN owner TEXT"), ("heartbeat_at", "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL"))
+SELECT_NEXT_QUEUED = "SELECT id, user_id, operation, request FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+CLAIM_JOB = """
+UPDATE jobs SET status = 'running', owner = ?, started_at = ?, heartbeat_at = ?
+WHERE id = ? AND status = 'queued'
+"""
+FINISH_JOB = """
+UPDATE jobs SET status = ?, result = ?, status_code = ?, error = ?, finished_at = ?
+WHERE id = ? AND status IN ('queued', 'running')
+"""
+# A worker only records the outcome of its own claim: the job may have been requeued and claimed again since
+FINISH_CLAIMED = """
+UPDATE jobs SET status = ?, result = ?, status_code = ?, error = ?, finished_at = ?
+WHERE id = ? AND status = 'running' AND owner = ?
+"""
+HEARTBEAT = "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND owner = ?"
+SELECT_OWNED = "SELECT id FROM jobs WHERE status = 'running' AND owner = ?"
+REQUEUE_STALE = """
+UPDATE jobs SET status = 'queued', owner = NULL, started_at = NULL, heartbeat_at = NULL
+WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)
+"""
+REQUEUE_OWNED = """
+UPDATE jobs SET status = 'queued', owner = NULL, started_at = NULL, heartbeat_at = NULL
+WHERE status = 'running' AND owner = ?
+"""
+COUNT_QUEUED = "SELECT count(*) FROM jobs WHERE status = 'queued'"
+DELETE_FINISHED = "DELETE FROM jobs WHERE status IN ('succeeded', 'failed', 'cancelled') AND finished_at <= ?"
+PRUNE_EVERY = 1000  # Submissions between deletions of expired jobs
+FINISH_ATTEMPTS = 5  # Tries to record a job's outcome (e.g. while another process holds the table locked)
+
+# (operation, request payload, user) -> response body; raises on failure
+JobRunner = Callable[[str, Dict[str, Any], User], Awaitable[Dict[str, Any]]]
+# Failure -> (status code, message), as the operation's endpoint would have answered
+ErrorDescriber = Callable[[Exception], Tuple[int, str]]
+
+
+class JobNotFoundError(LookupError):
+    """No such job, or it belongs to another user."""
+
+
+class JobLimitError(RuntimeError):
+    """The user already has the maximum number of unfinished jobs."""
+
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def _job_info(row: Tuple) -> JobInfo:
+    job_id, operation, status, created_at, started_at, finished_at, status_code, error = row
+    return JobInfo(
+        id=job_id,
+        operation=operation,
+        status=JobStatus(status),
+        created_at=_timestamp(created_at),
+        started_at=_timestamp(started_at),
+        finished_at=_timestamp(finished_at),
+        status_code=status_code,
+        error=error,
+    )
+
+
+class JobQueue:
+    """
+    Long-running /assist operations run as jobs, so no request connection waits for them.
+    Jobs are rows of a SQLite table (the source of truth for status and results). Every
+    worker process runs `workers` asyncio tasks that claim the oldest queued row, so any
+    process's jobs are run by whichever process is free, in submission order.
+
+    A claim records its process (`owner`) and is kept alive by a heartbeat every
+    `heartbeat_interval` seconds while its task runs; a running job whose heartbeat is older
+    than `stale_after` (its process died, or its outcome could not be recorded) is queued
+    again, as are this process's own jobs when it stops.
+    Each process also checks its running jobs every `poll_interval` seconds and stops the
+    ones cancelled (or reclaimed) through another process. Results are kept for
+    `result_ttl` seconds after the job finishes. Waiting for a job (long-poll or event
+    stream) is woken by this process's status changes, and otherwise re-reads the table
+    every `poll_interval` seconds, for jobs run by another worker process.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            workers: int,
+            max_active_per_user: int,
+            result_ttl: float,
+            heartbeat_interval: float,
+            stale_after: float,
+            poll_interval: float = 1.0,
+    ):
+        self.path = path
+        self.workers = workers
+        self.max_active_per_user = max_active_per_user
+        self.result_ttl = result_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._queued = 0  # As of the last check
+        self._work_available: Optional[asyncio.Event] = None  # Set when this process submits a job
+        self._worker_tasks: List[asyncio.Task] = []
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: Set[str] = set()  # Stopped because the table says so, not by shutdown
+        self._changed: Dict[str, asyncio.Event] = {}  # Job id -> set on its next status change
+        self._waiting: Dict[str, int] = {}  # Job id -> callers waiting for its next change
+        self._runner: Optional[JobRunner] = None
+        self._describe_error: Optional[ErrorDescriber] = None
+
+    async def start(self, runner: JobRunner, describe_error: ErrorDescriber) -> None:
+        if self._db is not None:
+            return
+        self._runner = runner
+        self._describe_error = describe_error
+        self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # Survives process crashes; a power loss may drop the last updates
+        self._db.executescript(JOB_SCHEMA)
+        self._migrate()
+        requeued, self._queued = await asyncio.to_thread(self._recover)
+        if requeued:
+            print(f"Job queue requeued {requeued} job(s) of stopped worker processes")
+        self._work_available = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        tasks = self._worker_tasks + ([self._monitor_task] if self._monitor_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._monitor_task = None
+        if self._db is not None:
+            # Jobs cut short here are queued again, for another process or the next start
+            await asyncio.to_thread(self._write, REQUEUE_OWNED, (self.owner,))
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    async def submit(self, user: User, operation: str, request: Dict[str, Any]) -> JobInfo:
+        job_id = secrets.token_urlsafe(12)
+        info = await asyncio.to_thread(self._insert, job_id, user.id, operation, json.dumps(request), time.time())
+        self.submitted += 1
+        self._queued += 1
+        self._work_available.set()
+        return info
+
+    async def get(self, job_id: str, user: User) -> JobInfo:
+        row = await asyncio.to_thread(self._fetch, SELECT_JOB, (job_id, user.id))
+        if row is None:
+            raise JobNotFoundError(job_id)
+        return _job_info(row)
+
+    async def list(self, user: User, limit: int = 50) -> List[JobInfo]:
+        rows = await asyncio.to_thread(self._fetch_all, SELECT_USER_JOBS, (user.id, limit))
+        return [_job_info(row) for row in rows]
+
+    async def result(self, job_id: str, user: User) -> Optional[Dict[str, Any]]:
+        """The response body of a succeeded job, None otherwise."""
+        row = await asyncio.to_thread(self._fetch, SELECT_RESULT, (job_id, user.id))
+        if row is None:
+            raise JobNotFoundError(job_id)
+        return json.loads(row[0]) if row[0] is not None else None
+
+    async def wait(self, job_id: str, user: User, timeout: float) -> JobInfo:
+        """The job once it has finished, or as it is after `timeout` seconds (long-poll)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            info = await self.get(job_id, user)
+            remaining = deadline - time.monotonic()
+            if info.status in FINISHED_JOB_STATUSES or remaining <= 0:
+                return info
+            await self._next_change(job_id, min(remaining, self.poll_interval))
+
+    async def events(self, job_id: str, user: User) -> AsyncIterator[JobInfo]:
+        """The job now, then again on every status change, until it has finished."""
+        info = await self.get(job_id, user)
+        yield info
+        while info.status not in FINISHED_JOB_STATUSES:
+            await self._next_change(job_id, self.poll_interval)
+            current = await self.get(job_id, user)
+            if current.status != info.status:
+                yield current
+            info = current
+
+    async def cancel(self, job_id: str, user: User) -> JobInfo:
+        """Cancel a queued or running job; a finished job is returned unchanged."""
+        info = await self.get(job_id, user)
+        if info.status in FINISHED_JOB_STATUSES:
+            return info
+        self._stop_running(job_id)
+        # If another worker process runs it, that process stops it on its next check
+        await self._finish(job_id, JobStatus.CANCELLED, None, None, None)
+        return await self.get(job_id, user)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queued": self._queued,
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+    async def _work(self) -> None:
+        while True:
+            # Cleared before looking, so a job submitted while we look still wakes us
+            self._work_available.clear()
+            try:
+                claimed = await asyncio.to_thread(self._claim_next, time.time())
+            except sqlite3.Error as e:  # E.g. the table stayed locked by another process
+                print(f"Job queue claim failed: {e!r}")
+                claimed = None
+            if claimed is None:
+                # Jobs submitted through other processes are found on the next look
+                try:
+                    await asyncio.wait_for(self._work_available.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id = claimed[0]
+            self._notify(job_id)
+            task = asyncio.create_task(self._execute(*claimed))
+            self._running[job_id] = task
+            try:
+                await asyncio.wait([task])  # Unlike awaiting the task, not raised into by its cancellation
+            except asyncio.CancelledError:  # Shutdown: stop the job too, and leave it to resume on restart
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(job_id, None)
+                self._cancel_requested.discard(job_id)
+            if not task.cancelled() and task.exception() is not None:
+                # Unexpected errors are reported as an unhandled request error would be, with the traceback
+                asyncio.get_running_loop().call_exception_handler({
+                    "message": f"Job {job_id} failed unexpectedly",
+                    "exception": task.exception(),
+                    "task": task,
+                })
+
+    async def _monitor(self) -> None:
+        last_heartbeat = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                if time.monotonic() - last_heartbeat >= self.heartbeat_interval:
+                    last_heartbeat = time.monotonic()
+                    requeued = await asyncio.to_thread(self._heartbeat, time.time(), list(self._running))
+                    if requeued:
+                        print(f"Job queue requeued {requeued} job(s) of stopped worker processes")
+                        self._work_available.set()
+                owned, self._queued = await asyncio.to_thread(self._owned_jobs)
+            except sqlite3.Error as e:  # E.g. the table is locked by another process for longer than the timeout
+                print(f"Job queue check failed: {e!r}")
+                continue
+            # Jobs of ours that are no longer ours to run: cancelled, or requeued after we missed heartbeats
+            for job_id in [job_id for job_id in self._running if job_id not in owned]:
+                self._stop_running(job_id)
+
+    def _stop_running(self, job_id: str) -> None:
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancel_requested.add(job_id)
+            task.cancel()
+
+    async def _execute(self, job_id: str, user_id: int, operation: str, request: str) -> None:
+        try:
+            user = await user_repository.get_public(user_id)
+            if user is None or not user.is_active:
+                await self._finish(job_id, JobStatus.FAILED, None, 403, "The job's user is no longer active.")
+                return
+            result = await self._runner(operation, json.loads(request), user)
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_requested:
+                raise
+            return  # cancel() records the cancellation
+        except Exception as e:
+            try:
+                status_code, error = self._describe_error(e)
+            except Exception:  # Not an error the operation's endpoint answers: recorded, then reported by _work
+                await self._finish(job_id, JobStatus.FAILED, None, 500, "The operation failed unexpectedly.")
+                raise
+            await self._finish(job_id, JobStatus.FAILED, None, status_code, error)
+            return
+        await self._finish(job_id, JobStatus.SUCCEEDED, json.dumps(result, separators=(",", ":")), 200, None)
+
+    async def _finish(
+            self, job_id: str, status: JobStatus, result: Optional[str], status_code: Optional[int], error: Optional[str]
+    ) -> None:
+        if status == JobStatus.CANCELLED:
+            statement, parameters = FINISH_JOB, (status.value, result, status_code, error, time.time(), job_id)
+        else:
+            statement, parameters = FINISH_CLAIMED, (status.value, result, status_code, error, time.time(), job_id, self.owner)
+        for attempt in range(FINISH_ATTEMPTS):
+            try:
+                updated = await asyncio.to_thread(self._write, statement, parameters)
+                break
+            except sqlite3.Error:
+                # After the last attempt the job's heartbeat stops with its task, so it goes stale and runs again
+                if attempt == FINISH_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        if updated:
+            if status == JobStatus.SUCCEEDED:
+                self.succeeded += 1
+            elif status == JobStatus.FAILED:
+                self.failed += 1
+            else:
+                self.cancelled += 1
+        self._notify(job_id)
+
+    def _notify(self, job_id: str) -> None:
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _next_change(self, job_id: str, timeout: float) -> None:
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        self._waiting[job_id] = self._waiting.get(job_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Jobs finished by another process are never notified here: drop the event with its last waiter
+            waiting = self._waiting.pop(job_id) - 1
+            if waiting:
+                self._waiting[job_id] = waiting
+            elif self._changed.get(job_id) is event:
+                del self._changed[job_id]
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS:
+            if column not in columns:
+                try:
+                    self._db.execute(statement)
+                except sqlite3.OperationalError:  # Added by another process starting at the same time
+                    pass
+
+    def _recover(self) -> Tuple[int, int]:
+        with self._db_lock:
+            requeued = self._db.execute(REQUEUE_STALE, (time.time() - self.stale_after,)).rowcount
+            self._db.execute(DELETE_FINISHED, (time.time() - self.result_ttl,))
+            (queued,) = self._db.execute(COUNT_QUEUED).fetchone()
+            return requeued, queued
+
+    def _heartbeat(self, now: float, job_ids: List[str]) -> int:
+        with self._db_lock:
+            # Only jobs still running here: one whose outcome could not be recorded must go stale
+            self._db.executemany(HEARTBEAT, [(now, job_id, self.owner) for job_id in job_ids])
+            return self._db.execute(REQUEUE_STALE, (now - self.stale_after,)).rowcount
+
+    def _owned_jobs(self) -> Tuple[Set[str], int]:
+        with self._db_lock:
+            owned = {row[0] for row in self._db.execute(SELECT_OWNED, (self.owner,))}
+            (queued,) = self._db.execute(COUNT_QUEUED).fetchone()
+            return owned, queued
+
+    def _insert(self, job_id: str, user_id: int, operation: str, request: str, now: float) -> JobInfo:
+        with self._db_lock:
+            (active,) = self._db.execute(COUNT_ACTIVE, (user_id,)).fetchone()
+            if active >= self.max_active_per_user:
+                raise JobLimitError(f"At most {self.max_active_per_user} unfinished jobs per user")
+            self._db.execute(INSERT_JOB, (job_id, user_id, operation, request, now))
+            if self.submitted % PRUNE_EVERY == PRUNE_EVERY - 1:
+                self._db.execute(DELETE_FINISHED, (now - self.result_ttl,))
+        return JobInfo(id=job_id, operation=operation, status=JobStatus.QUEUED, created_at=_timestamp(now))
+
+    def _claim_next(self, now: float) -> Optional[Tuple[str, int, str, str]]:
+        with self._db_lock:
+            # One write transaction, so no other process claims the same row in between
+            self._db.execute("BEGIN IMMEDIATE")  # Waits up to the connection timeout for other writers
+            try:
+                row = self._db.execute(SELECT_NEXT_QUEUED).fetchone()
+                if row is not None:
+                    self._db.execute(CLAIM_JOB, (self.owner, now, now, row[0]))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return row
+
+    def _write(self, statement: str, parameters: Tuple) -> int:
+        with self._db_lock:
+            return self._db.execute(statement, parameters).rowcount
+
+    def _fetch(self, statement: str, parameters: Tuple) -> Optional[Tuple]:
+        with self._db_lock:
+            return self._db.execute(statement, parameters).fetchone()
+
+    def _fetch_all(self, statement: str, parameters: Tuple) -> List[Tuple]:
+        with self._db_lock:
+            return self._db.execute(statement, parameters).fetchall()
+
+
+job_queue = JobQueue(
+    path=settings.JOB_DB_PATH,
+    workers=settings.JOB_WORKERS,
+    max_active_per_user=settings.JOB_MAX_ACTIVE_PER_USER,
+    result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+    heartbeat_interval=settings.JOB_HEARTBEAT_SECONDS,
+    stale_after=settings.JOB_STALE_AFTER_SECONDS,
+)
@@ -0,0 +1,209 @@
+# backend/app/services/language_detector.py
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+MAX_SCAN_CHARS = 8192  # The head of a long block is enough to tell the language
+MIN_EVIDENCE = 2  # Fewer feature hits than this and we don't guess
+
+# Evidence table of the linear model: feature -> weight, per language. Features are
+# keywords (matched as whole words) and character n-grams (punctuation and operators).
+LANGUAGE_FEATURES: Dict[str, Dict[str, float]] = {
+    "python": {
+        "def ": 2.0, "):\n": 1.5, "self.": 2.0, "self": 1.0, "elif": 3.0, "None": 1.5, "True": 1.0, "False": 1.0,
+        "import ": 0.5, "from ": 0.3, "print(": 1.0, "__init__": 3.0, "lambda": 1.0, "yield": 0.5, "async def": 2.0,
+        "await ": 0.3, "    ": 0.2, "#": 0.3, "\"\"\"": 2.0, "not in": 1.5, "is not": 1.5, "range(": 1.0,
+        "len(": 1.0, "except": 2.0, "raise ": 1.0, "with ": 0.5, "pass": 1.0, "@": 0.2, ";\n": -1.5, "{\n": -1.0,
+        "}": -0.5, "end\n": -1.0,
+    },
+    "javascript": {
+        "const ": 1.5, "let ": 1.0, "var ": 1.0, "function": 1.5, "=>": 1.5, "console.log": 3.0, "===": 2.0,
+        "!==": 2.0, "undefined": 2.0, "null": 0.5, "require(": 2.0, "module.exports": 3.0, "document.": 2.5,
+        "window.": 2.5, "async ": 0.5, "await ": 0.5, "this.": 0.8, ";\n": 0.5, "{\n": 0.5, "}": 0.3,
+        "export ": 1.0, "import ": 0.3, "new ": 0.3, "Promise": 1.0, "JSON.": 1.5, "$": 0.2, "`": 0.5,
+    },
+    "typescript": {
+        "const ": 1.3, "let ": 0.9, "function": 1.2, "=>": 1.3, "console.log": 2.6, "===": 1.8, "!==": 1.8,
+        "interface ": 2.5, ": string": 3.0, ": number": 3.0, ": boolean": 3.0, ": void": 3.0, "readonly": 2.0,
+        "private ": 0.8, "public ": 0.5, "implements": 1.0, "export type": 3.0, "type ": 0.5, "as const": 3.0,
+        "<T>": 1.5, ": any": 3.0, "enum ": 1.0, "namespace": 0.5, "export ": 1.0, "import ": 0.3, ";\n": 0.5,
+        "{\n": 0.5, "}": 0.3, "this.": 0.7, "async ": 0.5, "await ": 0.5,
+    },
+    "java": {
+        "public ": 1.0, "private ": 1.0, "protected ": 1.0, "static ": 0.8, "void ": 1.0, "class ": 0.8,
+        "System.out": 4.0, "public static void main": 4.0, "String[]": 3.0, "String ": 1.5, "int ": 0.5,
+        "new ": 0.5, "extends ": 1.0, "implements ": 1.5, "@Override": 3.0, "import java": 4.0, "package ": 1.0,
+        "final ": 1.0, "throws ": 2.0, "boolean ": 1.0, "ArrayList": 2.0, ";\n": 1.0, "{\n": 0.8, "}": 0.3,
+        "this.": 0.5, "null": 0.3,
+    },
+    "c#": {
+        "using System": 4.0, "namespace ": 1.5, "public ": 1.0, "private ": 1.0, "static ": 0.8, "void ": 1.0,
+        "class ": 0.8, "Console.Write": 4.0, "string ": 1.5, "var ": 0.8, "get;": 3.0, "set;": 3.0,
+        "async Task": 3.0, "Task<": 2.0, "List<": 1.0, "new ": 0.5, "override ": 1.0, "=>": 0.5, "foreach": 1.5,
+        "readonly ": 1.0, ";\n": 1.0, "{\n": 0.8, "}": 0.3, "null": 0.3, "[": 0.1,
+    },
+    "c++": {
+        "#include": 2.0, "std::": 4.0, "cout": 3.0, "cin": 2.0, "<<": 1.0, "::": 1.0, "template": 2.5,
+        "namespace": 1.0, "class ": 0.8, "public:": 3.0, "private:": 3.0, "virtual ": 2.0, "const ": 0.3,
+        "auto ": 1.5, "nullptr": 3.0, "vector<": 2.5, "->": 0.5, "int main": 1.5, "void ": 0.5, ";\n": 1.0,
+        "{\n": 0.8, "}": 0.3, "&": 0.2,
+    },
+    "c": {
+        "#include": 2.0, "stdio.h": 4.0, "stdlib.h": 3.0, "printf(": 2.5, "scanf(": 3.0, "malloc(": 3.0,
+        "free(": 2.0, "int main": 1.5, "struct ": 1.5, "typedef ": 2.0, "char *": 2.0, "sizeof": 1.5,
+        "NULL": 1.5, "void ": 0.5, "->": 0.5, "#define": 2.0, ";\n": 1.0, "{\n": 0.8, "}": 0.3, "&": 0.2,
+    },
+    "go": {
+        "package main": 4.0, "package ": 1.0, "func ": 3.0, ":=": 2.5, "fmt.": 4.0, "import (": 3.0,
+        "err != nil": 4.0, "nil": 1.0, "chan ": 2.5, "go ": 0.5, "defer ": 3.0, "struct {": 2.0, "[]string": 3.0,
+        "interface{}": 3.0, "range ": 1.0, "{\n": 0.8, "}": 0.3, ";\n": -1.0,
+    },
+    "rust": {
+        "fn ": 3.0, "let mut": 4.0, "let ": 0.8, "println!": 4.0, "->": 1.0, "impl ": 3.0, "pub fn": 3.0,
+        "use std": 4.0, "&mut": 3.0, "match ": 1.5, "Some(": 2.0, "None": 0.5, "Ok(": 2.0, "Err(": 2.0,
+        "::new(": 1.5, "::": 1.0, "Vec<": 3.0, "&str": 3.0, "unwrap()": 3.0, "mod ": 1.0, "enum ": 0.8,
+        "struct ": 1.0, "#[": 2.5, "{\n": 0.8, "}": 0.3, ";\n": 0.8,
+    },
+    "ruby": {
+        "def ": 1.5, "end": 1.5, "end\n": 2.0, "puts ": 3.0, "require '": 3.0, "do |": 4.0, "|": 0.3,
+        "elsif": 4.0, "attr_accessor": 4.0, ".each": 2.0, "nil": 1.5, "unless ": 2.0, "@": 0.5, "module ": 1.0,
+        "class ": 0.5, ":": 0.1, "=>": 0.5, "#": 0.3, ";\n": -1.0, "{\n": -0.5,
+    },
+    "php": {
+        "<?php": 6.0, "$": 1.5, "echo ": 1.5, "function ": 1.0, "->": 1.0, "=>": 0.8, "array(": 3.0,
+        "public function": 3.0, "namespace ": 0.5, "use ": 0.5, "$this->": 4.0, "isset(": 3.0, ";\n": 0.8,
+        "{\n": 0.5, "}": 0.3, ".": 0.1,
+    },
+    "sql": {
+        "SELECT ": 3.0, "FROM ": 2.0, "WHERE ": 2.0, "INSERT INTO": 4.0, "CREATE TABLE": 4.0, "JOIN ": 2.5,
+        "GROUP BY": 3.0, "ORDER BY": 3.0, "VALUES": 2.0, "UPDATE ": 1.5, "DELETE FROM": 3.0, "select ": 1.5,
+        "from ": 0.5, "where ": 1.5, "join ": 1.0, "group by": 2.0, "order by": 2.0, "AND ": 0.5, "NOT NULL": 3.0,
+        "PRIMARY KEY": 4.0, "VARCHAR": 4.0, ";\n": 0.3, "*": 0.2,
+    },
+    "html": {
+        "<!DOCTYPE": 6.0, "<html": 5.0, "<div": 4.0, "</div>": 4.0, "</": 1.5, "<p>": 3.0, "href=": 3.0,
+        "class=\"": 2.0, "<span": 3.0, "<body": 4.0, "<head": 4.0, "<script": 2.0, "/>": 1.0, "<a ": 2.0,
+        "<li>": 3.0, "<ul>": 3.0,
+    },
+    "css": {
+        "px;": 4.0, "color:": 3.0, "margin:": 4.0, "padding:": 4.0, "display:": 4.0, "font-": 3.0,
+        "@media": 4.0, "background": 2.0, "border:": 3.0, "width:": 2.0, "height:": 2.0, "!important": 4.0,
+        "{\n": 0.5, "}": 0.3, ";\n": 0.3, "#": 0.3, ".": 0.1,
+    },
+    "shell": {
+        "#!/bin/bash": 6.0, "#!/bin/sh": 6.0, "#!/usr/bin/env bash": 6.0, "echo ": 2.0, "fi": 2.5, "then": 2.0,
+        "done": 1.5, "esac": 4.0, "$1": 2.0, "${": 1.5, "$(": 2.0, "export ": 1.5, "grep ": 2.5, "sudo ": 3.0,
+        "| ": 0.5, "cd ": 1.5, "apt-get": 4.0, "mkdir ": 2.0, "&&": 0.5, "[ ": 1.0, "-eq": 4.0, "-ne": 3.0,
+        "#": 0.2, "$": 0.5,
+    },
+}
+# Prior per language (ties in weak evidence go to the more common language)
+LANGUAGE_BIAS: Dict[str, float] = {"python": 0.3, "javascript": 0.2}
+
+# Language names a natural-language prompt may mention ("... in Rust"). Names end where no
+# word character, "+" or "#" follows: a trailing \b never matches after "C++" or "C#", and
+# "in C" must not match the start of "in C++".
+PROMPT_LANGUAGE_PATTERN = re.compile(
+    r"\b(c\+\+|c#|python|javascript|typescript|java|cpp|csharp|golang|rust|ruby|php|sql|html|css|bash|shell)"
+    r"(?![\w+#])|\bin (go|c)(?![\w+#])",
+    re.IGNORECASE,
+)
+PROMPT_LANGUAGE_ALIASES = {"cpp": "c++", "csharp": "c#", "golang": "go", "bash": "shell"}
+
+
+class LanguagePrediction(BaseModel):
+    language: str
+    confidence: float
+
+
+def _feature_tokens(feature: str) -> List[str]:
+    # Regex pieces of a feature; keywords get word boundaries on their alphanumeric edges
+    tokens = [re.escape(char) for char in feature]
+    if feature[0].isalnum() or feature[0] == "_":
+        tokens.insert(0, r"\b")
+    if feature[-1].isalnum() or feature[-1] == "_":
+        tokens.append(r"\b")
+    return tokens
+
+
+def _trie_pattern(features: Sequence[str]) -> str:
+    """
+    One regex matching any of `features`, as a trie of their shared prefixes: the regex
+    engine tries alternatives one by one, so a flat "a|b|c..." alternation would test
+    every feature at every position, while the trie tests only those sharing a prefix.
+    Longer features are tried before their prefixes.
+    """
+    trie: Dict[str, dict] = {}
+    for feature in features:
+        node = trie
+        for token in _feature_tokens(feature):
+            node = node.setdefault(token, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [token + build(child) for token, child in node.items() if token]
+        if "" in node:
+            branches.append("")  # The feature ending here, if nothing longer matches
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class LanguageDetector:
+    """
+    Linear classifier over keyword and character n-gram counts. All features are matched
+    in one pass by a single compiled regex (a trie of the features); counts go through
+    log1p and one matrix product with the weight table (`LANGUAGE_FEATURES`), and a
+    softmax gives the confidence.
+    Batches of blocks share a single matrix product.
+    """
+
+    def __init__(self, features: Dict[str, Dict[str, float]], bias: Dict[str, float]):
+        self.languages: List[str] = list(features)
+        vocabulary = sorted({feature for weights in features.values() for feature in weights})
+        self._index = {feature: i for i, feature in enumerate(vocabulary)}
+        self._pattern = re.compile(_trie_pattern(vocabulary))
+        self._weights = np.zeros((len(vocabulary), len(self.languages)), dtype=np.float32)
+        for j, language in enumerate(self.languages):
+            for feature, weight in features[language].items():
+                self._weights[self._index[feature], j] = weight
+        self._bias = np.array([bias.get(language, 0.0) for language in self.languages], dtype=np.float32)
+
+    def _counts(self, code: str) -> np.ndarray:
+        index = self._index
+        hits = [index[match] for match in self._pattern.findall(code[:MAX_SCAN_CHARS].replace("\r\n", "\n"))]
+        return np.bincount(hits, minlength=len(index)).astype(np.float32)
+
+    def classify_many(self, blocks: Sequence[str]) -> List[Optional[LanguagePrediction]]:
+        if not blocks:
+            return []
+        counts = np.stack([self._counts(block) for block in blocks])
+        scores = np.log1p(counts) @ self._weights + self._bias
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        evidence = counts.sum(axis=1)
+        return [
+            LanguagePrediction(language=self.languages[j], confidence=round(float(probabilities[i, j]), 3))
+            if evidence[i] >= MIN_EVIDENCE else None
+            for i, j in enumerate(best)
+        ]
+
+    def classify(self, code: str) -> Optional[LanguagePrediction]:
+        return self.classify_many([code])[0]
+
+
+def language_from_prompt(prompt: str) -> Optional[str]:
+    match = PROMPT_LANGUAGE_PATTERN.search(prompt)
+    if match is None:
+        return None
+    name = (match.group(1) or match.group(2)).lower()
+    return PROMPT_LANGUAGE_ALIASES.get(name, name)
+
+
+language_detector = LanguageDetector(LANGUAGE_FEATURES, LANGUAGE_BIAS)
@@ -0,0 +1,837 @@
+# backend/app/services/local_refactor.py
+import ast
+import io
+import keyword
+import re
+import sys
+import tokenize
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Refactor goals done here without the model, by the phrases clients use for them
+LOCAL_GOALS = {
+    "format": ("format", "formatting", "pep8", "pep 8", "whitespace", "indentation", "code formatting"),
+    "imports": ("imports", "sort imports", "import sorting", "organize imports", "isort"),
+    "dead_code": (
+        "dead code", "dead code removal", "remove dead code", "unused code", "remove unused code",
+        "unused imports", "remove unused imports", "unreachable code",
+    ),
+    "dry": ("dry", "duplicated literals", "duplicate literals", "extract constants"),
+}
+_GOAL_BY_PHRASE = {phrase: goal for goal, phrases in LOCAL_GOALS.items() for phrase in phrases}
+GOAL_ORDER = ("dead_code", "dry", "imports", "format")  # Formatting last, so it tidies the other edits
+
+INDENT = "    "
+IMPORT_LINE_LENGTH = 99  # Longer from-imports are wrapped, one name per line
+DRY_MIN_OCCURRENCES = 3
+DRY_MIN_LENGTH = 4
+OPENING = {"(", "[", "{"}
+CLOSING = {")", "]", "}"}
+SPACED_OPERATORS = {
+    "==", "!=", "<", ">", "<=", ">=", "->", ":=",
+    "+=", "-=", "*=", "/=", "//=", "%=", "**=", ">>=", "<<=", "&=", "^=", "|=", "@=",
+}
+# Spaced when binary: after an operand, not after an operator or keyword (-x, f(*args), import *)
+BINARY_OPERATORS = {"+", "-", "*", "/", "//", "%", "@", "&", "|", "^", "<<", ">>"}
+TERMINAL_STATEMENTS = (ast.Return, ast.Raise, ast.Continue, ast.Break)
+# Standard library modules imported for their side effects
+SIDE_EFFECT_MODULES = {"antigravity", "readline", "rlcompleter", "site", "sitecustomize", "this", "usercustomize"}
+
+
+class LocalRefactor(NamedTuple):
+    code: str
+    summary: List[str]
+    remaining_goals: List[str]  # Goals left for the model, as the client wrote them
+    warnings: List[str]
+
+
+def local_goal(goal: str) -> Optional[str]:
+    return _GOAL_BY_PHRASE.get(" ".join(re.sub(r"[-_]", " ", goal).lower().split()))
+
+
+def _splice(lines: List[str], edits: List[Tuple[int, int, int, str]]) -> List[str]:
+    # Apply (row, start, end, text) edits, columns in characters, rows 1-based; per row right to left
+    lines = list(lines)
+    for row, start, end, text in sorted(edits, key=lambda edit: (edit[0], edit[1]), reverse=True):
+        line = lines[row - 1]
+        lines[row - 1] = line[:start] + text + line[end:]
+    return lines
+
+
+def _char_column(line: str, byte_column: int) -> int:
+    # ast columns are UTF-8 byte offsets
+    return len(line.encode("utf-8")[:byte_column].decode("utf-8", errors="ignore"))
+
+
+def _statement_lists(tree: ast.AST):
+    for node in ast.walk(tree):
+        for field in ("body", "orelse", "finalbody"):
+            statements = getattr(node, field, None)
+            if isinstance(statements, list) and statements and isinstance(statements[0], ast.stmt):
+                yield statements
+        if isinstance(node, ast.Try):
+            for handler in node.handlers:
+                yield handler.body
+        if isinstance(node, ast.Match):
+            for case in node.cases:
+                yield case.body
+
+
+def _first_line(node: ast.stmt) -> int:
+    decorators = getattr(node, "decorator_list", [])
+    return min([node.lineno] + [decorator.lineno for decorator in decorators])
+
+
+def _own_lines(tree: ast.Module) -> Dict[int, int]:
+    # Line -> number of statements starting on it, to avoid editing lines shared through ";"
+    counts: Dict[int, int] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.stmt):
+            counts[node.lineno] = counts.get(node.lineno, 0) + 1
+    return counts
+
+
+def _comment_rows(source: str) -> Set[int]:
+    return {
+        token.start[0] for token in tokenize.generate_tokens(io.StringIO(source).readline)
+        if token.type == tokenize.COMMENT
+    }
+
+
+# --- Dead code -------------------------------------------------------------------------------
+
+def _used_names(tree: ast.Module) -> Set[str]:
+    used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    for node in ast.walk(tree):
+        # String annotations and __all__ can name imports too
+        annotations = [getattr(node, "annotation", None), getattr(node, "returns", None)]
+        for annotation in annotations:
+            if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+                used.update(re.findall(r"[A-Za-z_]\w*", annotation.value))
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets):
+            used.update(
+                element.value for element in ast.walk(node.value)
+                if isinstance(element, ast.Constant) and isinstance(element.value, str)
+            )
+    return used
+
+
+def _bound_name(alias: ast.alias) -> str:
+    return alias.asname or alias.name.split(".")[0]
+
+
+def _declares_all(tree: ast.Module) -> bool:
+    return any(
+        isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)) and any(
+            isinstance(target, ast.Name) and target.id == "__all__"
+            for target in (node.targets if isinstance(node, ast.Assign) else [node.target]))
+        for node in tree.body
+    )
+
+
+def _may_be_needed(node: ast.stmt, alias: ast.alias, declares_all: bool, imports_only: bool) -> bool:
+    # An unused import that code outside the snippet may rely on
+    if alias.asname is not None and alias.asname == alias.name.split(".")[-1]:
+        return True  # `import x as x`: an explicit re-export
+    if isinstance(node, ast.Import):
+        # Imported for its side effects, unless it is aliased or known to have none
+        top = alias.name.split(".")[0]
+        return alias.asname is None and (top not in sys.stdlib_module_names or top in SIDE_EFFECT_MODULES)
+    # Re-exported: relative imports and modules of nothing but imports (a package's __init__),
+    # unless __all__ lists the exports
+    return not declares_all and (node.level > 0 or imports_only)
+
+
+def remove_dead_code(source: str) -> Tuple[str, List[str], List[str]]:
+    """
+    Remove module-level imports whose names are never used, and statements that follow a
+    return, raise, continue or break in the same block. Statements sharing a line with
+    another (";") and imports carrying comments are left alone.
+
+    The snippet may be a whole module that others import from, so unused imports that may
+    be re-exported (relative imports, `import x as x`, a module of only imports) or imported
+    for side effects (plain `import x` of a non-standard module) are kept unless `__all__`
+    names the exports; they are reported as warnings.
+    """
+    tree = ast.parse(source)
+    lines = source.split("\n")
+    shared = {line for line, count in _own_lines(tree).items() if count > 1}
+    comments = _comment_rows(source)
+    used = _used_names(tree)
+    declares_all = _declares_all(tree)
+    imports_only = all(
+        isinstance(node, (ast.Import, ast.ImportFrom))
+        or (i == 0 and isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+        for i, node in enumerate(tree.body)
+    )
+    removed_rows: Set[int] = set()
+    replaced: Dict[int, Tuple[int, str]] = {}  # First row -> (last row, replacement)
+    unused_imports: List[str] = []
+    kept_imports: List[str] = []
+
+    for node in tree.body:
+        if not isinstance(node, (ast.Import, ast.ImportFrom)) or node.lineno in shared:
+            continue
+        if isinstance(node, ast.ImportFrom) and (node.module == "__future__" or any(a.name == "*" for a in node.names)):
+            continue
+        rows = range(node.lineno, node.end_lineno + 1)
+        unused = [alias for alias in node.names if _bound_name(alias) not in used]
+        kept = [alias for alias in unused if _may_be_needed(node, alias, declares_all, imports_only)]
+        kept_imports.extend(_alias_text(alias) for alias in kept)
+        unused = [alias for alias in unused if alias not in kept]
+        if not unused or any(row in comments for row in rows):
+            continue
+        unused_imports.extend(_bound_name(alias) for alias in unused)
+        if len(unused) == len(node.names):
+            removed_rows.update(rows)
+        else:
+            node.names = [alias for alias in node.names if alias not in unused]
+            replaced[node.lineno] = (node.end_lineno, ast.unparse(node))
+
+    unreachable = 0
+    for statements in _statement_lists(tree):
+        for i, statement in enumerate(statements[:-1]):
+            if not isinstance(statement, TERMINAL_STATEMENTS):
+                continue
+            dead = statements[i + 1:]
+            first = _first_line(dead[0])
+            if first <= statement.end_lineno or dead[-1].end_lineno in shared:
+                break
+            if not all(row in removed_rows for row in range(first, dead[-1].end_lineno + 1)):
+                removed_rows.update(range(first, dead[-1].end_lineno + 1))
+                unreachable += len(dead)
+            break
+
+    summary = []
+    if unused_imports:
+        summary.append(f"Removed unused import(s): {', '.join(sorted(set(unused_imports)))}.")
+    if unreachable:
+        summary.append(f"Removed {unreachable} unreachable statement(s) after return/raise/break/continue.")
+    warnings = []
+    if kept_imports:
+        warnings.append(
+            f"Kept unused import(s) {', '.join(sorted(set(kept_imports)))}: they may be re-exported or "
+            f"imported for their side effects. Remove them by hand if nothing relies on them."
+        )
+    if not summary:
+        if not warnings:
+            summary.append("No unused imports or unreachable code found.")
+        return source, summary, warnings
+
+    output = []
+    row = 1
+    while row <= len(lines):
+        if row in replaced:
+            last, text = replaced[row]
+            output.append(text)
+            row = last + 1
+            continue
+        if row not in removed_rows:
+            output.append(lines[row - 1])
+        row += 1
+    return "\n".join(output), summary, warnings
+
+
+# --- Duplicated literals ---------------------------------------------------------------------
+
+def _docstring_nodes(tree: ast.Module) -> Set[int]:
+    ids = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant):
+                ids.add(id(first.value))
+    return ids
+
+
+def _excluded_strings(tree: ast.Module) -> Set[int]:
+    # Docstrings, f-string pieces, annotations, __all__ entries and match/case patterns (where a
+    # name would be a capture pattern, not a value) aren't candidates for constants
+    excluded = _docstring_nodes(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.JoinedStr, ast.pattern)):
+            excluded.update(id(part) for part in ast.walk(node))
+        for field in ("annotation", "returns"):
+            annotation = getattr(node, field, None)
+            if annotation is not None:
+                excluded.update(id(part) for part in ast.walk(annotation))
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets):
+            excluded.update(id(part) for part in ast.walk(node.value))
+    return excluded
+
+
+def _constant_name(value: str) -> Optional[str]:
+    name = re.sub(r"\W+", "_", value).strip("_").upper()[:40].rstrip("_")
+    if not name or not name.isascii():
+        return None
+    return f"TEXT_{name}" if name[0].isdigit() else name
+
+
+def _single_literal(segment: str) -> bool:
+    # "a" "b" (implicit concatenation) is one Constant node but two tokens
+    try:
+        tokens = [t for t in tokenize.generate_tokens(io.StringIO(segment).readline)
+                  if t.type not in (tokenize.NEWLINE, tokenize.NL, tokenize.ENDMARKER)]
+    except (tokenize.TokenError, SyntaxError):
+        return False
+    return len(tokens) == 1 and tokens[0].type == tokenize.STRING
+
+
+def extract_duplicated_literals(source: str) -> Tuple[str, List[str], List[str]]:
+    """
+    Replace string literals used DRY_MIN_OCCURRENCES or more times with a module-level
+    constant named after the text, defined after the imports (or reuse an existing
+    NAME = "..." constant with that value).
+    """
+    tree = ast.parse(source)
+    lines = source.split("\n")
+    excluded = _excluded_strings(tree)
+    existing: Dict[str, Tuple[str, int]] = {}  # Value -> (constant name, line)
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id.isupper() and isinstance(node.value, ast.Constant)
+                and isinstance(node.value.value, str)):
+            existing.setdefault(node.value.value, (node.targets[0].id, node.lineno))
+            excluded.add(id(node.value))
+
+    occurrences: Dict[str, List[ast.Constant]] = {}
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in excluded
+                and node.lineno == node.end_lineno and len(node.value) >= DRY_MIN_LENGTH):
+            occurrences.setdefault(node.value, []).append(node)
+
+    taken = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    taken.update(node.name for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)))
+    imports_end = 0
+    docstring_end = 0
+    if tree.body and id(getattr(tree.body[0], "value", None)) in excluded and isinstance(tree.body[0], ast.Expr):
+        docstring_end = tree.body[0].end_lineno
+
+    edits = []
+    definitions = []
+    summary = []
+    first_use = None
+    for value, nodes in sorted(occurrences.items(), key=lambda item: (item[1][0].lineno, item[1][0].col_offset)):
+        if len(nodes) < DRY_MIN_OCCURRENCES:
+            continue
+        segments = [
+            lines[node.lineno - 1][_char_column(lines[node.lineno - 1], node.col_offset):
+                                   _char_column(lines[node.lineno - 1], node.end_col_offset)]
+            for node in nodes
+        ]
+        if not all(_single_literal(segment) for segment in segments):
+            continue
+        earliest = min(node.lineno for node in nodes)
+        if value in existing:
+            name, defined_at = existing[value]
+            if defined_at >= earliest:
+                continue
+        else:
+            name = _constant_name(value)
+            if name is None:
+                continue
+            base, n = name, 2
+            while name in taken:
+                name, n = f"{base}_{n}", n + 1
+            taken.add(name)
+            definitions.append(f"{name} = {segments[0]}")
+            first_use = earliest if first_use is None else min(first_use, earliest)
+        for node in nodes:
+            line = lines[node.lineno - 1]
+            edits.append((node.lineno, _char_column(line, node.col_offset), _char_column(line, node.end_col_offset), name))
+        shown = value if len(value) <= 40 else value[:37] + "..."
+        summary.append(f"Extracted the string {shown!r} ({len(nodes)} uses) into the constant {name}.")
+
+    if not summary:
+        return source, [], []
+    lines = _splice(lines, edits)
+    if definitions:
+        # After the last top-level import before the first use, else after the module docstring
+        for node in tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)) and node.end_lineno < first_use:
+                imports_end = node.end_lineno
+        at = imports_end or docstring_end
+        block = ([""] if at else []) + definitions + ([] if at else [""])
+        lines[at:at] = block
+    return "\n".join(lines), summary, []
+
+
+# --- Imports ---------------------------------------------------------------------------------
+
+def _import_section(node: ast.stmt) -> int:
+    if isinstance(node, ast.ImportFrom):
+        if node.module == "__future__":
+            return 0
+        if node.level:
+            return 3
+        top = (node.module or "").split(".")[0]
+    else:
+        top = node.names[0].name.split(".")[0]
+    return 1 if top in sys.stdlib_module_names else 2
+
+
+def _name_order(alias: ast.alias) -> Tuple[int, str]:
+    # Constants, then classes, then everything else (as isort orders imported names)
+    name = alias.name
+    kind = 0 if name.isupper() and len(name) > 1 else 1 if name[:1].isupper() else 2
+    return kind, name.lower()
+
+
+def _alias_text(alias: ast.alias) -> str:
+    return f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+
+
+def _render_imports(nodes: List[ast.stmt]) -> List[str]:
+    sections: Dict[int, Tuple[Set[str], Dict[Tuple[int, str], Dict[str, ast.alias]]]] = {}
+    for node in nodes:
+        plain, froms = sections.setdefault(_import_section(node), (set(), {}))
+        if isinstance(node, ast.Import):
+            plain.update(_alias_text(alias) for alias in node.names)
+        else:
+            names = froms.setdefault((node.level, node.module or ""), {})
+            for alias in node.names:
+                names[_alias_text(alias)] = alias
+    output: List[str] = []
+    for section in sorted(sections):
+        plain, froms = sections[section]
+        if output:
+            output.append("")
+        output.extend(f"import {name}" for name in sorted(plain, key=lambda name: name.lower()))
+        for (level, module), names in sorted(froms.items(), key=lambda item: (-item[0][0], item[0][1].lower())):
+            head = f"from {'.' * level}{module} import "
+            if names.pop("*", None):
+                output.append(head + "*")
+                if not names:
+                    continue
+            ordered = [_alias_text(alias) for alias in sorted(names.values(), key=_name_order)]
+            line = head + ", ".join(ordered)
+            if len(line) <= IMPORT_LINE_LENGTH:
+                output.append(line)
+            else:
+                output.append(head + "(")
+                output.extend(f"{INDENT}{name}," for name in ordered)
+                output.append(")")
+    return output
+
+
+def sort_imports(source: str) -> Tuple[str, List[str], List[str]]:
+    """
+    Sort each run of consecutive module-level imports into sections (__future__, standard
+    library, third-party, relative) separated by a blank line: plain imports first, then
+    from-imports, alphabetically, with duplicates merged. Runs containing comments are
+    left alone, as is every import that is not at module level.
+    """
+    tree = ast.parse(source)
+    lines = source.split("\n")
+    shared = {line for line, count in _own_lines(tree).items() if count > 1}
+    comments = _comment_rows(source)
+
+    blocks: List[List[ast.stmt]] = []
+    current: List[ast.stmt] = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and node.lineno not in shared and node.end_lineno not in shared:
+            between = range(current[-1].end_lineno + 1, node.lineno) if current else range(0)
+            if current and any(lines[row - 1].strip() for row in between):
+                blocks.append(current)
+                current = []
+            current.append(node)
+            continue
+        if current:
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+
+    changed = False
+    for block in reversed(blocks):
+        first, last = block[0].lineno, block[-1].end_lineno
+        if any(first <= row <= last for row in comments):
+            continue
+        rendered = _render_imports(block)
+        if rendered != lines[first - 1:last]:
+            lines[first - 1:last] = rendered
+            changed = True
+    if not changed:
+        return source, ["Imports were already sorted and grouped."], []
+    return "\n".join(lines), ["Sorted and grouped imports (standard library, third-party, local)."], []
+
+
+# --- Formatting ------------------------------------------------------------------------------
+
+def _string_rows(tokens: List[tokenize.TokenInfo]) -> Tuple[Set[int], Set[int]]:
+    # Rows starting inside a multi-line string (keep their indentation), and rows a string continues past (keep their end)
+    starts_inside, continues = set(), set()
+    for token in tokens:
+        if token.type == tokenize.STRING and token.start[0] != token.end[0]:
+            starts_inside.update(range(token.start[0] + 1, token.end[0] + 1))
+            continues.update(range(token.start[0], token.end[0]))
+    return starts_inside, continues
+
+
+def _width(whitespace: str) -> int:
+    return len(whitespace.expandtabs(8))
+
+
+def _ends_operand(token: Optional[tokenize.TokenInfo]) -> bool:
+    if token is None:
+        return False
+    if token.type == tokenize.NAME:
+        return not keyword.iskeyword(token.string) or token.string in ("True", "False", "None")
+    return token.type in (tokenize.NUMBER, tokenize.STRING) or token.string in CLOSING
+
+
+def _slice_colons(tokens: List[tokenize.TokenInfo]) -> Dict[int, bool]:
+    # Subscript colons -> spaced like a binary operator: only between two bounds, at least one of
+    # them complex (an operator or a call), as in x[a + 1 : b] but x[1:2] and x[n + 1:]
+    decisions: Dict[int, bool] = {}
+    frames: List[Dict] = [{"kind": None, "lambda": False}]
+    last: Optional[tokenize.TokenInfo] = None
+
+    def new_segment(frame: Dict) -> None:
+        frame["segments"].append({"tokens": False, "complex": False})
+
+    def resolve(frame: Dict) -> None:
+        segments = frame["segments"]
+        complex_bounds = any(segment["complex"] for segment in segments)
+        for i, colon in enumerate(frame["colons"]):
+            decisions[colon] = complex_bounds and segments[i]["tokens"] and segments[i + 1]["tokens"]
+        frame["segments"], frame["colons"] = [], []
+        new_segment(frame)
+
+    for token in tokens:
+        if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            frames = [{"kind": None, "lambda": False}]
+            last = None
+            continue
+        if token.type in (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT):
+            continue
+        frame = frames[-1]
+        string = token.string if token.type == tokenize.OP else None
+        if (string in BINARY_OPERATORS or string in SPACED_OPERATORS or string == "(") and _ends_operand(last):
+            for enclosing in frames:
+                if enclosing["kind"] == "[":
+                    enclosing["segments"][-1]["complex"] = True
+        if frame["kind"] == "[" and string == ":" and not frame["lambda"]:
+            frame["colons"].append(id(token))
+            new_segment(frame)
+        elif frame["kind"] == "[" and string in (",", "]"):
+            resolve(frame)
+        elif frame["kind"] == "[":
+            frame["segments"][-1]["tokens"] = True
+        if token.type == tokenize.NAME and token.string == "lambda":
+            frame["lambda"] = True
+        elif string == ":":
+            frame["lambda"] = False
+        elif string in OPENING:
+            frames.append({"kind": string, "lambda": False, "segments": [], "colons": []})
+            if string == "[":
+                new_segment(frames[-1])
+        elif string in CLOSING and len(frames) > 1:
+            frames.pop()
+        last = token
+    return decisions
+
+
+def _gap(prev: tokenize.TokenInfo, token: tokenize.TokenInfo, frame: Dict, spaced: Dict[int, bool],
+         original: str) -> str:
+    # Whitespace wanted between two tokens on one row; `spaced` holds the decisions for "=", operators
+    # and slice colons. Other colons (annotations, dicts, lambdas, blocks) take a space after only.
+    if token.type == tokenize.COMMENT:
+        return original if len(original) >= 2 else "  "
+    if prev.string in OPENING and prev.type == tokenize.OP:
+        return ""
+    if spaced.get(id(prev)):
+        return " "
+    if token.type == tokenize.OP:
+        if token.string in CLOSING or token.string in (",", ";"):
+            return ""
+        if token.string == ":" and id(token) not in spaced:
+            return ""
+        if token.string == ":" and prev.string == ",":  # x[1, :]
+            return " "
+        if token.string in ("(", "[") and (
+                (prev.type == tokenize.NAME and not keyword.iskeyword(prev.string) and not keyword.issoftkeyword(prev.string))
+                or prev.string in (")", "]")):
+            return ""
+        if id(token) in spaced and (spaced[id(token)] or token.string in ("=", ":")):
+            return " " if spaced[id(token)] else ""
+        if token.string in SPACED_OPERATORS:
+            return " "
+    if prev.type == tokenize.OP:
+        if prev.string in (",", ";") or (prev.string == ":" and id(prev) not in spaced):
+            return " "
+        if id(prev) in spaced:
+            if spaced[id(prev)]:
+                return " "
+            return "" if prev.string in ("=", "-", "+", "*", ":") else original[:1]
+        if prev.string in SPACED_OPERATORS:
+            return " "
+    return original[:1]  # Runs of spaces (def  f, return  1) collapse to one
+
+
+def _format_lines(source: str) -> Tuple[List[str], Set[str]]:
+    """Indentation and in-line spacing; rows are neither added nor removed."""
+    lines = source.split("\n")
+    tokens = list(tokenize.generate_tokens(io.StringIO(source).readline))
+    starts_inside, continues = _string_rows(tokens)
+    edits: List[Tuple[int, int, int, str]] = []
+    changes: Set[str] = set()
+
+    stack = [0]  # Original widths of the open indentation levels
+    pending_comments: List[Tuple[int, int, List[int]]] = []  # (row, width, stack when seen)
+    logical_start: Optional[Tuple[int, int]] = None  # (row, indentation delta) of the current logical line
+    frames = [{"depth": 0, "colon": False, "lambda": False}]
+    spaced: Dict[int, bool] = _slice_colons(tokens)
+    prev: Optional[tokenize.TokenInfo] = None
+    last: Optional[tokenize.TokenInfo] = None  # Previous token of the logical line, across rows
+    first_on_row: Set[int] = set()
+
+    def depth_for(width: int, levels: List[int]) -> int:
+        return sum(1 for level in levels if level <= width) - 1
+
+    for token in tokens:
+        kind = token.type
+        if kind == tokenize.INDENT:
+            stack.append(_width(token.string))
+            continue
+        if kind == tokenize.DEDENT:
+            stack.pop()
+            continue
+        if kind in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            logical_start = None
+            frames = [{"depth": 0, "colon": False, "lambda": False}]
+            prev = None
+            last = None
+            continue
+        if kind == tokenize.NL:
+            prev = None
+            continue
+        row, column = token.start
+        leading = lines[row - 1][:column]
+        if row not in first_on_row and not leading.strip():
+            first_on_row.add(row)
+            if row in starts_inside:
+                pass
+            elif logical_start is None and kind == tokenize.COMMENT:
+                pending_comments.append((row, _width(leading), list(stack)))
+            elif logical_start is None:
+                depth = len(stack) - 1
+                target = INDENT * depth
+                logical_start = (row, len(target) - _width(leading))
+                if leading != target:
+                    edits.append((row, 0, column, target))
+                    changes.add("indentation")
+                for comment_row, width, levels in pending_comments:
+                    comment_depth = max(depth_for(width, levels), depth_for(width, stack))
+                    comment_leading = lines[comment_row - 1][:len(lines[comment_row - 1]) - len(lines[comment_row - 1].lstrip())]
+                    if comment_leading != INDENT * comment_depth:
+                        edits.append((comment_row, 0, len(comment_leading), INDENT * comment_depth))
+                        changes.add("indentation")
+                pending_comments = []
+            else:
+                target = " " * max(0, _width(leading) + logical_start[1])
+                if leading != target:
+                    edits.append((row, 0, column, target))
+                    changes.add("indentation")
+        if kind == tokenize.COMMENT and logical_start is None:
+            prev = None
+            continue
+
+        frame = frames[-1]
+        if kind == tokenize.OP and token.string == "=":
+            if frame["lambda"]:
+                spaced[id(token)] = False
+            elif frame["depth"] == 0:
+                spaced[id(token)] = True
+            else:
+                spaced[id(token)] = frame["colon"] and frame["kind"] == "("
+        elif kind == tokenize.OP and token.string in BINARY_OPERATORS:
+            spaced[id(token)] = _ends_operand(last)
+        if prev is not None and prev.end[0] == row:
+            original = lines[row - 1][prev.end[1]:column]
+            if not original.strip():
+                wanted = _gap(prev, token, frame, spaced, original)
+                if wanted != original:
+                    edits.append((row, prev.end[1], column, wanted))
+                    changes.add("spacing")
+
+        if kind == tokenize.NAME and token.string == "lambda":
+            frame["lambda"] = True
+        elif kind == tokenize.OP:
+            if token.string in OPENING:
+                frames.append({"depth": frame["depth"] + 1, "kind": token.string, "colon": False, "lambda": False})
+            elif token.string in CLOSING and len(frames) > 1:
+                frames.pop()
+            elif token.string == ":":
+                if frame["lambda"]:
+                    frame["lambda"] = False
+                else:
+                    frame["colon"] = True
+            elif token.string == ",":
+                frame["colon"] = False
+        prev = token
+        if kind != tokenize.COMMENT:
+            last = token
+
+    for comment_row, width, levels in pending_comments:  # Comments at the end of the file
+        comment_leading = lines[comment_row - 1][:len(lines[comment_row - 1]) - len(lines[comment_row - 1].lstrip())]
+        target = INDENT * depth_for(width, levels)
+        if comment_leading != target:
+            edits.append((comment_row, 0, len(comment_leading), target))
+            changes.add("indentation")
+
+    lines = _splice(lines, edits)
+    for i, line in enumerate(lines):
+        if i + 1 not in continues and line != line.rstrip():
+            lines[i] = line.rstrip()
+            changes.add("trailing whitespace")
+    return lines, changes
+
+
+def _blank_line_rules(tree: ast.Module, lines: List[str], protected: Set[int]) -> Dict[int, int]:
+    # First row of a statement (its decorators and the comments right above it) -> blank lines wanted before it
+    wanted: Dict[int, int] = {}
+
+    def anchor(node: ast.stmt) -> int:
+        row = _first_line(node)
+        while row > 1 and lines[row - 2].strip().startswith("#") and row - 1 not in protected:
+            row -= 1
+        return row
+
+    def visit(statements: List[ast.stmt], top_level: bool) -> None:
+        for i, node in enumerate(statements):
+            is_definition = isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            after_definition = i > 0 and isinstance(statements[i - 1], (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            if i == 0:
+                if top_level:
+                    wanted[anchor(node)] = 0
+            elif top_level and (is_definition or after_definition):
+                wanted[anchor(node)] = 2
+            elif not top_level and is_definition:
+                wanted[anchor(node)] = 1
+            if is_definition:
+                visit(node.body, False)
+
+    visit(tree.body, True)
+    return wanted
+
+
+def format_code(source: str) -> Tuple[str, List[str], List[str]]:
+    """
+    PEP 8 layout that doesn't change the syntax tree: 4-space indentation, single spaces
+    around assignments, comparisons, binary operators (except **) and after commas, none
+    inside brackets, before a call's parenthesis or after a unary operator, no runs of
+    spaces between tokens, two before inline comments, two blank lines around top-level
+    definitions and one between methods, no trailing whitespace. Annotations read `a: int`
+    and `a: int = 1`, unannotated defaults and keywords `a=1`. Slice colons are spaced
+    like an operator only between two bounds of which one is complex (x[1:2], x[n + 1:],
+    x[a + 1 : b]). Strings are never touched and long lines are not wrapped.
+    """
+    lines, changes = _format_lines(source)
+    text = "\n".join(lines)
+    tree = ast.parse(text)
+    tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+    starts_inside, continues = _string_rows(tokens)
+    protected = starts_inside | continues
+    wanted = _blank_line_rules(tree, lines, protected)
+
+    output: List[str] = []
+    blank_run = 0
+    nested = False
+    for row, line in enumerate(lines, start=1):
+        if not line.strip() and row not in protected:
+            blank_run += 1
+            continue
+        if row in wanted:
+            keep = wanted[row]
+        elif row in starts_inside:
+            keep = blank_run
+        else:
+            nested = bool(line[:1].isspace())
+            keep = min(blank_run, 1 if nested else 2)
+        if not output:
+            keep = 0
+        if keep != blank_run:
+            changes.add("blank lines")
+        output.extend([""] * keep)
+        output.append(line)
+        blank_run = 0
+    if blank_run > 1 or (lines and lines[-1].strip()):
+        changes.add("blank lines")
+    formatted = "\n".join(output) + "\n"
+
+    if ast.dump(ast.parse(formatted)) != ast.dump(ast.parse(source)):
+        return source, ["Formatting was skipped: it would have changed the code's meaning."], []
+    descriptions = {
+        "indentation": "Normalized indentation to 4 spaces.",
+        "spacing": "Normalized spacing around operators, commas, brackets and comments.",
+        "blank lines": "Normalized blank lines around definitions.",
+        "trailing whitespace": "Removed trailing whitespace.",
+    }
+    summary = [description for change, description in descriptions.items() if change in changes]
+    return formatted, summary or ["Formatting already follows PEP 8 layout."], []
+
+
+TRANSFORMS = {
+    "dead_code": remove_dead_code,
+    "dry": extract_duplicated_literals,
+    "imports": sort_imports,
+    "format": format_code,
+}
+
+
+def refactor_python(code: str, goals: Sequence[str]) -> Optional[LocalRefactor]:
+    """
+    Apply the goals that are mechanical for Python code (see LOCAL_GOALS) without a model.
+    Returns None when the code doesn't parse or no goal can be handled here. A DRY goal
+    with no duplicated literals to extract is left for the model (duplicated logic).
+
+    Every transform's output must compile (or, for a fragment that doesn't compile on its
+    own, e.g. a `return` outside a function, at least parse), else its goal goes to the model.
+    Each transform returns the code, its summary and warnings about what it left alone.
+    """
+    requested: Dict[str, List[str]] = {}
+    remaining = []
+    for goal in goals:
+        local = local_goal(goal)
+        if local is None:
+            remaining.append(goal)
+        else:
+            requested.setdefault(local, []).append(goal)
+    if not requested:
+        return None
+    newline = "\r\n" if "\r\n" in code else "\n"
+    source = code.replace("\r\n", "\n")
+    try:
+        ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    try:
+        compile(source, "<refactor>", "exec", dont_inherit=True)
+        check = lambda text: compile(text, "<refactor>", "exec", dont_inherit=True)
+    except (SyntaxError, ValueError):
+        check = ast.parse
+
+    summary: List[str] = []
+    warnings: List[str] = []
+    for goal in GOAL_ORDER:
+        if goal not in requested:
+            continue
+        try:
+            changed, notes, warned = TRANSFORMS[goal](source)
+            check(changed)
+        except (SyntaxError, ValueError, tokenize.TokenError) as e:  # A transform bug must not break the code
+            print(f"Local refactoring '{goal}' failed: {e}")
+            remaining.extend(requested[goal])
+            continue
+        if goal == "dry" and not notes:
+            remaining.extend(requested[goal])
+            continue
+        source = changed
+        summary.extend(notes)
+        warnings.extend(warned)
+    if len(remaining) == len(goals):
+        return None
+    return LocalRefactor(
+        code=source.replace("\n", newline), summary=summary, remaining_goals=remaining, warnings=warnings
+    )
@@ -1,6 +1,7 @@
 # backend/app/services/payment_service.py
 from backend.app.models.subscription import SubscribeRequest, PlanName, PLANS_DETAILS
-from backend.app.models.user import User, db_users # For updating user subscription
+from backend.app.models.user import User, SubscriptionPlan
+from backend.app.db.user_repository import user_repository # For updating user subscription
 from backend.app.core.config import settings
 from datetime import datetime, timedelta, timezone
 
@@ -67,11 +68,13 @@ class PaymentService:
 
     async def update_user_subscription(self, user_id: int, plan_id: PlanName, is_yearly: bool):
         # This would update the user's record in a real database
-        user_in_db = db_users.get(user_id)
+        expiry_duration = timedelta(days=365) if is_yearly else timedelta(days=30)
+        user_in_db = await user_repository.update_subscription(
+            user_id,
+            plan=SubscriptionPlan(plan_id.value.lower()),  # PlanName "Pro" -> SubscriptionPlan "pro"
+            expires_at=datetime.now(timezone.utc) + expiry_duration
+        )
         if user_in_db:
-            user_in_db.subscription_plan = plan_id
-            expiry_duration = timedelta(days=365) if is_yearly else timedelta(days=30)
-            user_in_db.subscription_expires_at = datetime.now(timezone.utc) + expiry_duration
             print(f"User {user_id} subscription updated to {plan_id.value}, expires {user_in_db.subscription_expires_at}")
             return True
         return False
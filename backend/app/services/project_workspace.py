@@ -0,0 +1,568 @@
+# backend/app/services/project_workspace.py
+import asyncio
+import io
+import os
+import posixpath
+import re
+import secrets
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.app.core.config import settings
+from backend.app.models.project import ProjectIndexUpdate, ProjectInfo
+from backend.app.models.user import User
+from backend.app.services.retrieval_index import Chunk, PreparedFile, RetrievalIndex
+from backend.app.services.symbol_index import (
+    Definition, FileSymbols, SymbolIndex, block_end, content_digest, mentions, parse_file
+)
+
+# Directories of version control metadata, dependencies and caches, never worth indexing
+IGNORED_DIRECTORIES = frozenset({
+    ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".mypy_cache", ".pytest_cache", ".tox",
+})
+NAME_PATTERN = re.compile(r"[A-Za-z_$][\w$]{2,}")  # Names in a request worth looking up
+MAX_DEFINITIONS_PER_NAME = 8  # A name defined more often than this (e.g. "__init__") says nothing useful
+
+PROJECT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    owner_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    symbols INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_owner ON projects (owner_id, created_at);
+CREATE TABLE IF NOT EXISTS project_files (
+    project_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (project_id, path)
+);
+"""
+# `version` counts a project's changes; each file row holds the version that last wrote it
+INSERT_PROJECT = """
+INSERT INTO projects (id, owner_id, name, version, files, symbols, size_bytes, created_at, updated_at)
+VALUES (?, ?, ?, 0, 0, 0, 0, ?, ?)
+"""
+SELECT_PROJECT = "SELECT owner_id, name, version, created_at, updated_at FROM projects WHERE id = ?"
+SELECT_USER_PROJECTS = """
+SELECT id, name, files, symbols, size_bytes, created_at, updated_at FROM projects WHERE owner_id = ? ORDER BY created_at
+"""
+COUNT_USER_PROJECTS = "SELECT count(*) FROM projects WHERE owner_id = ?"
+SELECT_VERSION = "SELECT version FROM projects WHERE id = ?"
+SELECT_CHANGED_FILES = "SELECT path, content FROM project_files WHERE project_id = ? AND version > ?"
+SELECT_PATHS = "SELECT path FROM project_files WHERE project_id = ?"
+UPSERT_FILE = "INSERT OR REPLACE INTO project_files (project_id, path, content, version) VALUES (?, ?, ?, ?)"
+DELETE_FILE = "DELETE FROM project_files WHERE project_id = ? AND path = ?"
+UPDATE_PROJECT = """
+UPDATE projects SET version = ?, files = ?, symbols = ?, size_bytes = ?, updated_at = ? WHERE id = ?
+"""
+DELETE_PROJECT = "DELETE FROM projects WHERE id = ?"
+DELETE_PROJECT_FILES = "DELETE FROM project_files WHERE project_id = ?"
+
+
+def _used_as_code(text: str, match: "re.Match") -> bool:
+    # A plain lowercase word ("cancel") in a prompt is English unless it's called or accessed as an attribute
+    name = match.group()
+    if not name.islower() or not name.isalpha():
+        return True
+    return text[match.end():match.end() + 1] == "(" or text[match.start() - 1:match.start()] == "."
+
+
+class ProjectNotFoundError(LookupError):
+    """Raised for a project id that doesn't exist or belongs to another user."""
+
+
+class ProjectLimitError(ValueError):
+    """Raised when an upload would exceed the project count, file count or size limits."""
+
+
+def normalize_path(path: str) -> Optional[str]:
+    # Relative "/"-separated path inside the project, or None if it points outside or into an ignored directory
+    path = posixpath.normpath(path.replace("\\", "/")).lstrip("/") if path else ""
+    parts = path.split("/")
+    if path in ("", ".") or ".." in parts or IGNORED_DIRECTORIES.intersection(parts):
+        return None
+    return path
+
+
+def _decode(data: bytes) -> Optional[str]:
+    if b"\x00" in data[:8192]:
+        return None  # Binary
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def read_archive(data: bytes, max_file_bytes: int, max_total_bytes: int) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Text files of a zip or tar (optionally compressed) archive, by path, and the paths
+    skipped (binary, too large, outside the archive root). A single top-level directory,
+    as in GitHub source archives, is stripped. Sizes are checked before decompressing.
+    """
+    members: List[Tuple[str, int, Callable[[], bytes]]]
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        members = [(info.filename, info.file_size, lambda info=info: archive.read(info))
+                   for info in archive.infolist() if not info.is_dir()]
+    else:
+        try:
+            archive = tarfile.open(fileobj=io.BytesIO(data), mode="r:*")
+        except tarfile.TarError as e:
+            raise ProjectLimitError("Upload a zip or tar archive.") from e
+        members = [(info.name, info.size, lambda info=info: archive.extractfile(info).read())
+                   for info in archive.getmembers() if info.isfile()]  # Links and devices are ignored
+
+    roots = {name.replace("\\", "/").lstrip("/").split("/", 1)[0] for name, _, _ in members}
+    strip_root = len(roots) == 1 and all("/" in name.replace("\\", "/").lstrip("/") for name, _, _ in members)
+
+    files: Dict[str, str] = {}
+    skipped: List[str] = []
+    total = 0
+    for name, size, read in members:
+        if strip_root:
+            name = name.replace("\\", "/").lstrip("/").split("/", 1)[1]
+        path = normalize_path(name)
+        if path is None:
+            continue
+        if size > max_file_bytes:
+            skipped.append(path)
+            continue
+        total += size
+        if total > max_total_bytes:
+            raise ProjectLimitError(f"The archive holds more than {max_total_bytes} bytes of files.")
+        text = _decode(read())
+        if text is None:
+            skipped.append(path)
+            continue
+        files[path] = text
+    return files, skipped
+
+
+def _index_changed(
+        index: SymbolIndex, retrieval: Optional[RetrievalIndex], files: Dict[str, str]
+) -> Tuple[List[FileSymbols], int, Dict[str, PreparedFile]]:
+    # Runs in a worker thread; only reads the indexes, which are only changed on the event loop
+    parsed = []
+    unchanged = 0
+    for path, content in files.items():
+        digest = content_digest(content)
+        if index.needs_parse(path, digest):
+            parsed.append(parse_file(path, content, digest))
+        else:
+            unchanged += 1
+    prepared = {}
+    if retrieval is not None:
+        for symbols in parsed:
+            prepared[symbols.path] = retrieval.prepare(
+                symbols.path, files[symbols.path], [definition.line for definition in symbols.definitions]
+            )
+    return parsed, unchanged, prepared
+
+
+def _symbols_after(index: SymbolIndex, parsed: List[FileSymbols], removed: List[str]) -> int:
+    replaced = {symbols.path for symbols in parsed}.union(removed)
+    return (index.symbol_count + sum(len(symbols.definitions) for symbols in parsed)
+            - sum(len(index.files[path].definitions) for path in replaced if path in index.files))
+
+
+def _timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def _prepare_all(index: SymbolIndex, retrieval: RetrievalIndex, files: Dict[str, str]) -> Dict[str, PreparedFile]:
+    return {
+        path: retrieval.prepare(path, content, [definition.line for definition in index.files[path].definitions])
+        for path, content in files.items()
+    }
+
+
+class ProjectWorkspace:
+    def __init__(self, project_id: str, owner_id: int, name: str, created_at: Optional[datetime] = None):
+        self.id = project_id
+        self.owner_id = owner_id
+        self.name = name
+        self.version = 0  # Of the stored project, as far as loaded here
+        self.files: Dict[str, str] = {}
+        self.size_bytes = 0
+        self.index = SymbolIndex()
+        self._lines: Dict[str, List[str]] = {}  # Split files, for reading definitions back
+        self.retrieval: Optional[RetrievalIndex] = None  # Chunk embeddings, built for full project understanding
+        self.created_at = self.updated_at = created_at or datetime.now(timezone.utc)
+        self.lock = asyncio.Lock()  # One upload (or reload) at a time; readers never wait for it
+
+    def info(self) -> ProjectInfo:
+        return ProjectInfo(
+            id=self.id,
+            name=self.name,
+            files=len(self.files),
+            symbols=self.index.symbol_count,
+            size_bytes=self.size_bytes,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
+
+    def apply(
+            self,
+            parsed: List[FileSymbols],
+            removed: List[str],
+            files: Dict[str, str],
+            size_bytes: int,
+            prepared: Dict[str, PreparedFile],
+    ) -> None:
+        self.index.apply(parsed, removed)
+        if self.retrieval is not None:
+            self.retrieval.apply(prepared, removed)
+        for path in removed:
+            del self.files[path]
+            self._lines.pop(path, None)
+        for path in files:
+            self._lines.pop(path, None)
+        self.files.update(files)
+        self.size_bytes = size_bytes
+        self.updated_at = datetime.now(timezone.utc)
+
+    def _file_lines(self, path: str) -> List[str]:
+        lines = self._lines.get(path)
+        if lines is None:
+            lines = self._lines[path] = self.files[path].split("\n")
+        return lines
+
+    def end_line(self, definition: Definition) -> int:
+        return block_end(self._file_lines(definition.path), definition.line - 1) + 1
+
+    def source(self, definition: Definition) -> str:
+        lines = self._file_lines(definition.path)
+        return "\n".join(lines[definition.line - 1:block_end(lines, definition.line - 1) + 1])
+
+    def chunk_source(self, chunk: Chunk) -> str:
+        return "\n".join(self._file_lines(chunk.path)[chunk.start_line - 1:chunk.end_line])
+
+    def referenced_in(self, name: str) -> List[str]:
+        # Scanned on demand (a substring test first): cheaper than keeping a reference map current
+        pattern = mentions(name)
+        return sorted(path for path, content in self.files.items() if name in content and pattern.search(content))
+
+    def relevant(self, text: str) -> List[Definition]:
+        """
+        Definitions of the names used in `text`, most mentioned names first (plain lowercase
+        words only when they read as code: called or accessed as attributes). Among several
+        definitions of one name, those in files mentioning more of the other names go first.
+        """
+        definitions = self.index.definitions
+        counts = Counter(
+            match.group() for match in NAME_PATTERN.finditer(text)
+            if 0 < len(definitions.get(match.group(), ())) <= MAX_DEFINITIONS_PER_NAME and _used_as_code(text, match)
+        )
+        names = list(counts)
+        ranked = []
+        for name, _ in counts.most_common():
+            candidates = definitions[name]
+            if len(candidates) > 1:
+                candidates = sorted(candidates, key=lambda d: -sum(other in self.files[d.path] for other in names))
+            ranked.extend(candidates)
+        return ranked
+
+
+class ProjectStore:
+    """
+    Users' project workspaces: uploaded source files plus their symbol index. Projects and
+    their files are stored in a SQLite file (`path`; in memory if None) shared by all
+    worker processes and kept across restarts; each process holds the `max_loaded` workspaces
+    it served most recently, with their indexes. A workspace is built on first use (again
+    after it was evicted) and brought up to date
+    on each use if another process changed the project since (only the files it wrote
+    are read and parsed again). An upload only re-parses files whose content hash
+    changed; parsing runs in a worker thread so the event loop keeps serving requests.
+
+    Projects used for full project understanding also get a retrieval index (chunk
+    embeddings in a memory-mapped file in this process's directory under `retrieval_dir`),
+    built on first use and then updated with each change, for the changed files only.
+    """
+
+    def __init__(
+            self,
+            max_projects_per_user: int,
+            max_files: int,
+            max_file_bytes: int,
+            max_bytes: int,
+            retrieval_dir: Optional[str] = None,
+            retrieval_dimensions: int = 128,
+            chunk_max_lines: int = 40,
+            path: Optional[str] = None,
+            max_loaded: int = 100,
+    ):
+        self.max_projects_per_user = max_projects_per_user
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.max_bytes = max_bytes
+        self.retrieval_dir = retrieval_dir
+        self.retrieval_dimensions = retrieval_dimensions
+        self.chunk_max_lines = chunk_max_lines
+        self.max_loaded = max_loaded
+        self._vectors_dir: Optional[str] = None
+        self._projects: "OrderedDict[str, ProjectWorkspace]" = OrderedDict()  # Loaded in this process, LRU first
+        self._db = sqlite3.connect(path or ":memory:", timeout=5, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(PROJECT_SCHEMA)
+
+    async def create(self, user: User, name: str) -> ProjectWorkspace:
+        project = ProjectWorkspace(secrets.token_urlsafe(12), user.id, name)
+        await asyncio.to_thread(self._insert, project)
+        self._load(project)
+        return project
+
+    async def get(self, project_id: str, user: User) -> ProjectWorkspace:
+        """The project, with the changes made through other processes since its last use here."""
+        row = await asyncio.to_thread(self._fetch, SELECT_PROJECT, (project_id,))
+        if row is None:
+            self._forget(project_id)  # Deleted through another process
+        if row is None or row[0] != user.id:
+            raise ProjectNotFoundError(project_id)
+        owner_id, name, version, created_at, updated_at = row
+        project = self._projects.get(project_id)
+        if project is None:
+            project = ProjectWorkspace(project_id, owner_id, name, _timestamp(created_at))
+        self._load(project)
+        if project.version != version:
+            await self._reload(project)
+            project.updated_at = _timestamp(updated_at)
+        return project
+
+    async def list(self, user: User) -> List[ProjectInfo]:
+        rows = await asyncio.to_thread(self._fetch_all, SELECT_USER_PROJECTS, (user.id,))
+        return [
+            ProjectInfo(
+                id=project_id, name=name, files=files, symbols=symbols, size_bytes=size_bytes,
+                created_at=_timestamp(created_at), updated_at=_timestamp(updated_at),
+            )
+            for project_id, name, files, symbols, size_bytes, created_at, updated_at in rows
+        ]
+
+    async def delete(self, project_id: str, user: User) -> None:
+        project = await self.get(project_id, user)
+        await asyncio.to_thread(self._delete, project.id)
+        self._forget(project.id)
+
+    def _load(self, project: ProjectWorkspace) -> None:
+        self._projects[project.id] = project
+        self._projects.move_to_end(project.id)
+        # Evict the least recently used; ones being updated or reloaded stay until that is done
+        for project_id in list(self._projects):
+            if len(self._projects) <= self.max_loaded:
+                break
+            if project_id != project.id and not self._projects[project_id].lock.locked():
+                self._forget(project_id)
+
+    def _forget(self, project_id: str) -> None:
+        project = self._projects.pop(project_id, None)
+        if project is not None and project.retrieval is not None:
+            # A request still holding the workspace builds a new index if it searches again
+            retrieval, project.retrieval = project.retrieval, None
+            retrieval.close()
+
+    async def _reload(self, project: ProjectWorkspace) -> None:
+        async with project.lock:
+            version, changed, paths = await asyncio.to_thread(self._changes_since, project.id, project.version)
+            if version == project.version:  # Reloaded while we waited for the lock
+                return
+            removed = [path for path in project.files if path not in paths]
+            parsed, _, prepared = await asyncio.to_thread(_index_changed, project.index, project.retrieval, changed)
+            size = sum(len(changed[path]) if path in changed else len(project.files[path]) for path in paths)
+            project.apply(parsed, removed, changed, size, prepared)
+            project.version = version
+
+    async def retrieve(self, project: ProjectWorkspace, text: str, k: int) -> List[Tuple[Chunk, float]]:
+        """The `k` chunks of `project` most similar to `text`, building its retrieval index if needed."""
+        if project.retrieval is None:
+            await self.enable_retrieval(project)
+        return await project.retrieval.search(text, k)
+
+    async def enable_retrieval(self, project: ProjectWorkspace) -> None:
+        async with project.lock:
+            if project.retrieval is not None:
+                return
+            if self._vectors_dir is None:
+                if self.retrieval_dir is not None:
+                    os.makedirs(self.retrieval_dir, exist_ok=True)
+                # A directory of this process's own: every worker process maps its own vectors of a project
+                self._vectors_dir = tempfile.mkdtemp(prefix="project-embeddings-", dir=self.retrieval_dir)
+            # Unique per build: an evicted workspace and its reloaded successor never share a file
+            path = os.path.join(self._vectors_dir, f"{project.id}-{secrets.token_hex(4)}.f32")
+            retrieval = RetrievalIndex(path, self.retrieval_dimensions, self.chunk_max_lines)
+            prepared = await asyncio.to_thread(_prepare_all, project.index, retrieval, dict(project.files))
+            retrieval.apply(prepared)
+            project.retrieval = retrieval
+
+    def close(self) -> None:
+        for project in self._projects.values():
+            if project.retrieval is not None:
+                project.retrieval.close()
+        if self._vectors_dir is not None:
+            shutil.rmtree(self._vectors_dir, ignore_errors=True)
+        with self._db_lock:
+            self._db.close()
+
+    async def update(
+            self,
+            project: ProjectWorkspace,
+            files: Dict[str, str],
+            deleted: Iterable[str] = (),
+            replace: bool = False,
+            skipped: Optional[List[str]] = None,
+    ) -> ProjectIndexUpdate:
+        """
+        Add or replace `files` (path -> content) and remove `deleted`; with `replace`, every
+        file not in `files` is removed too (the upload is the whole project).
+        """
+        started = time.perf_counter()
+        skipped = list(skipped or [])
+        accepted: Dict[str, str] = {}
+        for path, content in files.items():
+            normalized = normalize_path(path)
+            if normalized is None or len(content) > self.max_file_bytes:
+                skipped.append(path)
+            else:
+                accepted[normalized] = content
+
+        async with project.lock:
+            if replace:
+                removed = [path for path in project.files if path not in accepted]
+            else:
+                removed = [path for path in {normalize_path(path) for path in deleted}
+                           if path in project.files and path not in accepted]
+            remaining = set(project.files).difference(removed).union(accepted)
+            if len(remaining) > self.max_files:
+                raise ProjectLimitError(f"A project can have at most {self.max_files} files.")
+            size = sum(len(accepted[path]) if path in accepted else len(project.files[path]) for path in remaining)
+            if size > self.max_bytes:
+                raise ProjectLimitError(f"A project can hold at most {self.max_bytes} bytes of source.")
+
+            parsed, unchanged, prepared = await asyncio.to_thread(
+                _index_changed, project.index, project.retrieval, accepted
+            )
+            # Stored first, so this process never serves files other processes can't see
+            written = {symbols.path: accepted[symbols.path] for symbols in parsed}
+            symbol_count = _symbols_after(project.index, parsed, removed)
+            now = time.time()
+            project.version = await asyncio.to_thread(
+                self._store, project, written, removed, len(remaining), symbol_count, size, now
+            )
+            project.apply(parsed, removed, accepted, size, prepared)
+            project.updated_at = _timestamp(now)
+
+        return ProjectIndexUpdate(
+            project=project.info(),
+            parsed=len(parsed),
+            unchanged=unchanged,
+            removed=len(removed),
+            skipped=skipped,
+            seconds=round(time.perf_counter() - started, 4),
+        )
+
+    async def update_from_archive(self, project: ProjectWorkspace, data: bytes, replace: bool = True) -> ProjectIndexUpdate:
+        files, skipped = await asyncio.to_thread(read_archive, data, self.max_file_bytes, self.max_bytes)
+        return await self.update(project, files, replace=replace, skipped=skipped)
+
+    def _insert(self, project: ProjectWorkspace) -> None:
+        now = project.created_at.timestamp()
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")  # The count and the insert, with no other process's create between
+            try:
+                (count,) = self._db.execute(COUNT_USER_PROJECTS, (project.owner_id,)).fetchone()
+                if count >= self.max_projects_per_user:
+                    raise ProjectLimitError(f"You can have at most {self.max_projects_per_user} projects.")
+                self._db.execute(INSERT_PROJECT, (project.id, project.owner_id, project.name, now, now))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _changes_since(self, project_id: str, version: int) -> Tuple[int, Dict[str, str], Set[str]]:
+        with self._db_lock:
+            self._db.execute("BEGIN")  # One snapshot for the three reads
+            try:
+                row = self._db.execute(SELECT_VERSION, (project_id,)).fetchone()
+                changed = dict(self._db.execute(SELECT_CHANGED_FILES, (project_id, version)).fetchall())
+                paths = {path for (path,) in self._db.execute(SELECT_PATHS, (project_id,))}
+            finally:
+                self._db.execute("COMMIT")
+        if row is None:
+            raise ProjectNotFoundError(project_id)
+        return row[0], changed, paths
+
+    def _store(
+            self,
+            project: ProjectWorkspace,
+            written: Dict[str, str],
+            removed: List[str],
+            files: int,
+            symbols: int,
+            size: int,
+            now: float,
+    ) -> int:
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(SELECT_VERSION, (project.id,)).fetchone()
+                if row is None:
+                    raise ProjectNotFoundError(project.id)
+                version = row[0] + 1
+                self._db.executemany(UPSERT_FILE, ((project.id, path, content, version) for path, content in written.items()))
+                self._db.executemany(DELETE_FILE, ((project.id, path) for path in removed))
+                self._db.execute(UPDATE_PROJECT, (version, files, symbols, size, now, project.id))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        # If another process changed the project in between, its changes are loaded on next use
+        return version if row[0] == project.version else project.version
+
+    def _delete(self, project_id: str) -> None:
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(DELETE_PROJECT_FILES, (project_id,))
+                self._db.execute(DELETE_PROJECT, (project_id,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _fetch(self, statement: str, parameters: Tuple) -> Optional[Tuple]:
+        with self._db_lock:
+            return self._db.execute(statement, parameters).fetchone()
+
+    def _fetch_all(self, statement: str, parameters: Tuple) -> List[Tuple]:
+        with self._db_lock:
+            return self._db.execute(statement, parameters).fetchall()
+
+
+project_store = ProjectStore(
+    max_projects_per_user=settings.PROJECT_MAX_PER_USER,
+    max_files=settings.PROJECT_MAX_FILES,
+    max_file_bytes=settings.PROJECT_MAX_FILE_BYTES,
+    max_bytes=settings.PROJECT_MAX_BYTES,
+    retrieval_dir=settings.PROJECT_RETRIEVAL_DIR,
+    retrieval_dimensions=settings.PROJECT_RETRIEVAL_DIMENSIONS,
+    chunk_max_lines=settings.PROJECT_CHUNK_MAX_LINES,
+    path=settings.PROJECT_DB_PATH,
+    max_loaded=settings.PROJECT_MAX_LOADED,
+)
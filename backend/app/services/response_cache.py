@@ -0,0 +1,179 @@
+# backend/app/services/response_cache.py
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from backend.app.core.config import settings
+
+# Each cache has a table of its own in the shared file, so it only ever prunes its own entries
+DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at);
+"""
+SELECT_RESPONSE = "SELECT value, expires_at FROM {table} WHERE key = ? AND expires_at > ?"
+UPSERT_RESPONSE = "INSERT OR REPLACE INTO {table} (key, value, expires_at) VALUES (?, ?, ?)"
+DELETE_EXPIRED = "DELETE FROM {table} WHERE expires_at <= ?"
+DELETE_OLDEST = """
+DELETE FROM {table} WHERE key IN (
+    SELECT key FROM {table} ORDER BY expires_at
+    LIMIT max(0, (SELECT count(*) FROM {table}) - ?)
+)
+"""
+PRUNE_EVERY = 1000  # Disk puts between prunes
+
+
+def normalize_code(code: str) -> str:
+    # Line endings, trailing whitespace and surrounding blank lines don't change the answer
+    return "\n".join(line.rstrip() for line in code.replace("\r\n", "\n").split("\n")).strip("\n")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def cache_key(operation: str, fields: Dict[str, Any]) -> str:
+    canonical = json.dumps([operation, fields], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache of code assistant responses, keyed by `cache_key()` of a normalized
+    request. Entries expire `ttl` seconds after they are stored. The in-process tier is a
+    bounded LRU; the optional disk tier is a SQLite file shared by all workers, so one
+    worker's answer can serve the others. Disk hits are promoted into memory. Caches that
+    share a disk file must use different `table` names.
+    """
+
+    def __init__(
+            self,
+            max_entries: int,
+            ttl: float,
+            disk_path: Optional[str] = None,
+            disk_max_entries: int = 100000,
+            table: str = "responses",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_max_entries = disk_max_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self._disk_puts = 0
+        self._select = SELECT_RESPONSE.format(table=table)
+        self._upsert = UPSERT_RESPONSE.format(table=table)
+        self._delete_expired = DELETE_EXPIRED.format(table=table)
+        self._delete_oldest = DELETE_OLDEST.format(table=table)
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")  # A lost cache write only costs a model call
+            self._disk.executescript(DISK_SCHEMA.format(table=table))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self._disk is not None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            del self._entries[key]
+
+        if self._disk is not None:
+            try:
+                row = await asyncio.to_thread(self._disk_get, key, now)
+            except sqlite3.Error as e:  # e.g. locked by another worker; treat as a miss
+                print(f"Response cache disk read failed: {e}")
+                row = None
+            if row is not None:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk_put, key, json.dumps(value, separators=(",", ":")), expires_at)
+            except sqlite3.Error as e:
+                print(f"Response cache disk write failed: {e}")
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def close(self) -> None:
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.close()
+            self._disk = None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        with self._disk_lock:
+            return self._disk.execute(self._select, (key, now)).fetchone()
+
+    def _disk_put(self, key: str, value: str, expires_at: float) -> None:
+        with self._disk_lock:
+            self._disk.execute(self._upsert, (key, value, expires_at))
+            self._disk_puts += 1
+            if self._disk_puts % PRUNE_EVERY == 0:
+                self._disk.execute(self._delete_expired, (time.time(),))
+                self._disk.execute(self._delete_oldest, (self.disk_max_entries,))
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    disk_path=settings.RESPONSE_CACHE_DISK_PATH,
+    disk_max_entries=settings.RESPONSE_CACHE_DISK_MAX_ENTRIES,
+)
+
+# Code that refactor follow-ups can name by hash instead of sending it again
+refactor_bases = ResponseCache(
+    max_entries=settings.REFACTOR_BASE_MAX_ENTRIES,
+    ttl=settings.REFACTOR_BASE_TTL_SECONDS,
+    disk_path=settings.RESPONSE_CACHE_DISK_PATH,
+    disk_max_entries=settings.RESPONSE_CACHE_DISK_MAX_ENTRIES,
+    table="refactor_bases",
+)
@@ -0,0 +1,216 @@
+# backend/app/services/retrieval_index.py
+import asyncio
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.services.micro_batcher import MicroBatcher
+from backend.app.services.semantic_cache import stem
+
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+SUBWORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")  # parseHTTPResponse -> parse, HTTP, Response
+# Keywords and names common to nearly every chunk, which would only add noise
+CODE_STOPWORDS = frozenset(
+    "def class return self this if else elif for while in is not and or none null true false import from as "
+    "const let var function new public private protected static void int str string the a an to of"
+    .split()
+)
+SEARCH_BLOCK_ROWS = 65536  # Rows scored per matrix product, bounding the temporary score matrix
+
+
+class Chunk(NamedTuple):
+    path: str
+    start_line: int  # 1-based, inclusive
+    end_line: int
+
+
+def chunk_lines(content: str, boundaries: Iterable[int], max_lines: int) -> List[Tuple[int, int]]:
+    """
+    Split a file into (start_line, end_line) chunks of at most `max_lines`, cutting at
+    `boundaries` (definition first lines) when the current chunk is at least a quarter full,
+    so chunks mostly hold whole definitions. Blank-only chunks are dropped.
+    """
+    lines = content.split("\n")
+    cuts = set(boundaries)
+    min_lines = max(1, max_lines // 4)
+    chunks = []
+    start = 1
+    for line in range(2, len(lines) + 1):
+        size = line - start
+        if size >= max_lines or (line in cuts and size >= min_lines):
+            chunks.append((start, line - 1))
+            start = line
+    chunks.append((start, len(lines)))
+    return [(first, last) for first, last in chunks if any(lines[i].strip() for i in range(first - 1, last))]
+
+
+def name_features(name: str) -> List[Tuple[str, float]]:
+    # An identifier counts whole and, if compound, as its stemmed sub-words at half weight
+    lowered = name.lower()
+    if lowered in CODE_STOPWORDS or len(name) < 2:
+        return []
+    parts = [stem(part.lower()) for part in SUBWORD_PATTERN.findall(name)]
+    if len(parts) <= 1:
+        return [(stem(lowered), 1.0)]
+    return [(lowered, 1.0)] + [(part, 0.5) for part in parts if part not in CODE_STOPWORDS]
+
+
+class CodeEmbedder:
+    """
+    Hashed bag-of-names embedding for code and prompts: each identifier counts whole and
+    split into stemmed sub-words (snake_case and camelCase), so "apply_discount" in code
+    and "discounts" in a prompt share a dimension. Rows are L2-normalized. Identifiers
+    repeat a lot across a project, so the hashed slots of each one are cached.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self._slots = lru_cache(maxsize=1 << 18)(self._name_slots)
+
+    def _name_slots(self, name: str) -> Tuple[Tuple[int, float], ...]:
+        slots = []
+        for feature, weight in name_features(name):
+            h = zlib.crc32(feature.encode("utf-8"))
+            slots.append((h % self.dimensions, weight if h & 0x80000000 else -weight))
+        return tuple(slots)
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        rows, columns, weights = [], [], []
+        slots = self._slots
+        for row, text in enumerate(texts):
+            for name in NAME_PATTERN.findall(text):
+                for column, weight in slots(name):
+                    rows.append(row)
+                    columns.append(column)
+                    weights.append(weight)
+        np.add.at(matrix, (rows, columns), weights)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class PreparedFile(NamedTuple):
+    chunks: List[Chunk]
+    vectors: np.ndarray  # One row per chunk
+
+
+class RetrievalIndex:
+    """
+    Embedding index over a project's chunks. Vectors are rows of a float32 matrix in a
+    memory-mapped file (grown by doubling), so large projects live in the page cache
+    rather than on the heap. Rows freed by changed or deleted files are reused.
+
+    A search scores the query batch against the matrix in blocks of rows (one matrix
+    product per block) and keeps a running top-k; it runs in a worker thread, and
+    concurrent searches are merged into one batch.
+    """
+
+    def __init__(self, path: str, dimensions: int, max_chunk_lines: int, initial_capacity: int = 1024):
+        self.path = path
+        self.embedder = CodeEmbedder(dimensions)
+        self.dimensions = dimensions
+        self.max_chunk_lines = max_chunk_lines
+        self.chunks: List[Optional[Chunk]] = []  # Row -> chunk, None for a free row
+        self.file_rows: Dict[str, List[int]] = {}
+        self._free: List[int] = []
+        self._live = np.zeros(0, dtype=bool)
+        self._vectors = self._open(initial_capacity, create=True)
+        self._searches = MicroBatcher(self._search_batch, max_batch_size=64, max_wait=0)
+
+    def __len__(self) -> int:
+        return len(self.chunks) - len(self._free)
+
+    @property
+    def nbytes(self) -> int:
+        return self._vectors.nbytes
+
+    def _open(self, capacity: int, create: bool = False) -> np.memmap:
+        with open(self.path, "wb" if create else "r+b") as f:
+            f.truncate(capacity * self.dimensions * 4)
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+        return np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dimensions))
+
+    def prepare(self, path: str, content: str, boundaries: Iterable[int]) -> PreparedFile:
+        # Chunking and embedding, safe to run in a worker thread
+        lines = content.split("\n")
+        chunks = [Chunk(path, first, last) for first, last in chunk_lines(content, boundaries, self.max_chunk_lines)]
+        texts = [path + "\n" + "\n".join(lines[chunk.start_line - 1:chunk.end_line]) for chunk in chunks]
+        return PreparedFile(chunks, self.embedder.embed_many(texts))
+
+    def apply(self, prepared: Dict[str, PreparedFile], removed: Iterable[str] = ()) -> None:
+        for path in list(removed) + list(prepared):
+            for row in self.file_rows.pop(path, ()):
+                self.chunks[row] = None
+                self._live[row] = False
+                self._free.append(row)
+        for path, file in prepared.items():
+            rows = [self._allocate_row() for _ in file.chunks]
+            if rows:
+                self._vectors[rows] = file.vectors
+                self._live[rows] = True
+            for row, chunk in zip(rows, file.chunks):
+                self.chunks[row] = chunk
+            self.file_rows[path] = rows
+
+    def _allocate_row(self) -> int:
+        if self._free:
+            return self._free.pop()
+        row = len(self.chunks)
+        if row == self._vectors.shape[0]:
+            self._vectors.flush()
+            self._vectors = self._open(2 * row)
+        self.chunks.append(None)
+        return row
+
+    def search_vectors(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-`k` (rows, scores) per query row, best first; -1 rows pad short results."""
+        n = len(self.chunks)
+        vectors, live = self._vectors, self._live  # Growth swaps these out; this search keeps its own view
+        best_rows = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        best_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            stop = min(n, start + SEARCH_BLOCK_ROWS)
+            scores = queries @ vectors[start:stop].T  # (queries, rows)
+            scores[:, ~live[start:stop]] = -np.inf
+            if stop - start > k:
+                top = np.argpartition(scores, -k, axis=1)[:, -k:]
+            else:
+                top = np.broadcast_to(np.arange(stop - start), (queries.shape[0], stop - start))
+            rows = np.concatenate([best_rows, top + start], axis=1)
+            merged = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            keep = np.argsort(-merged, axis=1)[:, :k]
+            best_rows = np.take_along_axis(rows, keep, axis=1)
+            best_scores = np.take_along_axis(merged, keep, axis=1)
+        best_rows[~np.isfinite(best_scores)] = -1
+        return best_rows, best_scores
+
+    async def search(self, text: str, k: int) -> List[Tuple[Chunk, float]]:
+        return await self._searches.submit((text, k))
+
+    async def _search_batch(self, items: List[Tuple[str, int]]) -> List[List[Tuple[Chunk, float]]]:
+        k = max(k for _, k in items)
+        queries = self.embedder.embed_many([text for text, _ in items])
+        rows, scores = await asyncio.to_thread(self.search_vectors, queries, k)
+        results = []
+        for i, (_, wanted) in enumerate(items):
+            found = []
+            for row, score in zip(rows[i], scores[i]):
+                chunk = self.chunks[row] if 0 <= row < len(self.chunks) else None
+                if chunk is not None and score > 0:  # Rows freed during the search are skipped
+                    found.append((chunk, float(score)))
+            results.append(found[:wanted])
+        return results
+
+    def close(self) -> None:
+        del self._vectors
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,191 @@
+# backend/app/services/semantic_cache.py
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.core.config import settings
+from backend.app.services.micro_batcher import MicroBatcher
+
+# Words that don't change what code a prompt asks for. Verbs and prepositions do ("read" vs
+# "write a file", "celsius to fahrenheit" vs "fahrenheit to celsius"), so they are kept.
+FILLER = frozenset("a an the please can could you i me we want need should would like some".split())
+# "write a function to ..." and "create a function that ..." ask for the same code; the verb
+# is only dropped in front of what is being asked for, not in "write a file line by line"
+REQUEST_VERBS = frozenset("write create make implement generate give build".split())
+ARTIFACTS = frozenset("function method class script program code snippet helper routine query regex test tests".split())
+SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def stem(word: str) -> str:
+    # Crude suffix stripping: "reverses", "reversed", "reversing" and "reverse" all become "revers"
+    if len(word) > 4:
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def prompt_words(text: str) -> List[str]:
+    words = [word for word in re.findall(r"[a-z0-9_]+", text.lower()) if word not in FILLER]
+    if len(words) >= 2 and words[0] in REQUEST_VERBS and words[1] in ARTIFACTS:
+        words = words[1:]
+    # "function to reverse", "function that reverses" and "function which reverses" alike
+    words = [
+        word for i, word in enumerate(words)
+        if not (word in ("to", "that", "which") and i and words[i - 1] in ARTIFACTS)
+    ]
+    return [stem(word) for word in words]
+
+
+class HashingEmbedder:
+    """
+    Lightweight local prompt embedder: stemmed words, word bigrams and trigrams (so word
+    order counts) and character trigrams are hashed (signed) into a fixed number of
+    dimensions, then L2-normalized, so the dot product of two embeddings is their cosine
+    similarity. No model or vocabulary needed.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def features(self, text: str) -> List[Tuple[str, float]]:
+        words = prompt_words(text)
+        features = [(word, 1.0) for word in words]
+        features += [(f"{first} {second}", 1.0) for first, second in zip(words, words[1:])]
+        features += [(" ".join(triple), 0.5) for triple in zip(words, words[1:], words[2:])]
+        for word in words:
+            padded = f"<{word}>"
+            features += [(padded[i:i + 3], 0.25) for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        indices = []
+        weights = []
+        for feature, weight in self.features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            indices.append(h % self.dimensions)
+            weights.append(weight if h & 0x80000000 else -weight)
+        np.add.at(vector, indices, weights)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Near-duplicate prompt cache. Embeddings are rows of one float32 matrix (grown by
+    doubling up to `max_entries`, then overwritten oldest-first); a lookup is a single
+    matrix-vector product, and concurrent lookups are merged into one matrix-matrix
+    product. A row only matches queries with the same `scope` (a hash of everything but
+    the prompt: language, context, generation parameters, plan) whose similarity is at
+    least `threshold`.
+    """
+
+    def __init__(self, max_entries: int, dimensions: int, threshold: float, ttl: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.embedder = HashingEmbedder(dimensions)
+        self.hits = 0
+        self.misses = 0
+        self.search_seconds = 0.0
+        self.searches = 0
+        capacity = min(max_entries, 1024)
+        self._vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self._scopes = np.zeros(capacity, dtype=np.int64)
+        self._expires_at = np.zeros(capacity, dtype=np.float64)
+        self._values: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._count = 0
+        self._next = 0  # Row to write next
+        # Lookups issued in the same event loop tick are searched together
+        self._lookups = MicroBatcher(self._search_batch, max_batch_size=64, max_wait=0)
+
+    def __len__(self) -> int:
+        return self._count
+
+    async def get(self, prompt: str, scope: int) -> Optional[Dict[str, Any]]:
+        value = await self._lookups.submit((self.embedder.embed(prompt), scope))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, prompt: str, scope: int, value: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        if self._next == len(self._values) and len(self._values) < self.max_entries:
+            self._grow(min(self.max_entries, 2 * len(self._values)))
+        if self._next == len(self._values):
+            self._next = 0  # Full: overwrite the oldest row
+        row = self._next
+        self._vectors[row] = self.embedder.embed(prompt)
+        self._scopes[row] = scope
+        self._expires_at[row] = time.time() + self.ttl
+        self._values[row] = value
+        self._next += 1
+        self._count = max(self._count, self._next)
+
+    def search(self, queries: np.ndarray, scopes: np.ndarray, k: int = 1) -> List[List[Tuple[int, float]]]:
+        """
+        Top-`k` (row, similarity) matches for each query row, best first, among live rows
+        in the query's scope with similarity >= threshold.
+        """
+        started = time.perf_counter()
+        n = self._count
+        similarities = queries @ self._vectors[:n].T  # (queries, rows), so each query's scores are contiguous
+        now = time.time()
+        matches = []
+        for j in range(queries.shape[0]):
+            column = similarities[j]
+            candidates = np.flatnonzero(column >= self.threshold)  # Usually a handful of rows
+            if candidates.size:
+                candidates = candidates[(self._scopes[candidates] == scopes[j]) & (self._expires_at[candidates] > now)]
+            if candidates.size > k:
+                candidates = candidates[np.argpartition(column[candidates], -k)[-k:]]
+            best = candidates[np.argsort(-column[candidates])]
+            matches.append([(int(row), float(column[row])) for row in best])
+        self.search_seconds += time.perf_counter() - started
+        self.searches += 1
+        return matches
+
+    async def _search_batch(self, items: List[Tuple[np.ndarray, int]]) -> List[Optional[Dict[str, Any]]]:
+        if self._count == 0:
+            return [None] * len(items)
+        queries = np.stack([vector for vector, _ in items])
+        scopes = np.array([scope for _, scope in items], dtype=np.int64)
+        return [self._values[found[0][0]] if found else None for found in self.search(queries, scopes)]
+
+    def _grow(self, capacity: int) -> None:
+        extra = capacity - len(self._values)
+        self._vectors = np.concatenate([self._vectors, np.zeros((extra, self._vectors.shape[1]), dtype=np.float32)])
+        self._scopes = np.concatenate([self._scopes, np.zeros(extra, dtype=np.int64)])
+        self._expires_at = np.concatenate([self._expires_at, np.zeros(extra, dtype=np.float64)])
+        self._values.extend([None] * extra)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": self._count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "mean_search_ms": 1000 * self.search_seconds / self.searches if self.searches else 0.0,
+        }
+
+
+def build_semantic_cache() -> Optional[SemanticCache]:
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    return SemanticCache(
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        dimensions=settings.SEMANTIC_CACHE_DIMENSIONS,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    )
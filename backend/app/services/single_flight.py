@@ -0,0 +1,72 @@
+# backend/app/services/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller starts `fn()` in its
+    own task and later callers await that same task instead of starting another one.
+
+    The task is shared, not owned by any one caller, so a caller that is cancelled
+    (e.g. its client disconnected) only stops waiting; the call is cancelled when its
+    last waiter goes away. Results are not kept once the call finishes (that's the
+    response cache's job).
+    """
+
+    def __init__(self):
+        self.leaders = 0  # Calls actually started
+        self.coalesced = 0  # Callers that joined a call already in flight
+        self.cancelled = 0  # Calls abandoned by all of their waiters
+        self._flights: Dict[str, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting any more; new callers must not join a call being cancelled
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.cancelled += 1
+
+    def _finished(self, key: str, flight: _Flight) -> None:
+        self._forget(key, flight)
+        if not flight.task.cancelled():
+            flight.task.exception()  # Mark retrieved even if every waiter left before it failed
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
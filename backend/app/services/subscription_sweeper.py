@@ -0,0 +1,78 @@
+# backend/app/services/subscription_sweeper.py
+import asyncio
+import time
+from typing import Dict, Optional
+
+from backend.app.core.config import settings
+from backend.app.db.user_repository import user_repository
+
+
+class SubscriptionExpirySweeper:
+    """
+    Background task that downgrades expired paid subscriptions to SubscriptionPlan.NONE.
+    Each sweep pulls only the due users from the repository's expiry index, in batches,
+    instead of scanning every account.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.processed_total = 0
+        self.last_processed = 0
+        self.last_lag_seconds = 0.0  # How long after expiry the oldest user in the last sweep was downgraded
+        self.last_sweep_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep_once(self) -> int:
+        now = time.time()
+        processed = 0
+        lag = 0.0
+        while True:
+            expired = await user_repository.expire_due_subscriptions(now, self.batch_size)
+            if expired:
+                lag = max(lag, now - min(expires_at for _, expires_at in expired))
+            processed += len(expired)
+            if len(expired) < self.batch_size:
+                break
+        self.processed_total += processed
+        self.last_processed = processed
+        self.last_lag_seconds = lag
+        self.last_sweep_at = now
+        if processed:
+            print(f"Subscription sweeper downgraded {processed} expired subscription(s), lag {lag:.1f}s")
+        return processed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except Exception as e:  # Keep sweeping on transient storage errors
+                print(f"Subscription sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "processed_total": self.processed_total,
+            "last_processed": self.last_processed,
+            "last_lag_seconds": self.last_lag_seconds,
+            "last_sweep_at": self.last_sweep_at or 0.0,
+        }
+
+
+subscription_sweeper = SubscriptionExpirySweeper(
+    interval=settings.SUBSCRIPTION_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.SUBSCRIPTION_SWEEP_BATCH_SIZE,
+)
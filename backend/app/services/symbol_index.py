@@ -0,0 +1,206 @@
+# backend/app/services/symbol_index.py
+import hashlib
+import posixpath
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# Source file extensions we extract definitions from; other text files are kept but not parsed
+EXTENSION_LANGUAGES: Dict[str, str] = {
+    ".py": "python", ".pyi": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".java": "java", ".cs": "c#",
+    ".c": "c", ".h": "c", ".cc": "c++", ".cpp": "c++", ".cxx": "c++", ".hpp": "c++", ".hh": "c++",
+    ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php",
+}
+
+_JS_DEFINITIONS = [
+    ("function", r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:async[ \t]+)?function\*?[ \t]+(?P<{}>[\w$]+)"),
+    ("class", r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:abstract[ \t]+)?(?:class|interface|enum)[ \t]+(?P<{}>[\w$]+)"),
+    ("type", r"^[ \t]*(?:export[ \t]+)?type[ \t]+(?P<{}>[\w$]+)[ \t]*(?:<[^>\n]*>)?[ \t]*="),
+    ("function", r"^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<{}>[\w$]+)[ \t]*(?::[^=\n]+)?=[ \t]*(?:async[ \t]*)?"
+                 r"(?:function\b|\([^)\n]*\)[ \t]*(?::[^=\n]+)?=>|[\w$]+[ \t]*=>)"),
+]
+_JVM_MODIFIERS = r"(?:(?:public|private|protected|internal|static|final|abstract|sealed|partial|override|virtual|async|synchronized|readonly)[ \t]+)"
+
+# Definition patterns per language: (kind, regex with a "{}" placeholder for the name group)
+DEFINITION_PATTERNS: Dict[str, List[tuple]] = {
+    "python": [
+        ("function", r"^[ \t]*(?:async[ \t]+)?def[ \t]+(?P<{}>\w+)"),
+        ("class", r"^[ \t]*class[ \t]+(?P<{}>\w+)"),
+        ("constant", r"^(?P<{}>[A-Z][A-Z0-9_]+)[ \t]*(?::[^=\n]+)?=(?!=)"),
+    ],
+    "javascript": _JS_DEFINITIONS,
+    "typescript": _JS_DEFINITIONS,
+    "java": [
+        ("class", r"^[ \t]*" + _JVM_MODIFIERS + r"*(?:class|interface|enum|record|@interface)[ \t]+(?P<{}>\w+)"),
+        ("function", r"^[ \t]+" + _JVM_MODIFIERS + r"+(?:[\w<>\[\],.? ]*?[\w>\]][ \t]+)?(?P<{}>\w+)[ \t]*\("),
+    ],
+    "c#": [
+        ("class", r"^[ \t]*" + _JVM_MODIFIERS + r"*(?:class|interface|enum|record|struct)[ \t]+(?P<{}>\w+)"),
+        ("function", r"^[ \t]+" + _JVM_MODIFIERS + r"+(?:[\w<>\[\],.? ]*?[\w>\]][ \t]+)?(?P<{}>\w+)[ \t]*\("),
+    ],
+    "c": [
+        ("class", r"^[ \t]*(?:typedef[ \t]+)?(?:struct|union|enum)[ \t]+(?P<{}>\w+)"),
+        ("constant", r"^#[ \t]*define[ \t]+(?P<{}>\w+)"),
+        ("function", r"^(?!return\b|else\b)[A-Za-z_][\w \t*]*?[ \t*](?P<{}>[A-Za-z_]\w*)[ \t]*\([^;\n]*$"),
+    ],
+    "c++": [
+        ("class", r"^[ \t]*(?:template[ \t]*<[^>\n]*>[ \t]*)?(?:typedef[ \t]+)?(?:class|struct|union|enum(?:[ \t]+class)?)[ \t]+(?P<{}>\w+)"),
+        ("constant", r"^#[ \t]*define[ \t]+(?P<{}>\w+)"),
+        ("function", r"^(?!return\b|else\b)[A-Za-z_][\w \t*&:<>,]*?[ \t*&](?:\w+::)*(?P<{}>~?[A-Za-z_]\w*)[ \t]*\([^;\n]*$"),
+    ],
+    "go": [
+        ("function", r"^func[ \t]+(?:\([^)\n]*\)[ \t]*)?(?P<{}>\w+)"),
+        ("class", r"^type[ \t]+(?P<{}>\w+)"),
+    ],
+    "rust": [
+        ("function", r"^[ \t]*(?:pub(?:\([\w: ]+\))?[ \t]+)?(?:const[ \t]+)?(?:async[ \t]+)?(?:unsafe[ \t]+)?fn[ \t]+(?P<{}>\w+)"),
+        ("class", r"^[ \t]*(?:pub(?:\([\w: ]+\))?[ \t]+)?(?:struct|enum|trait|type|union)[ \t]+(?P<{}>\w+)"),
+        ("constant", r"^[ \t]*(?:pub(?:\([\w: ]+\))?[ \t]+)?(?:const|static)[ \t]+(?P<{}>[A-Z_][A-Z0-9_]*)"),
+    ],
+    "ruby": [
+        ("function", r"^[ \t]*def[ \t]+(?:self\.)?(?P<{}>\w+[?!=]?)"),
+        ("class", r"^[ \t]*(?:class|module)[ \t]+(?:\w+::)*(?P<{}>\w+)"),
+    ],
+    "php": [
+        ("function", r"^[ \t]*(?:(?:public|private|protected|static|abstract|final)[ \t]+)*function[ \t]+&?(?P<{}>\w+)"),
+        ("class", r"^[ \t]*(?:(?:abstract|final)[ \t]+)?(?:class|interface|trait|enum)[ \t]+(?P<{}>\w+)"),
+    ],
+}
+
+CONTROL_KEYWORDS = frozenset({"if", "for", "while", "switch", "catch", "return", "sizeof", "elif", "else"})
+
+
+def _compile_definitions(patterns: List[tuple]) -> "re.Pattern":
+    # One alternation per language; the matched group's name ("<kind>_<n>") gives the kind
+    return re.compile(
+        "|".join(pattern.format(f"{kind}_{i}") for i, (kind, pattern) in enumerate(patterns)),
+        re.MULTILINE,
+    )
+
+
+_COMPILED_DEFINITIONS = {language: _compile_definitions(patterns) for language, patterns in DEFINITION_PATTERNS.items()}
+
+
+class Definition(NamedTuple):
+    name: str
+    kind: str  # "function", "class", "type" (any type-like declaration) or "constant"
+    path: str
+    line: int  # 1-based
+
+
+class FileSymbols:
+    """What the index knows about one file: its content hash and definitions."""
+
+    __slots__ = ("path", "digest", "language", "definitions")
+
+    def __init__(self, path: str, digest: str, language: Optional[str], definitions: List[Definition]):
+        self.path = path
+        self.digest = digest
+        self.language = language
+        self.definitions = definitions
+
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def language_for_path(path: str) -> Optional[str]:
+    return EXTENSION_LANGUAGES.get(posixpath.splitext(path)[1].lower())
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def block_end(lines: List[str], start: int) -> int:
+    """
+    Last line (0-based) of the definition starting at `start`: the following lines indented
+    deeper than it, plus a closing line ("}", "end", ")") or opening brace at its own indent.
+    Computed on demand rather than at indexing time, since few definitions are ever read.
+    """
+    indent = _indent(lines[start])
+    end = start
+    for i in range(start + 1, len(lines)):
+        stripped = lines[i].strip()
+        if not stripped:
+            continue
+        if _indent(lines[i]) > indent:
+            end = i
+        elif stripped[0] == "{":
+            end = i  # Brace on its own line (C, C#, Java styles)
+        elif stripped[0] in "})]" or stripped == "end":
+            return i
+        else:
+            break
+    return end
+
+
+def parse_file(path: str, content: str, digest: Optional[str] = None) -> FileSymbols:
+    digest = digest or content_digest(content)
+    language = language_for_path(path)
+    pattern = _COMPILED_DEFINITIONS.get(language)
+    if pattern is None:
+        return FileSymbols(path, digest, language, [])
+
+    definitions = []
+    line_number = 1
+    position = 0
+    for match in pattern.finditer(content):
+        name = match.group(match.lastgroup)
+        if name in CONTROL_KEYWORDS:
+            continue
+        line_number += content.count("\n", position, match.start())
+        position = match.start()
+        definitions.append(Definition(name, match.lastgroup.rsplit("_", 1)[0], path, line_number))
+    return FileSymbols(path, digest, language, definitions)
+
+
+def mentions(name: str) -> "re.Pattern":
+    return re.compile(r"(?<![\w$])" + re.escape(name) + r"(?![\w$])")
+
+
+class SymbolIndex:
+    """
+    Definitions across a project's files. Files are parsed independently (`parse_file`,
+    safe to run in a worker thread) and the results merged in with `apply`; a file whose
+    content hash hasn't changed is never parsed again.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, FileSymbols] = {}
+        self.definitions: Dict[str, List[Definition]] = {}
+        self.symbol_count = 0
+
+    def needs_parse(self, path: str, digest: str) -> bool:
+        known = self.files.get(path)
+        return known is None or known.digest != digest
+
+    def apply(self, parsed: Iterable[FileSymbols] = (), removed: Iterable[str] = ()) -> None:
+        for path in removed:
+            self._forget(path)
+        for symbols in parsed:
+            self._forget(symbols.path)
+            self.files[symbols.path] = symbols
+            for definition in symbols.definitions:
+                definitions = self.definitions.get(definition.name)
+                if definitions is None:
+                    self.definitions[definition.name] = [definition]
+                else:
+                    definitions.append(definition)
+            self.symbol_count += len(symbols.definitions)
+
+    def _forget(self, path: str) -> None:
+        old = self.files.pop(path, None)
+        if old is None:
+            return
+        for definition in old.definitions:
+            definitions = self.definitions[definition.name]
+            definitions.remove(definition)
+            if not definitions:
+                del self.definitions[definition.name]
+        self.symbol_count -= len(old.definitions)
+
+    def lookup(self, name: str) -> List[Definition]:
+        return list(self.definitions.get(name, ()))
@@ -0,0 +1,89 @@
+# backend/tests/test_admission_queue.py
+import asyncio
+
+import pytest
+
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.admission_queue import AdmissionQueue, AdmissionRejectedError
+
+WEIGHTS = {"basic": 1, "premium": 2, "pro": 3}
+
+
+def user(user_id: int, plan: SubscriptionPlan) -> User:
+    return User.model_construct(id=user_id, email=f"user{user_id}@example.com", subscription_plan=plan)
+
+
+def admission_queue(**overrides) -> AdmissionQueue:
+    options = dict(max_concurrency=1, max_queued=100, max_queued_per_user=10, plan_weights=WEIGHTS)
+    options.update(overrides)
+    return AdmissionQueue(**options)
+
+
+async def admission_order(queue: AdmissionQueue, users):
+    """Queue one request per entry of `users` behind a running call; return the order they get a slot in."""
+    admitted = []
+
+    async def request(requester):
+        async with queue.slot(requester):
+            admitted.append(requester.id)
+
+    await queue.acquire(user(0, SubscriptionPlan.BASIC))
+    tasks = [asyncio.create_task(request(requester)) for requester in users]
+    await asyncio.sleep(0)  # Let every request join the queue
+    queue.release()
+    await asyncio.gather(*tasks)
+    return admitted
+
+
+def test_slots_are_shared_by_plan_weight():
+    basic = [user(n, SubscriptionPlan.BASIC) for n in range(1, 5)]
+    pro = [user(n, SubscriptionPlan.PRO) for n in range(11, 15)]
+    admitted = asyncio.run(admission_order(admission_queue(), basic + pro))
+    assert sorted(admitted) == sorted(requester.id for requester in basic + pro)
+    assert sum(user_id > 10 for user_id in admitted[:4]) == 3  # Pro gets three slots for each basic one
+
+
+def test_users_of_a_plan_take_turns():
+    heavy, light = user(1, SubscriptionPlan.PRO), user(2, SubscriptionPlan.PRO)
+    admitted = asyncio.run(admission_order(admission_queue(), [heavy, heavy, heavy, light]))
+    assert admitted == [1, 2, 1, 1]
+
+
+def test_queue_limits():
+    async def scenario():
+        queue = admission_queue(max_queued=3, max_queued_per_user=2)
+        await queue.acquire(user(0, SubscriptionPlan.BASIC))
+        heavy, light = user(1, SubscriptionPlan.BASIC), user(2, SubscriptionPlan.BASIC)
+        waiting = [asyncio.create_task(queue.acquire(requester)) for requester in (heavy, heavy, light)]
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejectedError) as per_user:
+            await queue.acquire(heavy)
+        with pytest.raises(AdmissionRejectedError) as full:
+            await queue.acquire(user(3, SubscriptionPlan.BASIC))  # No lower plan to make room
+        waiting.append(asyncio.create_task(queue.acquire(user(4, SubscriptionPlan.PRO))))
+        await asyncio.sleep(0)
+        displaced = (await asyncio.gather(waiting[1], return_exceptions=True))[0]
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        return per_user.value, full.value, displaced, queue.stats()
+
+    per_user, full, displaced, stats = asyncio.run(scenario())
+    assert per_user.per_user and not full.per_user
+    assert isinstance(displaced, AdmissionRejectedError)  # The newest request of the heaviest basic user
+    assert stats["basic"]["rejected"] == 3
+    assert stats["all"]["queued"] == 0
+
+
+def test_cancelled_waiters_give_up_their_place():
+    async def scenario():
+        queue = admission_queue()
+        await queue.acquire(user(0, SubscriptionPlan.BASIC))
+        waiting = asyncio.create_task(queue.acquire(user(1, SubscriptionPlan.BASIC)))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        queue.release()
+        return queue.running, queue.queued
+
+    assert asyncio.run(scenario()) == (0, 0)
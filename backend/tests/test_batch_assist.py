@@ -0,0 +1,109 @@
+# backend/tests/test_batch_assist.py
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.api import deps
+from backend.app.api.v1.endpoints import code_assistant
+from backend.app.core.config import settings
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.code_assistant_service import CodeAssistantService
+from backend.app.services.inference_backend import InferenceError, InferenceTimeoutError, TemplateInferenceBackend
+
+BASIC = User.model_construct(id=1, email="basic@example.com", subscription_plan=SubscriptionPlan.BASIC)
+PREMIUM = User.model_construct(id=2, email="premium@example.com", subscription_plan=SubscriptionPlan.PREMIUM)
+
+
+class SlowBackend(TemplateInferenceBackend):
+    """Explains slowly and records how many calls overlap; fails on code asking it to."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def explain(self, request, user):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.02)
+            if request.code_block == "fail":
+                raise InferenceError("model crashed")
+            if request.code_block == "slow":
+                raise InferenceTimeoutError("model timed out")
+            return await super().explain(request, user)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = SlowBackend()
+    monkeypatch.setattr(code_assistant, "code_assistant_service", CodeAssistantService(backend))
+    return backend
+
+
+def client_for(user: User) -> TestClient:
+    app = FastAPI()
+    app.include_router(code_assistant.router, prefix="/assist")
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    return TestClient(app)
+
+
+def explain(code: str) -> dict:
+    return {"operation": "explain", "request": {"code_block": code, "language": "python"}}
+
+
+def test_results_in_request_order_with_per_item_status(backend):
+    operations = [
+        {"operation": "generate", "request": {"prompt": "say hello", "language": "python"}},
+        explain("x = 1"),
+        {"operation": "generate", "request": {"language": "python"}},  # No prompt
+        explain("fail"),
+        explain("slow"),
+    ]
+    response = client_for(PREMIUM).post("/assist/batch", json={"operations": operations})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["index"], r["operation"], r["status_code"]) for r in results] == [
+        (0, "generate", 200), (1, "explain", 200), (2, "generate", 422), (3, "explain", 502), (4, "explain", 504),
+    ]
+    assert "say hello" in results[0]["result"]["generated_code"] and "x = 1" in results[1]["result"]["explanation"]
+    assert "error" not in results[0] and results[3]["error"] == "The code model is currently unavailable."
+
+
+def test_each_item_gets_its_own_plan_check(backend):
+    operations = [{"operation": "generate", "request": {"prompt": "say hello"}}, explain("x = 1")]
+    results = client_for(BASIC).post("/assist/batch", json={"operations": operations}).json()["results"]
+    assert [r["status_code"] for r in results] == [200, 403]
+    assert results[1]["error"] == "Code explanation requires a Premium or Pro plan."
+
+
+def test_concurrency_is_capped_by_the_request_and_the_server(backend, monkeypatch):
+    operations = [explain(f"x = {n}") for n in range(6)]
+    client = client_for(PREMIUM)
+    client.post("/assist/batch", json={"operations": operations, "max_concurrency": 2})
+    assert backend.peak == 2
+    backend.peak = 0
+    monkeypatch.setattr(settings, "BATCH_MAX_CONCURRENCY", 3)
+    client.post("/assist/batch", json={"operations": operations, "max_concurrency": 50})
+    assert backend.peak == 3
+
+
+def test_oversized_and_empty_batches_are_rejected(backend, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_OPERATIONS", 2)
+    client = client_for(PREMIUM)
+    assert client.post("/assist/batch", json={"operations": [explain("a"), explain("b"), explain("c")]}).status_code == 413
+    assert client.post("/assist/batch/stream", json={"operations": [explain("a")] * 3}).status_code == 413
+    assert client.post("/assist/batch", json={"operations": []}).status_code == 422
+
+
+def test_stream_sends_one_line_per_operation_as_each_completes(backend):
+    operations = [explain("fail"), explain("x = 1"), explain("y = 2")]
+    response = client_for(PREMIUM).post("/assist/batch/stream", json={"operations": operations})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    assert {line["index"]: line["status_code"] for line in lines} == {0: 502, 1: 200, 2: 200}
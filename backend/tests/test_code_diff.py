@@ -0,0 +1,102 @@
+# backend/tests/test_code_diff.py
+import asyncio
+
+import pytest
+
+from backend.app.models.code_assistant import CodeRefactorRequest
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.code_assistant_service import CodeAssistantService
+from backend.app.services.code_diff import PatchError, UnknownBaseError, apply_patch, content_hash, unified_diff
+from backend.app.services.inference_backend import TemplateInferenceBackend
+from backend.app.services.response_cache import ResponseCache
+
+BASE = "".join(f"line {n}\n" for n in range(1, 21))
+
+PAIRS = [
+    (BASE, BASE.replace("line 3\n", "line three\n").replace("line 18\n", "")),
+    (BASE, "header\n" + BASE + "footer\n"),
+    ("x = 1\ny = 2", "x = 1\ny = 3"),  # No newline at the end of either
+    ("x = 1\ny = 2\n", "x = 1\ny = 2"),
+    ("x = 1\r\ny = 2\r\n", "x = 1\r\ny = 3\r\n"),
+    ("", "print('new')\n"),
+    ("print('old')\n", ""),
+]
+
+GIT_PATCH = """diff --git a/code b/code
+index 1111111..2222222 100644
+--- a/code
++++ b/code
+@@ -1,4 +1,4 @@
+ def f():
+-    return 1
++    return 2
+
+ print(f())
+"""
+
+
+@pytest.mark.parametrize("base, new", PAIRS)
+def test_diff_applies_back(base, new):
+    patch = unified_diff(base, new)
+    assert apply_patch(base, patch) == new
+
+
+def test_equal_code_has_an_empty_diff():
+    assert unified_diff(BASE, BASE) == ""
+    assert apply_patch(BASE, "") == BASE
+
+
+def test_git_patch_with_an_editor_stripped_blank_context_line():
+    base = "def f():\n    return 1\n\nprint(f())\n"
+    assert apply_patch(base, GIT_PATCH) == base.replace("return 1", "return 2")
+
+
+def test_hunk_is_applied_where_its_context_moved():
+    patch = unified_diff(BASE, BASE.replace("line 10\n", "line ten\n"))
+    moved = "inserted\n" * 5 + BASE
+    assert apply_patch(moved, patch) == moved.replace("line 10\n", "line ten\n")
+
+
+@pytest.mark.parametrize("patch, message", [
+    ("just some text\n", "no hunks"),
+    ("@@ -1,2 +1,2 @@\n-line 1\n+line one\n", "different number of lines"),
+    ("@@ -1 +1 @@\n-not in base\n+x\n", "doesn't match"),
+    ("@@ -1 +1 @@\n-line 1\n+x\nstray\n", "Unexpected line"),
+])
+def test_bad_patches_are_rejected(patch, message):
+    with pytest.raises(PatchError, match=message):
+        apply_patch(BASE, patch)
+
+
+def test_content_hash_is_of_the_exact_text():
+    assert content_hash("x\n") != content_hash("x\r\n")
+    assert content_hash("é") == "4a99557e4033c3539de2eb65472017cad5f9557f7a0625a09f1c3f6e2ba69c4c"  # UTF-8, as clients hash it
+
+
+def test_follow_up_refactor_by_hash_and_patch():
+    owner = User.model_construct(id=1, email="owner@example.com", subscription_plan=SubscriptionPlan.PRO)
+    other = User.model_construct(id=2, email="other@example.com", subscription_plan=SubscriptionPlan.PRO)
+    service = CodeAssistantService(TemplateInferenceBackend(), bases=ResponseCache(max_entries=100, ttl=60))
+    code = "import os\nx=1\nprint(x)\n"
+
+    async def scenario():
+        first = await service.refactor_code(CodeRefactorRequest(
+            code_block=code, language="python", refactor_goals=["formatting"], response_format="diff",
+        ), owner)
+        refactored = apply_patch(code, first.diff)
+        edited = refactored.replace("print(x)", "print(x + 1)")
+        follow_up = await service.refactor_code(CodeRefactorRequest(
+            base_hash=first.result_hash, patch=unified_diff(refactored, edited), language="python",
+            refactor_goals=["formatting"],
+        ), owner)
+        with pytest.raises(UnknownBaseError):  # Bases are per user
+            await service.refactor_code(CodeRefactorRequest(
+                base_hash=first.result_hash, language="python", refactor_goals=["formatting"],
+            ), other)
+        return first, refactored, edited, follow_up
+
+    first, refactored, edited, follow_up = asyncio.run(scenario())
+    assert first.refactored_code is None and first.base_hash == content_hash(code)
+    assert content_hash(refactored) == first.result_hash and "x = 1" in refactored
+    assert follow_up.base_hash == content_hash(edited)
+    assert follow_up.refactored_code == edited
@@ -0,0 +1,72 @@
+# backend/tests/test_completion_websocket.py
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from backend.app.api import deps
+from backend.app.api.v1.endpoints import code_assistant
+from backend.app.core.security import create_access_token
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.code_assistant import CompletionResponse
+from backend.app.models.user import SubscriptionPlan
+
+
+async def complete_code(request, user):
+    return CompletionResponse(document_id=request.document_id, request_id=request.request_id, completion="pass")
+
+
+@pytest.fixture
+def users(monkeypatch):
+    repository = InMemoryUserRepository()
+    monkeypatch.setattr(deps, "user_repository", repository)
+    monkeypatch.setattr(code_assistant.code_assistant_service, "complete_code", complete_code)
+    return repository
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(code_assistant.router, prefix="/assist")
+    return TestClient(app)
+
+
+def token_for(users, expires_in: timedelta) -> tuple:
+    user = asyncio.run(users.create(email="editor@example.com", hashed_password="hash"))
+    asyncio.run(users.update_subscription(user.id, SubscriptionPlan.BASIC, None))
+    return user.id, create_access_token({"sub": user.email, "user_id": user.id}, expires_delta=expires_in)
+
+
+def test_completion_is_answered(users, client):
+    _, token = token_for(users, timedelta(minutes=5))
+    with client.websocket_connect(f"/assist/complete/ws?token={token}") as websocket:
+        websocket.send_json({"document_id": "a.py", "request_id": 1, "prefix": "def f():\n    "})
+        assert websocket.receive_json() == {"document_id": "a.py", "request_id": 1, "completion": "pass"}
+
+
+def test_idle_connection_is_closed_when_the_token_expires(users, client):
+    _, token = token_for(users, timedelta(seconds=2))
+    started = time.monotonic()
+    with client.websocket_connect(f"/assist/complete/ws?token={token}") as websocket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()  # Nothing is sent: only the expiry timer can end the wait
+    assert closed.value.code == status.WS_1008_POLICY_VIOLATION
+    assert closed.value.reason == "Token expired"
+    assert time.monotonic() - started < 5
+
+
+def test_downgraded_user_is_disconnected_at_the_next_request(users, client):
+    user_id, token = token_for(users, timedelta(minutes=5))
+    with client.websocket_connect(f"/assist/complete/ws?token={token}") as websocket:
+        websocket.send_json({"document_id": "a.py", "prefix": "x = "})
+        websocket.receive_json()
+        asyncio.run(users.update_subscription(user_id, SubscriptionPlan.NONE, None))
+        websocket.send_json({"document_id": "a.py", "prefix": "x = 1"})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    assert closed.value.code == status.WS_1008_POLICY_VIOLATION
+    assert "subscription" in closed.value.reason
@@ -0,0 +1,43 @@
+# backend/tests/test_context_assembly.py
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.context_assembly import (
+    assemble_context, assemble_prefix, context_token_budget, count_tokens, enclosing_scopes,
+)
+
+BODY = "\n".join(f"        total_{n} = compute_value({n}, factor={n * 3})" for n in range(200))
+CODE = "import math\n\nclass Report:\n    def build(self, rows):\n" + BODY + "\n        return total_199"
+
+
+def test_small_context_is_kept_whole():
+    assembled = assemble_context("x = 1\n", budget=100)
+    assert assembled.text == "x = 1\n" and not assembled.truncated
+
+
+def test_enclosing_scopes_innermost_first():
+    lines = CODE.split("\n")
+    assert [lines[i].strip() for i in enclosing_scopes(lines)] == ["def build(self, rows):", "class Report:"]
+
+
+def test_long_context_keeps_scope_headers_and_the_code_nearest_the_cursor():
+    assembled = assemble_context(CODE, budget=300)
+    lines = assembled.text.split("\n")
+    assert assembled.truncated and assembled.tokens <= 300 < assembled.original_tokens
+    assert lines[:4] == ["...", "class Report:", "    def build(self, rows):", "        ..."]
+    assert lines[-1] == "        return total_199" and "total_199 = " in lines[-2]
+    assert "import math" not in assembled.text
+
+
+def test_prefix_window_bounds_the_work_for_long_files():
+    prefix = "x = 1\n" * 100000 + "def f():\n    return "
+    assembled = assemble_prefix(prefix, budget=64)
+    assert assembled.tokens <= 64
+    assert assembled.text.endswith("def f():\n    return ")
+    assert assembled.original_tokens < count_tokens(prefix) // 100  # Only the window was counted
+
+
+def test_budget_grows_with_the_plan():
+    budgets = [
+        context_token_budget(User.model_construct(id=1, email="u@example.com", subscription_plan=plan))
+        for plan in (SubscriptionPlan.NONE, SubscriptionPlan.BASIC, SubscriptionPlan.PREMIUM, SubscriptionPlan.PRO)
+    ]
+    assert budgets[0] == budgets[1] < budgets[2] < budgets[3]
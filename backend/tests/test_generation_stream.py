@@ -0,0 +1,100 @@
+# backend/tests/test_generation_stream.py
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app.api import deps
+from backend.app.api.v1.endpoints import code_assistant
+from backend.app.core.security import create_access_token
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.code_assistant import CodeGenerationRequest
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.code_assistant_service import CodeAssistantService
+from backend.app.services.inference_backend import HTTPInferenceBackend, InferenceError, TemplateInferenceBackend
+
+USER = User.model_construct(id=1, email="dev@example.com", subscription_plan=SubscriptionPlan.BASIC)
+REQUEST = CodeGenerationRequest(prompt="say hello", language="python")
+
+
+class FailingBackend(TemplateInferenceBackend):
+    async def stream_generate(self, request, user):
+        yield "def "
+        raise InferenceError("connection reset")
+
+
+async def collect(service: CodeAssistantService) -> list:
+    return [chunk async for chunk in service.stream_generate_code(REQUEST, USER)]
+
+
+def test_tokens_add_up_to_the_generation_and_end_with_done():
+    backend = TemplateInferenceBackend()
+    chunks = asyncio.run(collect(CodeAssistantService(backend)))
+    expected = asyncio.run(backend.generate(REQUEST, USER)).text
+    assert len(chunks) > 3 and "".join(chunk.token for chunk in chunks[:-1]) == expected
+    assert chunks[-1].done and chunks[-1].token is None and chunks[-1].language_detected == "python"
+
+
+def test_model_failure_mid_stream_ends_with_an_error_chunk():
+    chunks = asyncio.run(collect(CodeAssistantService(FailingBackend())))
+    assert [chunk.token for chunk in chunks] == ["def ", None]
+    assert chunks[-1].done and chunks[-1].error == "The code model failed while generating."
+
+
+def test_http_backend_reads_ndjson_tokens():
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        lines = [json.dumps({"token": token}) for token in ("print", "(1)")] + ["", json.dumps({"token": ""})]
+        return httpx.Response(200, text="\n".join(lines) + "\n")
+
+    async def scenario():
+        backend = HTTPInferenceBackend(
+            base_url="http://model", timeout=5, connect_timeout=1, max_connections=1, max_concurrency=1,
+        )
+        backend._client = httpx.AsyncClient(base_url="http://model", transport=httpx.MockTransport(handler))
+        tokens = [token async for token in backend.stream_generate(REQUEST, USER)]
+        await backend.aclose()
+        return tokens
+
+    assert asyncio.run(scenario()) == ["print", "(1)"]
+    assert seen[0]["stream"] is True and seen[0]["prompt"] == "say hello"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(code_assistant, "code_assistant_service", CodeAssistantService(TemplateInferenceBackend()))
+    app = FastAPI()
+    app.include_router(code_assistant.router, prefix="/assist")
+    app.dependency_overrides[deps.get_current_active_user] = lambda: USER
+    return TestClient(app)
+
+
+def test_sse_endpoint_sends_one_event_per_chunk(client):
+    response = client.post("/assist/generate-code/stream", json=REQUEST.model_dump())
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(block[len("data: "):]) for block in response.text.split("\n\n") if block]
+    assert all("token" in event for event in events[:-1])
+    assert events[-1] == {"done": True, "language_detected": "python"}
+
+
+def test_websocket_streams_and_reports_bad_requests_in_band(client, monkeypatch):
+    users = InMemoryUserRepository()
+    monkeypatch.setattr(deps, "user_repository", users)
+    user = asyncio.run(users.create(email="dev@example.com", hashed_password="hash"))
+    asyncio.run(users.update_subscription(user.id, SubscriptionPlan.BASIC, None))
+    token = create_access_token({"sub": user.email, "user_id": user.id})
+
+    with client.websocket_connect(f"/assist/generate-code/ws?token={token}") as websocket:
+        websocket.send_text("not json")
+        assert websocket.receive_json()["done"] is True
+        websocket.send_json(REQUEST.model_dump())
+        chunks = []
+        while not chunks or not chunks[-1]["done"]:
+            chunks.append(websocket.receive_json())
+    assert "say hello" in "".join(chunk.get("token", "") for chunk in chunks)
+    assert chunks[-1] == {"done": True, "language_detected": "python"}
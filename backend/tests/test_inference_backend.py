@@ -0,0 +1,98 @@
+# backend/tests/test_inference_backend.py
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.app.models.code_assistant import CodeExplanationRequest, CodeGenerationRequest, CodeRefactorRequest
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.inference_backend import (
+    HTTPInferenceBackend, InferenceError, InferenceTimeoutError, TemplateInferenceBackend,
+)
+
+USER = User.model_construct(id=1, email="dev@example.com", subscription_plan=SubscriptionPlan.PREMIUM)
+
+
+def http_backend(handler, max_concurrency: int = 4) -> HTTPInferenceBackend:
+    backend = HTTPInferenceBackend(
+        base_url="http://model", timeout=5, connect_timeout=1, max_connections=4, max_concurrency=max_concurrency,
+    )
+    backend._client = httpx.AsyncClient(base_url="http://model", transport=httpx.MockTransport(handler))
+    return backend
+
+
+def test_calls_post_the_operation_payload():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"text": "ok", "language": "python", "summary": ["tidied"]})
+
+    async def scenario():
+        backend = http_backend(handler)
+        results = [
+            await backend.generate(CodeGenerationRequest(prompt="add two numbers", language="python"), USER),
+            await backend.explain(CodeExplanationRequest(code_block="x = 1", language="python"), USER),
+            await backend.refactor(CodeRefactorRequest(code_block="x=1", language="python", refactor_goals=["DRY"]), USER),
+        ]
+        await backend.aclose()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [result.text for result in results] == ["ok"] * 3 and results[2].summary == ["tidied"]
+    assert [path for path, _ in seen] == ["/v1/generate", "/v1/explain", "/v1/refactor"]
+    assert seen[0][1]["prompt"] == "add two numbers" and seen[0][1]["user_tier"] == "premium"
+    assert seen[1][1]["code"] == "x = 1" and "goals" not in seen[1][1]
+    assert seen[2][1]["goals"] == ["DRY"]
+
+
+@pytest.mark.parametrize("response, error", [
+    (httpx.Response(500, text="boom"), InferenceError),
+    (httpx.Response(200, text="not json"), InferenceError),
+    (httpx.ReadTimeout("slow"), InferenceTimeoutError),
+])
+def test_model_failures_are_inference_errors(response, error):
+    def handler(request):
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def scenario():
+        backend = http_backend(handler)
+        try:
+            with pytest.raises(error):
+                await backend.explain(CodeExplanationRequest(code_block="x = 1"), USER)
+        finally:
+            await backend.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_capped():
+    in_flight = []
+    peak = []
+
+    async def handler(request):
+        in_flight.append(request)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return httpx.Response(200, json={"text": "ok"})
+
+    async def scenario():
+        backend = http_backend(handler, max_concurrency=2)
+        await asyncio.gather(*(
+            backend.explain(CodeExplanationRequest(code_block=f"x = {n}"), USER) for n in range(6)
+        ))
+        await backend.aclose()
+
+    asyncio.run(scenario())
+    assert max(peak) == 2
+
+
+def test_template_backend_mentions_the_user():
+    result = asyncio.run(TemplateInferenceBackend().generate(
+        CodeGenerationRequest(prompt="hello world", language="python"), USER
+    ))
+    assert "dev@example.com" in result.text and "def generated_function_for_hello_world" in result.text
@@ -0,0 +1,189 @@
+# backend/tests/test_job_queue.py
+import asyncio
+import sqlite3
+
+import pytest
+
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.job import JobStatus
+from backend.app.services import job_queue as job_queue_module
+from backend.app.services.job_queue import JobLimitError, JobQueue
+
+
+class OperationError(Exception):
+    pass
+
+
+def describe_error(exc: Exception):
+    if isinstance(exc, OperationError):
+        return 502, str(exc)
+    raise exc
+
+
+async def runner(operation, payload, user):
+    if operation == "fail":
+        raise OperationError("The code model is currently unavailable.")
+    if operation == "crash":
+        raise KeyError("missing")
+    if operation == "slow":
+        await asyncio.sleep(60)
+    return {"echo": payload, "user": user.id}
+
+
+@pytest.fixture
+def queue_factory(tmp_path, monkeypatch):
+    repository = InMemoryUserRepository()
+    monkeypatch.setattr(job_queue_module, "user_repository", repository)
+
+    def factory(**overrides):
+        options = dict(
+            path=str(tmp_path / "jobs.sqlite3"), workers=2, max_active_per_user=3, result_ttl=60,
+            heartbeat_interval=0.05, stale_after=0.3, poll_interval=0.02,
+        )
+        options.update(overrides)
+        return JobQueue(**options)
+
+    async def user():
+        return await repository.get_public(
+            (await repository.create(email="jobs@example.com", hashed_password="x")).id
+        )
+
+    factory.user = user
+    return factory
+
+
+async def finished(queue, job_id, user):
+    return await queue.wait(job_id, user, timeout=5)
+
+
+def test_job_runs_and_keeps_result(queue_factory):
+    async def scenario():
+        queue = queue_factory()
+        await queue.start(runner, describe_error)
+        user = await queue_factory.user()
+        try:
+            job = await queue.submit(user, "generate", {"prompt": "x"})
+            info = await finished(queue, job.id, user)
+            return info, await queue.result(job.id, user), queue.stats()
+        finally:
+            await queue.stop()
+
+    info, result, stats = asyncio.run(scenario())
+    assert info.status == JobStatus.SUCCEEDED and info.status_code == 200
+    assert result["echo"] == {"prompt": "x"}
+    assert stats["succeeded"] == 1
+
+
+def test_failures_are_recorded_as_the_endpoint_answers(queue_factory):
+    reported = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: reported.append(context))
+        queue = queue_factory()
+        await queue.start(runner, describe_error)
+        user = await queue_factory.user()
+        try:
+            failed = await queue.submit(user, "fail", {})
+            crashed = await queue.submit(user, "crash", {})
+            return await finished(queue, failed.id, user), await finished(queue, crashed.id, user)
+        finally:
+            await queue.stop()
+
+    failed, crashed = asyncio.run(scenario())
+    assert (failed.status, failed.status_code) == (JobStatus.FAILED, 502)
+    assert (crashed.status, crashed.status_code) == (JobStatus.FAILED, 500)
+    # The unexpected error goes to the loop's exception handler with its traceback, not to stdout
+    assert [type(context["exception"]) for context in reported] == [KeyError]
+
+
+def test_cancel_stops_a_running_job(queue_factory):
+    async def scenario():
+        queue = queue_factory()
+        await queue.start(runner, describe_error)
+        user = await queue_factory.user()
+        try:
+            job = await queue.submit(user, "slow", {})
+            while (await queue.get(job.id, user)).status != JobStatus.RUNNING:
+                await asyncio.sleep(0.01)
+            await queue.cancel(job.id, user)
+            return await finished(queue, job.id, user), queue.stats()
+        finally:
+            await queue.stop()
+
+    info, stats = asyncio.run(scenario())
+    assert info.status == JobStatus.CANCELLED
+    assert stats["running"] == 0 and stats["cancelled"] == 1
+
+
+def test_unfinished_jobs_per_user_are_limited(queue_factory):
+    async def scenario():
+        queue = queue_factory(workers=1, max_active_per_user=2)
+        await queue.start(runner, describe_error)
+        user = await queue_factory.user()
+        try:
+            await queue.submit(user, "slow", {})
+            await queue.submit(user, "slow", {})
+            with pytest.raises(JobLimitError):
+                await queue.submit(user, "slow", {})
+        finally:
+            await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_finish_is_retried_while_the_table_is_locked(queue_factory):
+    async def scenario():
+        queue = queue_factory()
+        await queue.start(runner, describe_error)
+        user = await queue_factory.user()
+        original = queue._write
+        failures = []
+
+        def locked_once(statement, parameters):
+            if statement == job_queue_module.FINISH_CLAIMED and not failures:
+                failures.append(statement)
+                raise sqlite3.OperationalError("database is locked")
+            return original(statement, parameters)
+
+        queue._write = locked_once
+        try:
+            job = await queue.submit(user, "generate", {})
+            return await finished(queue, job.id, user), failures
+        finally:
+            await queue.stop()
+
+    info, failures = asyncio.run(scenario())
+    assert info.status == JobStatus.SUCCEEDED
+    assert len(failures) == 1
+
+
+def test_job_whose_outcome_cannot_be_recorded_goes_stale_and_runs_again(queue_factory, monkeypatch):
+    monkeypatch.setattr(job_queue_module, "FINISH_ATTEMPTS", 2)
+    runs = []
+
+    async def counting_runner(operation, payload, user):
+        runs.append(operation)
+        return {}
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: None)
+        queue = queue_factory(workers=1)
+        await queue.start(counting_runner, describe_error)
+        user = await queue_factory.user()
+        original = queue._write
+
+        def locked_first_job(statement, parameters):
+            if statement == job_queue_module.FINISH_CLAIMED and len(runs) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return original(statement, parameters)
+
+        queue._write = locked_first_job
+        try:
+            job = await queue.submit(user, "generate", {})
+            return await finished(queue, job.id, user)
+        finally:
+            await queue.stop()
+
+    info = asyncio.run(scenario())
+    assert info.status == JobStatus.SUCCEEDED
+    assert len(runs) == 2  # Requeued once its heartbeat stopped, then run to completion
@@ -0,0 +1,50 @@
+# backend/tests/test_language_detector.py
+import pytest
+
+from backend.app.services.language_detector import language_detector, language_from_prompt
+
+PROMPTS = [
+    ("write a linked list in C++", "c++"),
+    ("sort an array in C#", "c#"),
+    ("a C++ class for vectors", "c++"),
+    ("use cpp templates for a matrix", "c++"),
+    ("a hash map in C", "c"),
+    ("in C, free a linked list", "c"),
+    ("parse JSON in Go", "go"),
+    ("write a golang http server", "go"),
+    ("reverse a string in Python", "python"),
+    ("a javascript promise that times out", "javascript"),
+    ("an interface in Java", "java"),
+    ("bash script to back up a directory", "shell"),
+    ("write a function that reverses a list", None),
+]
+
+CODE = [
+    ("def add(a, b):\n    return a + b\n", "python"),
+    ('#include <stdio.h>\nint main(void) {\n    printf("hi\\n");\n    return 0;\n}\n', "c"),
+    ("function add(a, b) {\n  return a + b;\n}\nconsole.log(add(1, 2));\n", "javascript"),
+    ('#!/bin/bash\nif [ "$1" -eq 0 ]; then\n  echo zero\nfi\n', "shell"),
+    ("SELECT id FROM users WHERE email = ?;", "sql"),
+]
+
+
+@pytest.mark.parametrize("prompt, language", PROMPTS)
+def test_language_from_prompt(prompt, language):
+    assert language_from_prompt(prompt) == language
+
+
+@pytest.mark.parametrize("code, language", CODE)
+def test_classify(code, language):
+    prediction = language_detector.classify(code)
+    assert prediction is not None
+    assert prediction.language == language
+    assert 0 < prediction.confidence <= 1
+
+
+def test_classify_without_evidence():
+    assert language_detector.classify("") is None
+
+
+def test_classify_many_matches_classify():
+    blocks = [code for code, _ in CODE]
+    assert language_detector.classify_many(blocks) == [language_detector.classify(code) for code in blocks]
@@ -0,0 +1,202 @@
+# backend/tests/test_local_refactor.py
+import ast
+
+import pytest
+
+from backend.app.services.local_refactor import (
+    extract_duplicated_literals, format_code, refactor_python, remove_dead_code, sort_imports,
+)
+
+MESSY = '''import os,sys
+class Config :
+  def __init__(self,path:str=None , retries:int=3):
+    self.path=path
+    self.retries = retries
+  def load(self)->dict :
+      with open(self.path) as f :
+          data=f.read( )
+      return {'lines':data.splitlines()[1 :10],'size' :len(data)}
+def main(argv = None):
+  cfg=Config(argv[0] if argv else 'config.ini',retries = 5)
+  return cfg.load()
+'''
+
+FORMATTED = '''import os, sys
+
+
+class Config:
+    def __init__(self, path: str = None, retries: int = 3):
+        self.path = path
+        self.retries = retries
+
+    def load(self) -> dict:
+        with open(self.path) as f:
+            data = f.read()
+        return {'lines': data.splitlines()[1:10], 'size': len(data)}
+
+
+def main(argv=None):
+    cfg = Config(argv[0] if argv else 'config.ini', retries=5)
+    return cfg.load()
+'''
+
+IMPORTS = '''from __future__ import annotations
+import sys
+from fastapi import HTTPException, Depends
+import os
+from .models import User
+from typing import List, Dict
+import httpx
+'''
+
+SORTED_IMPORTS = '''from __future__ import annotations
+
+import os
+import sys
+from typing import Dict, List
+
+import httpx
+from fastapi import Depends, HTTPException
+
+from .models import User
+'''
+
+DEAD = '''import json
+import os
+from typing import Dict
+
+
+def parse(text: str) -> Dict:
+    result = json.loads(text)
+    return result
+    print("parsed")
+
+
+def first(items):
+    for item in items:
+        if item:
+            return item
+            continue
+    return None
+'''
+
+DUPLICATED = '''def status(code):
+    if code == 200:
+        return "request succeeded"
+    if code == 201:
+        return "request succeeded"
+    return "request failed"
+
+
+def describe(codes):
+    return ["request succeeded" if c < 300 else "request failed" for c in codes]
+'''
+
+SPACING = [
+    ("def g(a:int=1):\n    pass\n", "def g(a: int = 1):\n    pass\n"),
+    ("def g(a : int, b = 2, *, c:str='x')->None:\n    pass\n", "def g(a: int, b=2, *, c: str = 'x') -> None:\n    pass\n"),
+    ("count:int=0\n", "count: int = 0\n"),
+    ("f(a = 1, key=lambda x:x)\n", "f(a=1, key=lambda x: x)\n"),
+    ("y = x[1 :2]\n", "y = x[1:2]\n"),
+    ("y = x[1: 2]\n", "y = x[1:2]\n"),
+    ("y = x[i+1 :]\n", "y = x[i + 1:]\n"),
+    ("y = x[lower+offset:upper+offset]\n", "y = x[lower + offset : upper + offset]\n"),
+    ("y = x[lower : : step]\n", "y = x[lower::step]\n"),
+    ("y = x[1, :]\n", "y = x[1, :]\n"),
+]
+
+TRANSFORMS = [format_code, sort_imports, remove_dead_code, extract_duplicated_literals]
+SNIPPETS = [MESSY, IMPORTS, DEAD, DUPLICATED] + [code for code, _ in SPACING]
+
+
+def test_format_code():
+    formatted, summary, warnings = format_code(MESSY)
+    assert formatted == FORMATTED
+    assert summary and not warnings
+
+
+@pytest.mark.parametrize("code, expected", SPACING)
+def test_format_spacing(code, expected):
+    assert format_code(code)[0] == expected
+
+
+@pytest.mark.parametrize("code", SNIPPETS)
+def test_format_keeps_syntax_tree(code):
+    assert ast.dump(ast.parse(format_code(code)[0])) == ast.dump(ast.parse(code))
+
+
+def test_sort_imports():
+    result, _, _ = sort_imports(IMPORTS)
+    assert result == SORTED_IMPORTS
+    # Same imports, only reordered
+    imported = lambda code: sorted(
+        ast.dump(ast.ImportFrom(module=node.module, names=[alias], level=node.level)
+                 if isinstance(node, ast.ImportFrom) else ast.Import(names=[alias]))
+        for node in ast.parse(code).body for alias in node.names
+    )
+    assert imported(result) == imported(IMPORTS)
+
+
+def test_remove_dead_code():
+    result, summary, warnings = remove_dead_code(DEAD)
+    assert "import os" not in result
+    assert 'print("parsed")' not in result and "continue" not in result
+    assert summary == [
+        "Removed unused import(s): os.",
+        "Removed 2 unreachable statement(s) after return/raise/break/continue.",
+    ]
+    assert not warnings
+    namespace = {}
+    exec(compile(result, "<refactored>", "exec"), namespace)
+    assert namespace["parse"]('{"a": 1}') == {"a": 1}
+    assert namespace["first"]([0, "", 3]) == 3
+
+
+def test_remove_dead_code_keeps_possible_reexports_and_side_effects():
+    package = '"""Package API."""\nfrom .models import User\nfrom json import dumps\n'
+    assert remove_dead_code(package)[0] == package
+    module = "import numpy as np\nimport readline\nimport myapp.signals\nfrom typing import List as List\nx = 1\n"
+    result, summary, warnings = remove_dead_code(module)
+    assert result == "import readline\nimport myapp.signals\nfrom typing import List as List\nx = 1\n"
+    assert summary == ["Removed unused import(s): np."]
+    assert warnings and all(name in warnings[0] for name in ("myapp.signals", "readline", "List as List"))
+
+
+def test_remove_dead_code_trusts_all():
+    result, summary, warnings = remove_dead_code("from .a import b, c\n__all__ = ['b']\n")
+    assert result == "from .a import b\n__all__ = ['b']\n"
+    assert not warnings
+
+
+def test_extract_duplicated_literals():
+    result, summary, _ = extract_duplicated_literals(DUPLICATED)
+    assert result.startswith('REQUEST_SUCCEEDED = "request succeeded"\n')
+    assert result.count('"request succeeded"') == 1
+    assert result.count('"request failed"') == 2  # Below DRY_MIN_OCCURRENCES
+    assert summary == ["Extracted the string 'request succeeded' (3 uses) into the constant REQUEST_SUCCEEDED."]
+    before, after = {}, {}
+    exec(compile(DUPLICATED, "<original>", "exec"), before)
+    exec(compile(result, "<refactored>", "exec"), after)
+    for code in (200, 201, 404):
+        assert after["status"](code) == before["status"](code)
+    assert after["describe"]([200, 500]) == before["describe"]([200, 500])
+
+
+@pytest.mark.parametrize("transform", TRANSFORMS, ids=lambda transform: transform.__name__)
+@pytest.mark.parametrize("code", SNIPPETS)
+def test_transforms_are_idempotent(transform, code):
+    once = transform(code)[0]
+    assert transform(once)[0] == once
+
+
+def test_refactor_python():
+    result = refactor_python(MESSY.replace("\n", "\r\n"), ["PEP 8", "remove unused imports", "add type hints"])
+    assert result is not None
+    assert result.remaining_goals == ["add type hints"]
+    assert result.code == FORMATTED.replace("import os, sys\n", "").replace("\n", "\r\n").lstrip("\r\n")
+    assert "Removed unused import(s): os, sys." in result.summary
+
+
+def test_refactor_python_leaves_other_goals_to_the_model():
+    assert refactor_python(MESSY, ["add type hints"]) is None
+    assert refactor_python("def broken(:\n", ["format"]) is None
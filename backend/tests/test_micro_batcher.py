@@ -0,0 +1,81 @@
+# backend/tests/test_micro_batcher.py
+import asyncio
+
+import pytest
+
+from backend.app.services.micro_batcher import MicroBatcher
+
+
+def recording_batcher(**options):
+    batches = []
+
+    async def run_batch(items):
+        batches.append(list(items))
+        await asyncio.sleep(0)
+        return [ValueError(item) if item < 0 else item * 10 for item in items]
+
+    return MicroBatcher(run_batch, **options), batches
+
+
+def test_full_batch_is_dispatched_without_waiting():
+    async def scenario():
+        batcher, batches = recording_batcher(max_batch_size=3, max_wait=60)
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(n) for n in range(6))), timeout=5)
+        return results, batches, batcher.stats()
+
+    results, batches, stats = asyncio.run(scenario())
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+    assert stats == {"batches": 2, "items": 6, "mean_batch_size": 3.0}
+
+
+def test_partial_batch_is_dispatched_after_max_wait():
+    async def scenario():
+        batcher, batches = recording_batcher(max_batch_size=10, max_wait=0.02)
+        first = asyncio.create_task(batcher.submit(1))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(batcher.submit(2))
+        await asyncio.sleep(0)
+        assert batches == []  # Still collecting
+        return await asyncio.gather(first, second), batches
+
+    results, batches = asyncio.run(scenario())
+    assert results == [10, 20]
+    assert batches == [[1, 2]]
+
+
+def test_errors_reach_only_their_callers():
+    async def scenario():
+        batcher, _ = recording_batcher(max_batch_size=3, max_wait=60)
+        return await asyncio.gather(*(batcher.submit(n) for n in (1, -1, 2)), return_exceptions=True)
+
+    ok, failed, other = asyncio.run(scenario())
+    assert (ok, other) == (10, 20)
+    assert isinstance(failed, ValueError)
+
+
+def test_failed_batch_fails_every_caller():
+    async def run_batch(items):
+        raise ConnectionError("model server down")
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait=60)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(scenario())] == [ConnectionError, ConnectionError]
+
+
+def test_cancelled_callers_are_left_out_of_the_batch():
+    async def scenario():
+        batcher, batches = recording_batcher(max_batch_size=10, max_wait=0.02)
+        gone = asyncio.create_task(batcher.submit(1))
+        kept = asyncio.create_task(batcher.submit(2))
+        await asyncio.sleep(0)
+        gone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        return await kept, batches
+
+    result, batches = asyncio.run(scenario())
+    assert result == 20
+    assert batches == [[2]]
@@ -0,0 +1,40 @@
+# backend/tests/test_password_hasher.py
+import asyncio
+
+import pytest
+
+from backend.app.core.security import PasswordHasher, PasswordHasherBusyError
+
+
+@pytest.fixture
+def hasher():
+    pool = PasswordHasher(max_workers=1, max_pending=1, retry_after=3)
+    yield pool
+    pool.shutdown()
+
+
+def test_hash_and_verify_in_the_pool(hasher):
+    async def scenario():
+        hashed = await hasher.hash("correct horse")
+        return hashed, await hasher.verify("correct horse", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, right, wrong = asyncio.run(scenario())
+    assert hashed.startswith("$2") and right and not wrong
+    assert hasher.pending == 0
+
+
+def test_submissions_past_max_pending_are_rejected(hasher):
+    async def scenario():
+        first = asyncio.create_task(hasher.hash("one"))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusyError) as busy:
+            await hasher.hash("two")
+        first.cancel()  # The caller went away; the slot is released when the job itself finishes
+        await asyncio.gather(first, return_exceptions=True)
+        while hasher.pending:
+            await asyncio.sleep(0.01)
+        return busy.value, await hasher.hash("three")
+
+    busy, hashed = asyncio.run(scenario())
+    assert busy.retry_after == 3
+    assert hashed.startswith("$2")
@@ -0,0 +1,104 @@
+# backend/tests/test_project_workspace.py
+import asyncio
+import os
+
+import pytest
+
+from backend.app.models.user import User
+from backend.app.services.project_workspace import ProjectLimitError, ProjectNotFoundError, ProjectStore
+
+OWNER = User.model_construct(id=1, email="owner@example.com")
+OTHER = User.model_construct(id=2, email="other@example.com")
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """Stores over one database file, as in separate worker processes; closed after the test."""
+    opened = []
+
+    def open_store(**overrides):
+        options = dict(
+            max_projects_per_user=2, max_files=10, max_file_bytes=1000, max_bytes=4000,
+            path=str(tmp_path / "projects.sqlite3"), retrieval_dir=str(tmp_path / "vectors"),
+        )
+        options.update(overrides)
+        opened.append(ProjectStore(**options))
+        return opened[-1]
+
+    yield open_store
+    for store in opened:
+        store.close()
+
+
+def test_upload_parses_only_changed_files(stores):
+    async def scenario():
+        store = stores()
+        project = await store.create(OWNER, "app")
+        first = await store.update(project, {"a.py": "def alpha():\n    pass\n", "b.py": "def beta():\n    pass\n"})
+        second = await store.update(project, {"a.py": "def alpha():\n    pass\n", "b.py": "def gamma():\n    pass\n"})
+        return first, second, project
+
+    first, second, project = asyncio.run(scenario())
+    assert (first.parsed, first.unchanged) == (2, 0)
+    assert (second.parsed, second.unchanged) == (1, 1)
+    assert [definition.name for definition in project.index.lookup("gamma")] == ["gamma"]
+    assert project.index.lookup("beta") == []
+
+
+def test_limits(stores):
+    async def scenario():
+        store = stores()
+        project = await store.create(OWNER, "app")
+        await store.create(OWNER, "lib")
+        with pytest.raises(ProjectLimitError):
+            await store.create(OWNER, "third")
+        with pytest.raises(ProjectLimitError):
+            await store.update(project, {f"f{n}.py": "x = 1\n" for n in range(11)})
+        return await store.update(project, {"big.py": "x" * 1001, "small.py": "y = 2\n"})
+
+    result = asyncio.run(scenario())
+    assert result.skipped == ["big.py"] and result.project.files == 1
+
+
+def test_workers_share_projects_and_see_each_others_changes(stores):
+    async def scenario():
+        first, second = stores(), stores()
+        project = await first.create(OWNER, "app")
+        await first.update(project, {"a.py": "def alpha():\n    pass\n"})
+        seen = await second.get(project.id, OWNER)
+        await second.update(seen, {"b.py": "def beta():\n    pass\n"}, deleted=["a.py"])
+        reloaded = await first.get(project.id, OWNER)
+        with pytest.raises(ProjectNotFoundError):
+            await second.get(project.id, OTHER)
+        await second.delete(project.id, OWNER)
+        with pytest.raises(ProjectNotFoundError):
+            await first.get(project.id, OWNER)
+        return sorted(reloaded.files), await stores().list(OWNER)
+
+    files, remaining = asyncio.run(scenario())
+    assert files == ["b.py"]
+    assert remaining == []
+
+
+def test_least_recently_used_workspaces_are_evicted_and_rebuilt(stores, tmp_path):
+    async def scenario():
+        store = stores(max_projects_per_user=10, max_loaded=2)
+        projects = []
+        for name in ("one", "two", "three"):
+            project = await store.create(OWNER, name)
+            await store.update(project, {"main.py": f"def {name}():\n    pass\n"})
+            await store.retrieve(project, name, 1)
+            projects.append(project)
+        loaded = list(store._projects)
+        evicted = projects[0]
+        rebuilt = await store.get(evicted.id, OWNER)
+        found = await store.retrieve(rebuilt, "one", 1)
+        return [project.id for project in projects], loaded, evicted, rebuilt, found, list(store._projects)
+
+    ids, loaded, evicted, rebuilt, found, loaded_after = asyncio.run(scenario())
+    assert loaded == ids[1:]
+    assert evicted.retrieval is None
+    assert rebuilt is not evicted and sorted(rebuilt.files) == ["main.py"]
+    assert [chunk.path for chunk, _ in found] == ["main.py"]
+    assert loaded_after == [ids[2], ids[0]]
+    assert len(os.listdir(next((tmp_path / "vectors").iterdir()))) == 2  # The evicted index's file is removed
@@ -0,0 +1,76 @@
+# backend/tests/test_response_cache.py
+import asyncio
+
+from backend.app.services import response_cache as response_cache_module
+from backend.app.services.response_cache import ResponseCache, cache_key, normalize_code, normalize_text
+
+
+def test_keys_ignore_formatting_that_does_not_change_the_answer():
+    code = "def f():\r\n    return 1   \r\n\r\n"
+    assert normalize_code(code) == "def f():\n    return 1"
+    assert normalize_text("  reverse   a\nlist ") == "reverse a list"
+    assert cache_key("explain", {"code": normalize_code(code), "language": "python"}) == cache_key(
+        "explain", {"language": "python", "code": "def f():\n    return 1"}
+    )
+    assert cache_key("explain", {"code": "x"}) != cache_key("refactor", {"code": "x"})
+
+
+def test_memory_tier_is_a_bounded_lru_with_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, "time", lambda: now[0])
+    cache = ResponseCache(max_entries=2, ttl=10)
+
+    async def scenario():
+        await cache.put("a", {"n": 1})
+        await cache.put("b", {"n": 2})
+        await cache.get("a")  # Now the most recently used
+        await cache.put("c", {"n": 3})
+        lookups = [await cache.get(key) for key in ("a", "b", "c")]
+        now[0] += 10
+        return lookups, await cache.get("a")
+
+    lookups, expired = asyncio.run(scenario())
+    assert lookups == [{"n": 1}, None, {"n": 3}]
+    assert expired is None
+    assert cache.stats()["memory_hits"] == 3 and cache.stats()["misses"] == 2
+
+
+def test_disk_tier_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = ResponseCache(max_entries=10, ttl=60, disk_path=path)
+    second = ResponseCache(max_entries=10, ttl=60, disk_path=path)
+
+    async def scenario():
+        await first.put("key", {"code": "x = 1"})
+        return await second.get("key"), await second.get("key")
+
+    try:
+        from_disk, from_memory = asyncio.run(scenario())
+    finally:
+        first.close()
+        second.close()
+    assert from_disk == from_memory == {"code": "x = 1"}
+    assert (second.stats()["disk_hits"], second.stats()["memory_hits"]) == (1, 1)
+
+
+def test_caches_sharing_a_disk_file_prune_only_their_own_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache_module, "PRUNE_EVERY", 1)
+    path = str(tmp_path / "cache.sqlite3")
+    responses = ResponseCache(max_entries=0, ttl=60, disk_path=path, disk_max_entries=2)
+    bases = ResponseCache(max_entries=0, ttl=60, disk_path=path, disk_max_entries=2, table="refactor_bases")
+
+    async def scenario():
+        await bases.put("base", {"code": "x = 1"})
+        for n in range(5):
+            await responses.put(f"response-{n}", {"n": n})
+        await bases.put("response-4", {"code": "y = 2"})  # Same key, different cache
+        return await bases.get("base"), await responses.get("response-4"), await responses.get("response-0")
+
+    try:
+        base, response, pruned = asyncio.run(scenario())
+    finally:
+        responses.close()
+        bases.close()
+    assert base == {"code": "x = 1"}
+    assert response == {"n": 4}
+    assert pruned is None
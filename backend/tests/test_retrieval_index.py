@@ -0,0 +1,66 @@
+# backend/tests/test_retrieval_index.py
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.app.services.retrieval_index import CodeEmbedder, RetrievalIndex, chunk_lines
+
+FILES = {
+    "billing/discounts.py": "def apply_discount(order, percent):\n    return order.total * (1 - percent / 100)\n",
+    "auth/tokens.py": "def refresh_access_token(session):\n    session.token = issue_token(session.user)\n",
+    "search/ranking.py": "class ResultRanker:\n    def rank(self, results):\n        return sorted(results)\n",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    retrieval = RetrievalIndex(str(tmp_path / "vectors.f32"), dimensions=128, max_chunk_lines=40, initial_capacity=2)
+    yield retrieval
+    retrieval.close()
+
+
+def add(index, files):
+    index.apply({path: index.prepare(path, content, boundaries=[1]) for path, content in files.items()})
+
+
+def test_chunks_break_at_definitions_and_skip_blank_runs():
+    content = "\n".join(["def a():"] + ["    pass"] * 4 + ["", "", "def b():", "    pass"])
+    assert chunk_lines(content, boundaries=[1, 8], max_lines=4) == [(1, 4), (5, 7), (8, 9)]
+    assert chunk_lines("\n\n\n", boundaries=[], max_lines=4) == []
+
+
+def test_prompt_words_match_identifier_parts():
+    embedder = CodeEmbedder(256)
+    code, prompt, unrelated = embedder.embed_many(["apply_discount(order)", "discounts on an order", "refresh token"])
+    assert np.isclose(np.linalg.norm(code), 1.0)
+    assert code @ prompt > code @ unrelated
+
+
+def test_search_finds_the_relevant_chunk(index):
+    add(index, FILES)
+    found = asyncio.run(index.search("how are discounts applied to an order", 2))
+    assert found[0][0].path == "billing/discounts.py"
+    assert len(index) == 3 and index.nbytes >= 3 * 128 * 4  # Grown past its initial capacity
+
+
+def test_changed_and_removed_files_replace_their_rows(index):
+    add(index, FILES)
+    rows = len(index.chunks)
+    add(index, {"auth/tokens.py": "def revoke_session(session):\n    session.revoked = True\n"})
+    index.apply({}, removed=["search/ranking.py"])
+    assert len(index.chunks) == rows  # The replaced file reused its freed row
+    assert len(index) == 2
+    assert asyncio.run(index.search("result ranker", 3)) == []
+    assert asyncio.run(index.search("revoke the session", 1))[0][0].path == "auth/tokens.py"
+
+
+def test_block_search_matches_a_full_scan(index, monkeypatch):
+    monkeypatch.setattr("backend.app.services.retrieval_index.SEARCH_BLOCK_ROWS", 2)
+    add(index, {f"module_{n}.py": f"def handler_{n}(request_{n % 3}):\n    return {n}\n" for n in range(9)})
+    queries = index.embedder.embed_many(["handler request_1", "request_2"])
+    rows, scores = index.search_vectors(queries, 3)
+    full = queries @ np.asarray(index._vectors[:len(index.chunks)]).T
+    for query, expected in enumerate(full):
+        assert np.allclose(scores[query], np.sort(expected)[::-1][:3])
+        assert np.allclose(full[query, rows[query]], scores[query])
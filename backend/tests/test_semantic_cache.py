@@ -0,0 +1,67 @@
+# backend/tests/test_semantic_cache.py
+import asyncio
+
+import pytest
+
+from backend.app.core.config import settings
+from backend.app.services.semantic_cache import HashingEmbedder, SemanticCache
+
+# Prompts that ask for different code: a cache hit would return the wrong generation
+DIFFERENT = [
+    ("read a file line by line", "write a file line by line"),
+    ("convert celsius to fahrenheit", "convert fahrenheit to celsius"),
+    ("write a function to convert celsius to fahrenheit", "write a function to convert fahrenheit to celsius"),
+    ("convert a string to an int", "convert an int to a string"),
+    ("sort a list in ascending order", "sort a list in descending order"),
+    ("find the maximum of a list", "find the minimum of a list"),
+    ("write a function to reverse a list", "write a function to reverse a string"),
+    ("write a function that reads a file", "write a function that writes a file"),
+    ("encode a string as base64", "decode a base64 string"),
+    ("create a table in sqlite", "drop a table in sqlite"),
+]
+
+# Rewordings of the same request
+SAME = [
+    ("write a function to reverse a list", "function that reverses a list"),
+    ("write a function that reverses a list", "Write a function to reverse a list."),
+    ("Please write a function to reverse a list", "write a function to reverse a list"),
+    ("create a function that sorts a list of numbers", "write a function to sort a list of numbers"),
+    ("implement binary search", "implement a binary search"),
+]
+
+
+def similarity(first: str, second: str) -> float:
+    embedder = HashingEmbedder(settings.SEMANTIC_CACHE_DIMENSIONS)
+    return float(embedder.embed(first) @ embedder.embed(second))
+
+
+@pytest.mark.parametrize("first, second", DIFFERENT)
+def test_different_requests_stay_below_threshold(first, second):
+    assert similarity(first, second) < settings.SEMANTIC_CACHE_THRESHOLD
+
+
+@pytest.mark.parametrize("first, second", SAME)
+def test_rewordings_reach_threshold(first, second):
+    assert similarity(first, second) >= settings.SEMANTIC_CACHE_THRESHOLD
+
+
+def test_cache_serves_rewording_but_not_reversed_request():
+    cache = SemanticCache(
+        max_entries=100,
+        dimensions=settings.SEMANTIC_CACHE_DIMENSIONS,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        ttl=60,
+    )
+
+    async def lookups():
+        cache.put("write a function to convert celsius to fahrenheit", scope=1, value={"generated_code": "c_to_f"})
+        return (
+            await cache.get("function that converts celsius to fahrenheit", scope=1),
+            await cache.get("write a function to convert fahrenheit to celsius", scope=1),
+            await cache.get("function that converts celsius to fahrenheit", scope=2),
+        )
+
+    rewording, reversed_request, other_scope = asyncio.run(lookups())
+    assert rewording == {"generated_code": "c_to_f"}
+    assert reversed_request is None
+    assert other_scope is None
@@ -0,0 +1,70 @@
+# backend/tests/test_single_flight.py
+import asyncio
+
+import pytest
+
+from backend.app.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def fetch():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return {"answer": 42}
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)))
+        again = await flights.do("key", fetch)  # Finished calls are not kept
+        return results, again, flights.stats()
+
+    results, again, stats = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results) and again == {"answer": 42}
+    assert stats == {"in_flight": 0, "leaders": 2, "coalesced": 4, "cancelled": 0}
+
+
+def test_errors_reach_every_waiter():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("model unavailable")
+
+    async def scenario():
+        flights = SingleFlight()
+        return await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError] * 3
+
+
+def test_call_outlives_a_cancelled_waiter_and_stops_with_the_last():
+    started, finished = [], []
+
+    async def slow():
+        started.append(None)
+        await asyncio.sleep(0.05)
+        finished.append(None)
+        return "done"
+
+    async def scenario():
+        flights = SingleFlight()
+        first = asyncio.create_task(flights.do("key", slow))
+        second = asyncio.create_task(flights.do("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()  # The leader's client went away; the other caller still gets the result
+        result = await second
+
+        lone = asyncio.create_task(flights.do("other", slow))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lone
+        await asyncio.sleep(0.1)
+        return result, flights.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == "done"
+    assert (len(started), len(finished)) == (2, 1)  # The abandoned call was cancelled, not run to the end
+    assert stats["cancelled"] == 1 and stats["in_flight"] == 0
@@ -0,0 +1,54 @@
+# backend/tests/test_subscription_expiry.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from backend.app.db.expiry_index import ExpiryIndex
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.user import SubscriptionPlan
+from backend.app.services import subscription_sweeper as sweeper_module
+from backend.app.services.subscription_sweeper import SubscriptionExpirySweeper
+
+
+def test_due_entries_pop_earliest_first_and_rescheduling_wins():
+    index = ExpiryIndex()
+    index.schedule(1, 30.0)
+    index.schedule(2, 10.0)
+    index.schedule(3, 20.0)
+    index.schedule(1, 5.0)  # Renewed to an earlier date: the old entry must not fire
+    index.schedule(3, None)  # Downgraded by hand
+    assert index.pop_due(now=25.0, limit=10) == [(1, 5.0), (2, 10.0)]
+    assert index.pop_due(now=100.0, limit=10) == []
+    assert len(index) == 0
+
+
+def test_pop_due_respects_the_limit_and_load_replaces_the_contents():
+    index = ExpiryIndex()
+    index.load({user_id: float(user_id) for user_id in range(1, 6)})
+    assert index.pop_due(now=10.0, limit=2) == [(1, 1.0), (2, 2.0)]
+    assert len(index) == 3
+    for _ in range(3000):  # Rescheduling leaves stale entries behind; they are compacted away
+        index.schedule(3, 50.0)
+        index.schedule(3, 3.0)
+    assert len(index._heap) <= 2 * len(index) + 1024 + 1
+    assert index.pop_due(now=10.0, limit=10) == [(3, 3.0), (4, 4.0), (5, 5.0)]
+
+
+def test_sweeper_downgrades_due_users_in_batches(monkeypatch):
+    repository = InMemoryUserRepository()
+    monkeypatch.setattr(sweeper_module, "user_repository", repository)
+    now = datetime.now(timezone.utc)
+
+    async def scenario():
+        for n in range(5):
+            user = await repository.create(email=f"user{n}@example.com", hashed_password="hash")
+            expires_at = now + (timedelta(hours=1) if n == 4 else -timedelta(minutes=n + 1))
+            await repository.update_subscription(user.id, SubscriptionPlan.PRO, expires_at)
+        sweeper = SubscriptionExpirySweeper(interval=60, batch_size=2)
+        processed = await sweeper.sweep_once()
+        plans = [(await repository.get(user_id)).subscription_plan for user_id in range(1, 6)]
+        return processed, plans, sweeper.stats()
+
+    processed, plans, stats = asyncio.run(scenario())
+    assert processed == 4
+    assert plans == [SubscriptionPlan.NONE] * 4 + [SubscriptionPlan.PRO]
+    assert stats["processed_total"] == 4 and 4 * 60 <= stats["last_lag_seconds"] < 4 * 60 + 30
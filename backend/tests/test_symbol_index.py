@@ -0,0 +1,47 @@
+# backend/tests/test_symbol_index.py
+import pytest
+
+from backend.app.services.symbol_index import SymbolIndex, block_end, content_digest, parse_file
+
+SOURCES = [
+    ("app/models.py", "MAX_ITEMS = 10\n\nclass Cart:\n    async def add(self, item):\n        pass\n",
+     [("MAX_ITEMS", "constant", 1), ("Cart", "class", 3), ("add", "function", 4)]),
+    ("web/api.ts", "export interface Order {}\nexport const total = (order: Order) => 0;\ntype Id = string;\n",
+     [("Order", "class", 1), ("total", "function", 2), ("Id", "type", 3)]),
+    ("src/Main.java", "public class Main {\n    public static void main(String[] args) {\n        if (x) {}\n    }\n}\n",
+     [("Main", "class", 1), ("main", "function", 2)]),
+    ("lib/list.c", "#define SIZE 4\nstruct node {\n};\nint length(struct node *head)\n{\n    return 0;\n}\n",
+     [("SIZE", "constant", 1), ("node", "class", 2), ("length", "function", 4)]),
+    ("cmd/main.go", "type Server struct{}\nfunc (s *Server) Start() {}\n",
+     [("Server", "class", 1), ("Start", "function", 2)]),
+    ("README.md", "# def not_code():\n", []),
+]
+
+
+@pytest.mark.parametrize("path, content, expected", SOURCES)
+def test_parse_file(path, content, expected):
+    symbols = parse_file(path, content)
+    assert [(d.name, d.kind, d.line) for d in symbols.definitions] == expected
+    assert symbols.digest == content_digest(content)
+
+
+def test_block_end():
+    lines = "def outer():\n    x = 1\n\n    return x\nafter = 2\n".split("\n")
+    assert block_end(lines, 0) == 3
+    braces = "int f()\n{\n    return 1;\n}\nint g;\n".split("\n")
+    assert block_end(braces, 0) == 3
+
+
+def test_index_replaces_changed_files_and_forgets_removed_ones():
+    index = SymbolIndex()
+    first = parse_file("a.py", "def shared():\n    pass\n")
+    index.apply([first, parse_file("b.py", "def shared():\n    pass\ndef only_b():\n    pass\n")])
+    assert [d.path for d in index.lookup("shared")] == ["a.py", "b.py"] and index.symbol_count == 3
+
+    changed = "def renamed():\n    pass\n"
+    assert not index.needs_parse("a.py", first.digest)
+    assert index.needs_parse("a.py", content_digest(changed))
+    index.apply([parse_file("a.py", changed)], removed=["b.py"])
+    assert index.lookup("shared") == [] and index.lookup("only_b") == []
+    assert [d.path for d in index.lookup("renamed")] == ["a.py"]
+    assert index.symbol_count == 1 and "shared" not in index.definitions
@@ -0,0 +1,75 @@
+# backend/tests/test_token_cache.py
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.api import deps
+from backend.app.core import security
+from backend.app.core.token_cache import VerifiedTokenCache
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.user import TokenData
+
+
+def claims(user_id: int) -> TokenData:
+    return TokenData(email=f"user{user_id}@example.com", user_id=user_id)
+
+
+def test_entries_expire_with_their_token():
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("live", claims(1), expires_at=time.time() + 60)
+    cache.put("expired", claims(1), expires_at=time.time() - 1)
+    assert cache.get("live") == claims(1)
+    assert cache.get("expired") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_entries=2)
+    expires_at = time.time() + 60
+    cache.put("a", claims(1), expires_at)
+    cache.put("b", claims(2), expires_at)
+    cache.get("a")
+    cache.put("c", claims(3), expires_at)
+    assert [cache.get(token) is not None for token in ("a", "b", "c")] == [True, False, True]
+
+
+def test_invalidate_user_drops_all_of_their_tokens():
+    cache = VerifiedTokenCache(max_entries=10)
+    expires_at = time.time() + 60
+    cache.put("first", claims(1), expires_at)
+    cache.put("second", claims(1), expires_at)
+    cache.put("other", claims(2), expires_at)
+    cache.invalidate_user(1)
+    assert [cache.get(token) is not None for token in ("first", "second", "other")] == [False, False, True]
+
+
+def test_disabled_cache_keeps_nothing():
+    cache = VerifiedTokenCache(max_entries=0)
+    cache.put("token", claims(1), time.time() + 60)
+    assert cache.get("token") is None
+
+
+def test_repeat_requests_skip_the_signature_check(monkeypatch):
+    repository = InMemoryUserRepository()
+    monkeypatch.setattr(deps, "user_repository", repository)
+    monkeypatch.setattr(deps, "token_cache", VerifiedTokenCache(max_entries=10))
+    decode = security.decode_access_token
+    decoded = []
+    monkeypatch.setattr(security, "decode_access_token", lambda token: decoded.append(token) or decode(token))
+
+    async def scenario():
+        user = await repository.create(email="auth@example.com", hashed_password="hash")
+        token = security.create_access_token({"sub": user.email, "user_id": user.id})
+        first = await deps.get_user_for_token(token)
+        second = await deps.get_user_for_token(token)
+        with pytest.raises(HTTPException):
+            await deps.get_user_for_token("not-a-token")
+        with pytest.raises(HTTPException):
+            await deps.get_user_for_token("not-a-token")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.id == second.id == 1
+    assert len(decoded) == 3  # Once for the valid token; invalid ones are checked every time
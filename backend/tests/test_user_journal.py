@@ -0,0 +1,88 @@
+# backend/tests/test_user_journal.py
+import asyncio
+import glob
+import os
+
+from backend.app.db.columnar_user_repository import ColumnarUserRepository
+from backend.app.db.user_journal import UserJournal
+from backend.app.models.user import SubscriptionPlan
+
+
+def repository(directory, compact_every=100000):
+    return ColumnarUserRepository(journal=UserJournal(str(directory), compact_every=compact_every))
+
+
+def test_restart_restores_snapshot_and_log_tail(tmp_path):
+    async def scenario():
+        users = repository(tmp_path, compact_every=5)
+        await users.connect()
+        for n in range(12):
+            await users.create(email=f"user{n}@example.com", hashed_password="hash")
+        await users.update(3, full_name="Renamed", email="renamed@example.com")  # Was user2@example.com
+        await users.update_subscription(4, SubscriptionPlan.PRO, None)
+        await users.close()
+
+        restarted = repository(tmp_path, compact_every=5)
+        await restarted.connect()
+        try:
+            return (
+                await restarted.count(),
+                await restarted.get_by_email("RENAMED@example.com"),
+                await restarted.get_by_email("user2@example.com"),
+                await restarted.get(4),
+            )
+        finally:
+            await restarted.close()
+
+    count, renamed, old_email, upgraded = asyncio.run(scenario())
+    assert count == 12
+    assert renamed.id == 3 and renamed.full_name == "Renamed"
+    assert old_email is None
+    assert upgraded.subscription_plan == SubscriptionPlan.PRO
+    assert os.path.exists(tmp_path / "users.snapshot")
+
+
+def test_torn_write_is_truncated_and_later_appends_survive(tmp_path):
+    async def scenario():
+        users = repository(tmp_path)
+        await users.connect()
+        for n in range(3):
+            await users.create(email=f"user{n}@example.com", hashed_password="hash")
+        await users.close()
+        with open(sorted(glob.glob(str(tmp_path / "log-*.jsonl")))[-1], "ab") as f:
+            f.write(b'{"id":4,"ema')  # A crash in the middle of a write
+
+        users = repository(tmp_path)
+        await users.connect()
+        await users.create(email="after@example.com", hashed_password="hash")
+        await users.close()
+
+        users = repository(tmp_path)
+        await users.connect()
+        try:
+            return [user.email for user in users.iter_rows()]
+        finally:
+            await users.close()
+
+    assert asyncio.run(scenario()) == [
+        "user0@example.com", "user1@example.com", "user2@example.com", "after@example.com",
+    ]
+
+
+def test_close_settles_waiters(tmp_path):
+    async def scenario():
+        journal = UserJournal(str(tmp_path), fsync_interval=0.05)
+        await journal.open()
+        journal.append({"id": 1})
+        waiter = asyncio.create_task(journal.wait_durable())
+        await asyncio.sleep(0)  # The waiter starts a group, which the flush loop has not synced yet
+        journal.append({"id": 2})
+        closing = asyncio.create_task(journal.close())
+        await asyncio.sleep(0)
+        late = asyncio.create_task(journal.wait_durable())  # Called while closing: must not start a group
+        await asyncio.wait_for(asyncio.gather(waiter, closing, late), timeout=5)
+        await asyncio.wait_for(journal.wait_durable(), timeout=5)  # After close: nothing left to sync
+        return list(journal.replay(after_lsn=0))
+
+    records = asyncio.run(scenario())
+    assert [record["id"] for record in records] == [1, 2]
@@ -0,0 +1,171 @@
+# backend/tests/test_user_repositories.py
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.app.db.base import EmailAlreadyRegisteredError
+from backend.app.db.columnar_user_repository import ColumnarUserRepository
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.db.sqlite_user_repository import SQLiteUserRepository
+from backend.app.models.user import SubscriptionPlan
+
+
+def sqlite_repository(path, **options):
+    return SQLiteUserRepository(f"sqlite+aiosqlite:///{path / 'users.sqlite3'}", sync_interval=0.05, **options)
+
+
+BACKENDS = {
+    "memory": lambda path: InMemoryUserRepository(),
+    "columnar": lambda path: ColumnarUserRepository(),
+    "sqlite": sqlite_repository,
+}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def run(request, tmp_path):
+    """Run `scenario(users)` against a connected repository of each backend."""
+    def runner(scenario):
+        async def connected():
+            users = BACKENDS[request.param](tmp_path)
+            await users.connect()
+            try:
+                return await scenario(users)
+            finally:
+                await users.close()
+
+        return asyncio.run(connected())
+
+    return runner
+
+
+def test_create_and_look_up(run):
+    async def scenario(users):
+        created = await users.create(email="Ada@Example.com", hashed_password="hash", full_name="Ada")
+        with pytest.raises(EmailAlreadyRegisteredError):
+            await users.create(email="ada@example.COM", hashed_password="other")
+        return created, await users.get(created.id), await users.get_by_email("ADA@example.com"), await users.count()
+
+    created, by_id, by_email, count = run(scenario)
+    assert by_id.email == by_email.email == "Ada@example.com"
+    assert by_id.id == by_email.id == created.id
+    assert count == 1
+
+
+def test_update_changes_only_the_given_fields_and_the_version(run):
+    async def scenario(users):
+        user = await users.create(email="a@example.com", hashed_password="hash", full_name="A")
+        before = await users.version(user.id)
+        await users.update(user.id, full_name="Renamed", hashed_password="new")
+        await users.create(email="b@example.com", hashed_password="hash")
+        with pytest.raises(EmailAlreadyRegisteredError):
+            await users.update(user.id, email="B@example.com")
+        return (
+            before, await users.version(user.id), await users.get(user.id),
+            await users.get_public(user.id), await users.update(12345, full_name="x"),
+        )
+
+    before, after, stored, public, missing = run(scenario)
+    assert after > before
+    assert (stored.id, stored.full_name, stored.hashed_password, stored.email) == (1, "Renamed", "new", "a@example.com")
+    assert public.full_name == "Renamed" and not hasattr(public, "hashed_password")
+    assert missing is None
+
+
+def test_results_are_snapshots_and_projections_follow_updates(run):
+    async def scenario(users):
+        created = await users.create(email="a@example.com", hashed_password="hash", full_name="A")
+        first = await users.get_public(created.id)
+        cached = await users.get_public(created.id)
+        updated = await users.update(created.id, full_name="B")
+        await users.update(created.id, full_name="C")
+        return created, first, cached, updated, await users.get_public(created.id)
+
+    created, first, cached, updated, current = run(scenario)
+    assert created.full_name == "A" and updated.full_name == "B"  # Not changed by later writes
+    assert first is cached and first.full_name == "A"
+    assert current.full_name == "C"
+
+
+def test_expire_due_subscriptions(run):
+    now = datetime.now(timezone.utc)
+
+    async def scenario(users):
+        for n, expires_at in enumerate([now - timedelta(hours=1), now - timedelta(hours=2), now + timedelta(hours=1)]):
+            user = await users.create(email=f"user{n}@example.com", hashed_password="hash")
+            await users.update_subscription(user.id, SubscriptionPlan.PRO, expires_at)
+        due = await users.expire_due_subscriptions(now.timestamp(), limit=10)
+        return due, [(await users.get_public(user_id)).subscription_plan for user_id in (1, 2, 3)]
+
+    due, plans = run(scenario)
+    assert [user_id for user_id, _ in due] == [2, 1]  # Earliest expiry first
+    assert plans == [SubscriptionPlan.NONE, SubscriptionPlan.NONE, SubscriptionPlan.PRO]
+
+
+def test_sqlite_workers_see_each_others_changes(tmp_path):
+    async def scenario():
+        first, second = sqlite_repository(tmp_path), sqlite_repository(tmp_path)
+        await first.connect()
+        await second.connect()
+        changed = []
+        second.add_change_listener(changed.append)
+        try:
+            user = await first.create(email="shared@example.com", hashed_password="hash")
+            assert (await second.get_public(user.id)).subscription_plan == SubscriptionPlan.NONE
+            await first.update_subscription(user.id, SubscriptionPlan.PRO, None)
+            deadline = time.monotonic() + 5
+            while not changed and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            return changed, await second.get_public(user.id), await second.version(user.id)
+        finally:
+            await first.close()
+            await second.close()
+
+    changed, public, version = asyncio.run(scenario())
+    assert changed == [1]
+    assert public.subscription_plan == SubscriptionPlan.PRO
+    assert version == 2
+
+
+def test_sqlite_cache_is_bounded(tmp_path):
+    async def scenario():
+        users = sqlite_repository(tmp_path, cache_size=3)
+        await users.connect()
+        try:
+            for n in range(10):
+                await users.create(email=f"user{n}@example.com", hashed_password="hash")
+            await users.get_public(1)  # Reloaded from the database, evicting the least recently used
+            return list(users._cached), await users.version(2), (await users.get_public(2)).email
+        finally:
+            await users.close()
+
+    cached, version, email = asyncio.run(scenario())
+    assert cached == [9, 10, 1]
+    assert version == 1 and email == "user1@example.com"
+
+
+def test_sqlite_sync_loop_survives_unexpected_errors(tmp_path, capsys):
+    async def scenario():
+        users = sqlite_repository(tmp_path)
+        await users.connect()
+        original, calls = users.sync_changes, []
+
+        async def flaky_sync():
+            calls.append(None)
+            if len(calls) == 1:
+                raise RuntimeError("unexpected")
+            return await original()
+
+        users.sync_changes = flaky_sync
+        try:
+            deadline = time.monotonic() + 5
+            while len(calls) < 3 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            return len(calls), users._sync_task.done()
+        finally:
+            await users.close()
+
+    calls, stopped = asyncio.run(scenario())
+    assert calls >= 3 and not stopped
+    assert "RuntimeError('unexpected')" in capsys.readouterr().out
@@ -0,0 +1,109 @@
+# backend/tools/bench_assist.py
+"""
+Throughput and tail latency of /assist/* on a running API backed by a model server
+(e.g. backend.tools.stub_model_server). `--clients` closed-loop callers, each a Pro
+account of its own so every operation is open to it, send a mix of generate / explain /
+refactor requests for `--duration` seconds. Every request is distinct, so each one
+reaches the model.
+
+Run with:
+    python -m backend.tools.stub_model_server --latency-ms 80 --tokens-per-second 300 --slots 8 &
+    INFERENCE_BACKEND=http uvicorn backend.app.main:app --port 8000 &
+    python -m backend.tools.bench_assist --clients 32 --duration 20
+"""
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+
+CODE = '''def load(path):
+    with open(path) as f:
+        data = f.read()
+    return [line.split(",") for line in data.split("\\n") if line]  # {n}
+'''
+
+# Operation -> (endpoint, request body for the n-th request)
+OPERATIONS: Dict[str, Tuple[str, Callable[[int], Dict[str, Any]]]] = {
+    "generate": ("/assist/generate-code", lambda n: {"prompt": f"parse a CSV file into dicts, variant {n}",
+                                                     "language": "python", "max_tokens": 256}),
+    "explain": ("/assist/explain-code", lambda n: {"code_block": CODE.format(n=n), "language": "python"}),
+    "refactor": ("/assist/refactor-code", lambda n: {"code_block": CODE.format(n=n), "language": "python",
+                                                     "refactor_goals": ["readability"]}),
+}
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def pro_account(client: httpx.AsyncClient, email: str) -> str:
+    password = "bench-password"
+    (await client.post("/auth/register", json={"email": email, "password": password})).raise_for_status()
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    response = await client.post(
+        "/payments/subscribe/stripe", headers={"Authorization": f"Bearer {token}"},
+        json={"plan_id": "Pro", "payment_method_token": "pm_bench"},
+    )
+    response.raise_for_status()
+    return token
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--operations", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS))
+    args = parser.parse_args()
+
+    run = secrets.token_hex(4)  # Fresh accounts on every run
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.api_url, limits=limits, timeout=120) as client:
+        tokens = [await pro_account(client, f"bench-{run}-{n}@example.com") for n in range(args.clients)]
+
+        latencies: Dict[str, List[float]] = {operation: [] for operation in args.operations}
+        statuses: Dict[str, Counter] = {operation: Counter() for operation in args.operations}
+        sent = 0
+        deadline = time.perf_counter() + args.duration
+
+        async def caller(n: int, token: str) -> None:
+            nonlocal sent
+            headers = {"Authorization": f"Bearer {token}"}
+            while time.perf_counter() < deadline:
+                operation = args.operations[(n + sent) % len(args.operations)]
+                endpoint, body = OPERATIONS[operation]
+                sent += 1
+                started = time.perf_counter()
+                response = await client.post(endpoint, headers=headers, json=body(sent))
+                statuses[operation][response.status_code] += 1
+                if response.status_code == 200:
+                    latencies[operation].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(caller(n, token) for n, token in enumerate(tokens)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{args.clients} clients, {elapsed:.1f} s")
+    for operation in args.operations:
+        samples = latencies[operation]
+        errors = {status: count for status, count in statuses[operation].items() if status != 200}
+        if not samples:
+            print(f"  {operation:<9} no successful requests, statuses {errors}")
+            continue
+        print(
+            f"  {operation:<9} {len(samples) / elapsed:7.1f} requests/s  "
+            f"p50 {statistics.median(samples) * 1000:6.0f} ms  p90 {percentile(samples, 0.9) * 1000:6.0f} ms  "
+            f"p99 {percentile(samples, 0.99) * 1000:6.0f} ms  errors {errors or 'none'}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+# backend/tools/bench_auth_me.py
+"""
+Read throughput of the SQLite user store under concurrent traffic.
+
+The pool run fills a temporary database with `--users` accounts, then `--concurrency`
+tasks read random users by id (the query behind /auth/me on a cold worker) for
+`--seconds`, once per size in `--pool-sizes`, so the reader connections' effect shows.
+
+With `--api-url`, it then load-tests GET /auth/me of a running API: `--clients` accounts
+are registered and log in, and each client sends requests back to back. Run the API with
+different DATABASE_POOL_SIZE values to compare.
+
+Run with:
+    python -m backend.tools.bench_auth_me --users 100000 --pool-sizes 1 2 4 8
+    uvicorn backend.app.main:app --port 8000 --workers 2 &
+    python -m backend.tools.bench_auth_me --api-url http://127.0.0.1:8000/api/v1 --clients 64
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import shutil
+import statistics
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+from backend.app.db.sqlite_user_repository import SELECT_BY_ID, SQLiteUserRepository
+
+HASHED_PASSWORD = "$2b$12$" + "x" * 53  # Shape of a bcrypt hash; hashing is not what's measured
+CHUNK = 1000  # Creates in flight at once, sharing batched writes
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def fill(database_url: str, users: int) -> None:
+    repository = SQLiteUserRepository(database_url)
+    await repository.connect()
+    for start in range(0, users, CHUNK):
+        await asyncio.gather(*(
+            repository.create(email=f"user{n}@example.com", hashed_password=HASHED_PASSWORD, full_name=f"User {n}")
+            for n in range(start, min(users, start + CHUNK))
+        ))
+    await repository.close()
+
+
+async def read_pool(database_url: str, users: int, pool_size: int, concurrency: int, seconds: float) -> None:
+    # Straight to the pool: the repository's cache of public projections would hide it
+    repository = SQLiteUserRepository(database_url, pool_size=pool_size)
+    await repository.connect()
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+
+    async def reader(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            row = await repository.pool.fetchone(SELECT_BY_ID, (rng.randint(1, users),))
+            latencies.append(time.perf_counter() - started)
+            assert row is not None
+            await asyncio.sleep(0)  # A request does other work between reads, letting waiting readers in
+
+    await asyncio.gather(*(reader(n) for n in range(concurrency)))
+    await repository.close()
+    print(
+        f"  pool of {pool_size:>2}: {len(latencies) / seconds:9.0f} reads/s, "
+        f"p50 {statistics.median(latencies) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms"
+    )
+
+
+async def load_api(api_url: str, clients: int, seconds: float) -> None:
+    run = secrets.token_hex(4)  # Fresh accounts on every run
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=api_url, limits=limits, timeout=30) as client:
+        tokens = []
+        for n in range(clients):
+            email, password = f"bench-{run}-{n}@example.com", "bench-password"
+            response = await client.post("/auth/register", json={"email": email, "password": password})
+            response.raise_for_status()
+            response = await client.post("/auth/login", data={"username": email, "password": password})
+            response.raise_for_status()
+            tokens.append(response.json()["access_token"])
+
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.perf_counter() + seconds
+
+        async def user(token: str) -> None:
+            nonlocal errors
+            headers = {"Authorization": f"Bearer {token}"}
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get("/auth/me", headers=headers)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        await asyncio.gather(*(user(token) for token in tokens))
+    print(
+        f"  /auth/me, {clients} clients: {len(latencies) / seconds:7.0f} requests/s, {errors} errors, "
+        f"p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--pool-sizes", type=int, nargs="*", default=[1, 2, 4, 8], help="None: skip the pool run")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent readers in the pool run")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--api-url", help="Also load-test /auth/me of the API running here")
+    parser.add_argument("--clients", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.pool_sizes:
+        directory = tempfile.mkdtemp(prefix="bench-users-")
+        database_url = f"sqlite+aiosqlite:///{os.path.join(directory, 'users.sqlite3')}"
+        try:
+            started = time.perf_counter()
+            await fill(database_url, args.users)
+            print(f"{args.users} users written in {time.perf_counter() - started:.1f} s; "
+                  f"{args.concurrency} concurrent readers")
+            for pool_size in args.pool_sizes:
+                await read_pool(database_url, args.users, pool_size, args.concurrency, args.seconds)
+        finally:
+            shutil.rmtree(directory)
+    if args.api_url:
+        await load_api(args.api_url, args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+# backend/tools/bench_batching.py
+"""
+Throughput vs. latency of inference micro-batching, against a running model server
+(e.g. backend.tools.stub_model_server). For each batch window, `--clients` closed-loop
+callers send explain requests for `--duration` seconds; window 0 means no batching.
+
+Run with:
+    python -m backend.tools.stub_model_server --slots 4 &
+    python -m backend.tools.bench_batching --clients 64 --windows 0 2 5 10 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from backend.app.models.code_assistant import CodeExplanationRequest
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.inference_backend import BatchingInferenceBackend, HTTPInferenceBackend, InferenceBackend
+
+BENCH_USER = User(id=0, email="bench@example.com", subscription_plan=SubscriptionPlan.PRO)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_window(args: argparse.Namespace, window_ms: float) -> None:
+    backend: InferenceBackend = HTTPInferenceBackend(
+        base_url=args.base_url,
+        timeout=60,
+        connect_timeout=5,
+        max_connections=args.clients,
+        max_concurrency=args.clients,
+    )
+    if window_ms > 0:
+        backend = BatchingInferenceBackend(backend, max_batch_size=args.max_batch_size, max_wait=window_ms / 1000)
+
+    latencies: List[float] = []
+    deadline = time.perf_counter() + args.duration
+
+    async def client(n: int) -> None:
+        request = CodeExplanationRequest(code_block=f"def f{n}(x):\n    return x * {n}\n", language="python")
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await backend.explain(request, BENCH_USER)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    batch_size = backend.batchers["explain"].stats()["mean_batch_size"] if window_ms > 0 else 1.0
+    await backend.aclose()
+
+    print(
+        f"{window_ms:>9.1f} {len(latencies) / elapsed:>9.1f} {statistics.median(latencies) * 1000:>9.1f} "
+        f"{percentile(latencies, 0.99) * 1000:>9.1f} {batch_size:>10.1f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8100")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5, 10, 20])
+    args = parser.parse_args()
+
+    print(f"{'window_ms':>9} {'req/s':>9} {'p50_ms':>9} {'p99_ms':>9} {'mean_batch':>10}")
+    for window_ms in args.windows:
+        await run_window(args, window_ms)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+# backend/tools/bench_completion.py
+"""
+Autocompletion latency over the /assist/complete/ws WebSocket of a running API. Each of
+`--clients` editors types words of `--word-length` characters, one keystroke every
+`--keystroke-ms`, then pauses until its completion arrives. Every keystroke sends a
+request that supersedes the previous one, so only the last of a word should be answered.
+Latency is measured from the last keystroke to its completion, i.e. what the user waits.
+
+Run with:
+    python -m backend.tools.stub_model_server --latency-ms 50 &
+    INFERENCE_BACKEND=http uvicorn backend.app.main:app --port 8000 &
+    python -m backend.tools.bench_completion --clients 8 --words 50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import httpx
+import websockets
+
+CODE_BEFORE = '''import os
+
+
+class Settings:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+'''
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def editor(args: argparse.Namespace, token: str, n: int, latencies: List[float], counts: List[int]) -> None:
+    async with websockets.connect(f"{args.ws_url}?token={token}") as connection:
+        request_id = 0
+        for word in range(args.words):
+            line = "        data = self."
+            typed_at = 0.0
+            for i, character in enumerate(f"w{n}_{word}_" + "x" * args.word_length):
+                if i:
+                    await asyncio.sleep(args.keystroke_ms / 1000)
+                line += character
+                request_id += 1
+                await connection.send(json.dumps({
+                    "document_id": f"editor-{n}/settings.py",
+                    "request_id": request_id,
+                    "prefix": CODE_BEFORE + line,
+                    "suffix": "\n\n    def save(self):\n        pass\n",
+                    "language": "python",
+                }))
+                typed_at = time.perf_counter()
+                counts[0] += 1
+            while True:
+                reply = json.loads(await connection.recv())
+                counts[1] += 1
+                if reply.get("request_id") == request_id:
+                    latencies.append(time.perf_counter() - typed_at)
+                    break
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--email", default="user@example.com")
+    parser.add_argument("--password", default="string")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--words", type=int, default=50)
+    parser.add_argument("--word-length", type=int, default=6)
+    parser.add_argument("--keystroke-ms", type=float, default=40)
+    args = parser.parse_args()
+    args.ws_url = args.api_url.replace("http", "ws", 1) + "/assist/complete/ws"
+
+    async with httpx.AsyncClient() as client:
+        response = await client.post(f"{args.api_url}/auth/login", data={"username": args.email, "password": args.password})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+    latencies: List[float] = []
+    counts = [0, 0]  # Requests sent, replies received
+    await asyncio.gather(*(editor(args, token, n, latencies, counts) for n in range(args.clients)))
+    print(
+        f"{len(latencies)} completions, {counts[0]} requests sent, {counts[1]} answered "
+        f"({counts[0] - counts[1]} superseded before their reply)"
+    )
+    print(
+        f"latency after the last keystroke: p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p90 {percentile(latencies, 0.9) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
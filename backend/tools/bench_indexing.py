@@ -0,0 +1,152 @@
+# backend/tools/bench_indexing.py
+"""
+Symbol indexing throughput of project workspaces. Indexes a source tree (`--path`, or a
+synthetic project of `--files` files), then measures the incremental cases: re-uploading
+it unchanged (hashing only), changing `--changed` of its files, and a relevant-definitions
+lookup for a request.
+
+Run with:
+    python -m backend.tools.bench_indexing --files 20000
+    python -m backend.tools.bench_indexing --path /path/to/repo
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Dict
+
+from backend.app.models.user import SubscriptionPlan, User
+from backend.app.services.context_assembly import assemble_project_context
+from backend.app.services.project_workspace import ProjectStore, normalize_path
+
+BENCH_USER = User(id=0, email="bench@example.com", subscription_plan=SubscriptionPlan.PRO)
+
+PYTHON_FILE = '''import os
+from pkg{m}.helpers import helper_{h}
+
+MAX_ITEMS_{n} = {n}
+
+
+class Service{n}:
+    """Service number {n}."""
+
+    def __init__(self, store):
+        self.store = store
+        self.items = []
+
+    def load_{n}(self, key):
+        value = self.store.get(key)
+        if value is None:
+            return helper_{h}(key)
+        return value
+
+    async def refresh_{n}(self):
+        for item in self.items[:MAX_ITEMS_{n}]:
+            await item.reload()
+
+
+def build_service_{n}(store):
+    return Service{n}(store)
+'''
+JS_FILE = '''import {{ helper{h} }} from "./helpers{m}.js";
+
+export class Widget{n} {{
+  constructor(root) {{
+    this.root = root;
+  }}
+
+  render() {{
+    return helper{h}(this.root, {n});
+  }}
+}}
+
+export const mountWidget{n} = (root) => new Widget{n}(root).render();
+
+function unused{n}() {{
+  return null;
+}}
+'''
+GO_FILE = '''package pkg{m}
+
+import "fmt"
+
+type Handler{n} struct {{
+    name string
+}}
+
+func (h *Handler{n}) Serve() error {{
+    fmt.Println(h.name, {n})
+    return nil
+}}
+
+func NewHandler{n}(name string) *Handler{n} {{
+    return &Handler{n}{{name: name}}
+}}
+'''
+TEMPLATES = [("py", PYTHON_FILE), ("js", JS_FILE), ("go", GO_FILE)]
+
+
+def synthetic_project(count: int) -> Dict[str, str]:
+    files = {}
+    for n in range(count):
+        extension, template = TEMPLATES[n % len(TEMPLATES)]
+        files[f"pkg{n % 50}/module_{n}.{extension}"] = template.format(n=n, m=n % 50, h=n % 97)
+    return files
+
+
+def read_tree(root: str, max_file_bytes: int) -> Dict[str, str]:
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            full_path = os.path.join(directory, name)
+            path = normalize_path(os.path.relpath(full_path, root))
+            if path is None or os.path.getsize(full_path) > max_file_bytes:
+                continue
+            try:
+                with open(full_path, encoding="utf-8") as f:
+                    files[path] = f.read()
+            except (UnicodeDecodeError, OSError):
+                continue
+    return files
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", help="Source tree to index instead of a synthetic project")
+    parser.add_argument("--files", type=int, default=20000, help="Synthetic project size")
+    parser.add_argument("--changed", type=float, default=0.01, help="Fraction of files changed for the incremental run")
+    args = parser.parse_args()
+
+    store = ProjectStore(max_projects_per_user=1, max_files=10 ** 7, max_file_bytes=1_000_000, max_bytes=10 ** 11)
+    files = read_tree(args.path, store.max_file_bytes) if args.path else synthetic_project(args.files)
+    megabytes = sum(len(content) for content in files.values()) / 1e6
+    project = await store.create(BENCH_USER, "bench")
+    print(f"{len(files)} files, {megabytes:.1f} MB")
+
+    result = await store.update(project, files)
+    print(
+        f"full index:      {result.seconds:7.3f} s  {len(files) / result.seconds:9.0f} files/s  "
+        f"{megabytes / result.seconds:6.1f} MB/s  {result.project.symbols} symbols"
+    )
+
+    result = await store.update(project, files)
+    print(f"unchanged:       {result.seconds:7.3f} s  {len(files) / result.seconds:9.0f} files/s  parsed={result.parsed}")
+
+    changed = dict(files)
+    for path in random.Random(0).sample(sorted(files), max(1, int(len(files) * args.changed))):
+        changed[path] = files[path] + "\n# edited\n"
+    result = await store.update(project, changed)
+    print(f"{args.changed:.0%} changed:      {result.seconds:7.3f} s  parsed={result.parsed}")
+
+    text = " ".join(list(project.index.definitions)[::max(1, len(project.index.definitions) // 20)])
+    started = time.perf_counter()
+    rounds = 200
+    for _ in range(rounds):
+        assembled = assemble_project_context(project, text, 8192)
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"context lookup:  {elapsed * 1000:7.3f} ms  ({assembled.tokens if assembled else 0} tokens)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+# backend/tools/bench_retrieval.py
+"""
+Latency and memory of a project retrieval index at large sizes. Fills an index with
+`--chunks` random unit vectors (search cost doesn't depend on the content), then measures
+single-query and batched top-k search, incremental file updates and deletes, and the
+chunk + embed throughput of real code.
+
+Run with:
+    python -m backend.tools.bench_retrieval --chunks 1000000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from backend.app.services.retrieval_index import Chunk, PreparedFile, RetrievalIndex
+from backend.tools.bench_indexing import synthetic_project
+
+CHUNKS_PER_FILE = 100
+
+
+def rss_megabytes() -> Tuple[float, float]:
+    # (heap and other anonymous memory, pages of mapped files such as the vector file), Linux only
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            fields[name] = int(value.split()[0]) / 1024 if value.strip().endswith("kB") else 0
+    return fields.get("RssAnon", 0.0), fields.get("RssFile", 0.0)
+
+
+def random_file(path: str, count: int, dimensions: int, rng: np.random.Generator) -> PreparedFile:
+    vectors = rng.standard_normal((count, dimensions), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return PreparedFile([Chunk(path, 40 * i + 1, 40 * i + 40) for i in range(count)], vectors)
+
+
+def report(label: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+    print(f"{label:<28} p50 {statistics.median(ordered) * 1000:8.2f} ms   p99 {ordered[int(0.99 * (len(ordered) - 1))] * 1000:8.2f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dimensions", type=int, default=128)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=16, help="Queries per batched search")
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp(prefix="bench-retrieval-")
+    index = RetrievalIndex(os.path.join(directory, "bench.f32"), args.dimensions, max_chunk_lines=40)
+    rss_before = rss_megabytes()
+
+    started = time.perf_counter()
+    for n in range(args.chunks // CHUNKS_PER_FILE):
+        index.apply({f"file_{n}.py": random_file(f"file_{n}.py", CHUNKS_PER_FILE, args.dimensions, rng)})
+    print(f"{len(index)} chunks x {args.dimensions} dims, filled in {time.perf_counter() - started:.1f} s")
+    anonymous, mapped = (after - before for after, before in zip(rss_megabytes(), rss_before))
+    print(
+        f"vector file {index.nbytes / 2 ** 20:.0f} MiB, resident: +{mapped:.0f} MiB of mapped file pages "
+        f"(page cache, reclaimable), +{anonymous:.0f} MiB heap (chunk metadata)"
+    )
+
+    queries = rng.standard_normal((args.batch, args.dimensions), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    index.search_vectors(queries[:1], args.k)  # Warm the page cache
+
+    single = []
+    for i in range(args.rounds):
+        started = time.perf_counter()
+        index.search_vectors(queries[i % args.batch:i % args.batch + 1], args.k)
+        single.append(time.perf_counter() - started)
+    report("search, 1 query", single)
+
+    batched = []
+    for _ in range(max(1, args.rounds // 3)):
+        started = time.perf_counter()
+        index.search_vectors(queries, args.k)
+        batched.append((time.perf_counter() - started) / args.batch)
+    report(f"search, batch of {args.batch} (per query)", batched)
+
+    text_query = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        await index.search("retry the request with exponential backoff", args.k)
+        text_query.append(time.perf_counter() - started)
+    report("embed + search (async)", text_query)
+
+    updates = []
+    for n in range(args.rounds):
+        file = random_file(f"file_{n}.py", CHUNKS_PER_FILE, args.dimensions, rng)
+        started = time.perf_counter()
+        index.apply({f"file_{n}.py": file})
+        updates.append(time.perf_counter() - started)
+    report(f"replace a {CHUNKS_PER_FILE}-chunk file", updates)
+
+    started = time.perf_counter()
+    index.apply({}, removed=[f"file_{n}.py" for n in range(args.rounds)])
+    print(f"{'delete ' + str(args.rounds) + ' files':<28} {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+    files = synthetic_project(2000)
+    started = time.perf_counter()
+    chunks = sum(len(index.prepare(path, content, []).chunks) for path, content in files.items())
+    elapsed = time.perf_counter() - started
+    print(f"chunk + embed real code:     {chunks / elapsed:8.0f} chunks/s ({sum(map(len, files.values())) / elapsed / 1e6:.1f} MB/s)")
+
+    index.close()
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
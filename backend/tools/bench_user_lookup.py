@@ -0,0 +1,99 @@
+# backend/tools/bench_user_lookup.py
+"""
+Cost of looking a user up by email (what login and registration do) as the number of
+accounts grows. The in-memory and columnar repositories are filled up to each size in
+turn, and at each size `get_by_email` is timed for random accounts (in mixed case, as
+users type them) and for unknown addresses. For comparison it also times the linear scan
+over a dict of models that login used to do.
+
+Run with:
+    python -m backend.tools.bench_user_lookup --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List
+
+from backend.app.db.columnar_user_repository import ColumnarUserRepository
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.user import UserInDB
+
+HASHED_PASSWORD = "$2b$12$" + "x" * 53  # Shape of a bcrypt hash; hashing is not what's measured
+REPOSITORIES: Dict[str, Callable] = {"memory": InMemoryUserRepository, "columnar": ColumnarUserRepository}
+
+
+def email(n: int) -> str:
+    return f"user{n}@example.com"
+
+
+def queries(users: int, lookups: int, seed: int = 0) -> List[str]:
+    # Nine in ten are accounts (some typed in upper case), one in ten unknown
+    rng = random.Random(seed)
+    result = []
+    for i in range(lookups):
+        if i % 10 == 9:
+            result.append(f"nobody{i}@example.com")
+        else:
+            address = email(rng.randrange(users))
+            result.append(address.upper() if i % 3 == 0 else address)
+    return result
+
+
+async def indexed(name: str, sizes: List[int], lookups: int) -> List[float]:
+    # Seconds per lookup at each size; the repository is grown from one size to the next
+    repository = REPOSITORIES[name]()
+    await repository.connect()
+    timings = []
+    for users in sizes:
+        for n in range(await repository.count(), users):
+            await repository.create(email=email(n), hashed_password=HASHED_PASSWORD, full_name=f"User {n}")
+        emails = queries(users, lookups)
+        started = time.perf_counter()
+        found = 0
+        for address in emails:
+            found += await repository.get_by_email(address) is not None
+        timings.append((time.perf_counter() - started) / lookups)
+        assert found == lookups - lookups // 10, found
+    await repository.close()
+    return timings
+
+
+def scan(sizes: List[int], lookups: int) -> List[float]:
+    # What login did before the email index: walk every record and compare addresses
+    db_users: Dict[int, UserInDB] = {}
+    timings = []
+    for users in sizes:
+        for n in range(len(db_users), users):
+            # Records are trusted here, so validation (not what's measured) is skipped
+            db_users[n] = UserInDB.model_construct(
+                id=n, email=email(n), hashed_password=HASHED_PASSWORD, full_name=f"User {n}"
+            )
+        emails = [address.lower() for address in queries(users, lookups)]
+        started = time.perf_counter()
+        for address in emails:
+            next((user for user in db_users.values() if user.email == address), None)
+        timings.append((time.perf_counter() - started) / lookups)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=100000, help="Indexed lookups timed per size")
+    parser.add_argument("--scan-lookups", type=int, default=20, help="Linear-scan lookups timed per size (0 to skip)")
+    args = parser.parse_args()
+
+    sizes = sorted(args.sizes)
+    columns = [[f"{seconds * 1e6:9.2f} µs" for seconds in await indexed(name, sizes, args.lookups)]
+               for name in REPOSITORIES]
+    if args.scan_lookups:
+        columns.append([f"{seconds * 1e6:9.0f} µs" for seconds in scan(sizes, args.scan_lookups)])
+    headers = list(REPOSITORIES) + (["linear scan"] if args.scan_lookups else [])
+    print(f"{'users':>9}  " + "  ".join(f"{header:>12}" for header in headers))
+    for i, users in enumerate(sizes):
+        print(f"{users:>9}  " + "  ".join(f"{column[i]:>12}" for column in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+# backend/tools/bench_user_restart.py
+"""
+Restart time of the columnar user store in durable mode (USER_STORE_JOURNAL_DIR). Writes
+`--users` accounts through the repository (a snapshot is taken once they're all logged),
+then `--tail` updates that stay in the log, and times a fresh repository's connect():
+mapping the snapshot plus replaying the log tail. For comparison it also times a restart
+from the log alone, without a snapshot.
+
+Run with:
+    python -m backend.tools.bench_user_restart --users 1000000 --tail 10000
+"""
+import argparse
+import asyncio
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from backend.app.db.columnar_user_repository import ColumnarUserRepository
+from backend.app.db.user_journal import SNAPSHOT_FILE, UserJournal
+
+HASHED_PASSWORD = "$2b$12$" + "x" * 53  # Shape of a bcrypt hash; hashing is not what's measured
+CHUNK = 5000  # Creates in flight at once, sharing group commits
+
+
+async def fill(directory: str, users: int, tail: int, compact_every: int) -> None:
+    repository = ColumnarUserRepository(journal=UserJournal(directory, compact_every=compact_every))
+    await repository.connect()
+    for start in range(0, users, CHUNK):
+        await asyncio.gather(*(
+            repository.create(email=f"user{n}@example.com", hashed_password=HASHED_PASSWORD, full_name=f"User {n}")
+            for n in range(start, min(users, start + CHUNK))
+        ))
+    for start in range(0, tail, CHUNK):
+        await asyncio.gather(*(
+            repository.update(1 + n * 7919 % users, full_name=f"Renamed {n}")
+            for n in range(start, min(tail, start + CHUNK))
+        ))
+    await repository.close()
+
+
+async def restart(directory: str) -> float:
+    repository = ColumnarUserRepository(journal=UserJournal(directory))
+    started = time.perf_counter()
+    await repository.connect()
+    elapsed = time.perf_counter() - started
+    count = await repository.count()
+    await repository.close()
+    print(f"  {count} users")
+    return elapsed
+
+
+def size_megabytes(directory: str, pattern: str) -> float:
+    return sum(os.path.getsize(path) for path in glob.glob(os.path.join(directory, pattern))) / 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--tail", type=int, default=10000, help="Updates logged after the snapshot")
+    parser.add_argument("--dir", help="Journal directory (default: a temporary one, removed afterwards)")
+    args = parser.parse_args()
+    directory = args.dir or tempfile.mkdtemp(prefix="user-journal-")
+    try:
+        started = time.perf_counter()
+        await fill(directory, args.users, args.tail, compact_every=args.users)
+        print(f"wrote {args.users} users and {args.tail} updates in {time.perf_counter() - started:.1f} s")
+        print(f"snapshot {size_megabytes(directory, SNAPSHOT_FILE):.1f} MB, log {size_megabytes(directory, 'log-*.jsonl'):.1f} MB")
+
+        elapsed = await restart(directory)
+        print(f"restart from snapshot + log tail: {elapsed:.2f} s")
+
+        # Without a snapshot every create is replayed too
+        log_only = tempfile.mkdtemp(prefix="user-journal-log-")
+        try:
+            await fill(log_only, args.users, args.tail, compact_every=args.users + args.tail + 1)
+            print(f"log without snapshot: {size_megabytes(log_only, 'log-*.jsonl'):.1f} MB")
+            elapsed = await restart(log_only)
+            print(f"restart from the log alone: {elapsed:.2f} s")
+        finally:
+            shutil.rmtree(log_only)
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+# backend/tools/bench_user_table.py
+"""
+Memory per user and full-scan throughput of the columnar user table against a dict of
+pydantic models. `--users` accounts (a quarter on paid plans with an expiry, a few
+inactive) are stored in:
+
+    models    {id: UserInDB}, as users were held before the repositories
+    memory    InMemoryUserRepository (models plus email index and public projections)
+    columnar  ColumnarUserRepository
+
+Memory is what tracemalloc sees allocated while filling each store. The scans are the
+admin and expiry kind: count active paid users, and find subscriptions expired by now.
+The columnar table is scanned both through row views (`iter_rows`, the UserInDB
+attributes) and over its columns (`iter_columns`, stored values).
+
+Run with:
+    python -m backend.tools.bench_user_table --users 200000
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List
+
+from backend.app.db.columnar_user_repository import PLAN_CODES, ColumnarUserRepository
+from backend.app.db.memory_user_repository import InMemoryUserRepository
+from backend.app.models.user import SubscriptionPlan, UserInDB
+
+HASHED_PASSWORD = "$2b$12$" + "x" * 53  # Shape of a bcrypt hash
+PAID_PLANS = (SubscriptionPlan.BASIC, SubscriptionPlan.PREMIUM, SubscriptionPlan.PRO)
+NOW = datetime.now(timezone.utc)
+
+
+def fields(n: int) -> Dict[str, Any]:
+    paid = n % 4 == 0
+    return {
+        "email": f"user{n}@example.com",
+        "full_name": f"User {n}",
+        "hashed_password": HASHED_PASSWORD,
+        "is_active": n % 50 != 0,
+        "subscription_plan": PAID_PLANS[n % 3] if paid else SubscriptionPlan.NONE,
+        "subscription_expires_at": NOW + timedelta(days=n % 60 - 30) if paid else None,
+    }
+
+
+def active_paid(users: Iterable) -> int:
+    return sum(1 for user in users if user.is_active and user.subscription_plan != SubscriptionPlan.NONE)
+
+
+def expired(users: Iterable) -> int:
+    return sum(1 for user in users if user.subscription_expires_at is not None and user.subscription_expires_at <= NOW)
+
+
+def active_paid_columns(table: ColumnarUserRepository) -> int:
+    free = PLAN_CODES[SubscriptionPlan.NONE]
+    return sum(1 for active, plan in table.iter_columns("is_active", "subscription_plan") if active and plan != free)
+
+
+def expired_columns(table: ColumnarUserRepository) -> int:
+    now = NOW.timestamp()
+    return sum(1 for (expires_at,) in table.iter_columns("subscription_expires_at") if expires_at <= now)  # NaN: never
+
+
+async def fill_models(users: int) -> Dict[int, UserInDB]:
+    return {n + 1: UserInDB(id=n + 1, **fields(n)) for n in range(users)}
+
+
+async def fill_repository(repository, users: int):
+    await repository.connect()
+    for n in range(users):
+        await repository.create(**fields(n))
+    return repository
+
+
+async def measure(name: str, fill: Callable, users: int) -> Any:
+    gc.collect()
+    tracemalloc.start()
+    store = await fill()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<9} {allocated / users:7.0f} bytes per user  ({allocated / 1e6:.1f} MB)")
+    return store
+
+
+def scan(name: str, queries: Dict[str, Callable[[], int]], users: int, rounds: int) -> None:
+    timings: List[str] = []
+    for query, run in queries.items():
+        started = time.perf_counter()
+        for _ in range(rounds):
+            found = run()
+        elapsed = (time.perf_counter() - started) / rounds
+        timings.append(f"{query} {users / elapsed / 1e6:6.2f} M rows/s ({found})")
+    print(f"  {name:<16} " + ", ".join(timings))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=3, help="Scans timed per query")
+    args = parser.parse_args()
+
+    print(f"memory, {args.users} users:")
+    models = await measure("models", lambda: fill_models(args.users), args.users)
+    await measure("memory", lambda: fill_repository(InMemoryUserRepository(), args.users), args.users)
+    columnar = await measure("columnar", lambda: fill_repository(ColumnarUserRepository(), args.users), args.users)
+
+    print("full scans:")
+    scan("models", {
+        "active paid": lambda: active_paid(models.values()), "expired": lambda: expired(models.values()),
+    }, args.users, args.rounds)
+    scan("columnar rows", {
+        "active paid": lambda: active_paid(columnar.iter_rows()), "expired": lambda: expired(columnar.iter_rows()),
+    }, args.users, args.rounds)
+    scan("columnar columns", {
+        "active paid": lambda: active_paid_columns(columnar), "expired": lambda: expired_columns(columnar),
+    }, args.users, args.rounds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,228 @@
+# backend/tools/stub_model_server.py
+"""
+Local stand-in for the code model server, for offline load testing of /assist/*.
+Speaks the HTTPInferenceBackend protocol and simulates model timing:
+each call waits `latency_ms` (+/- jitter) plus one token interval per output token.
+Streaming generations send the first token after `latency_ms`, then one per interval.
+Completions give up their slot as soon as the caller disconnects (a superseded keystroke).
+The model has `slots` decode slots; a call or a whole /batch occupies one slot, and a batch
+costs as much as its longest item, which is what makes batching pay off.
+
+Run with:
+    python -m backend.tools.stub_model_server --port 8100 --latency-ms 80 --tokens-per-second 300
+and start the API with INFERENCE_BACKEND=http INFERENCE_BASE_URL=http://127.0.0.1:8100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+
+class StubConfig:
+    latency_ms: float = float(os.getenv("STUB_LATENCY_MS", "50"))
+    jitter: float = float(os.getenv("STUB_LATENCY_JITTER", "0.2"))  # Fraction of latency_ms
+    tokens_per_second: float = float(os.getenv("STUB_TOKENS_PER_SECOND", "200"))
+    slots: int = int(os.getenv("STUB_SLOTS", "4"))  # Calls or batches the model runs at once
+
+
+config = StubConfig()
+_slots: Optional[asyncio.Semaphore] = None
+app = FastAPI(title="Corda stub model server")
+
+
+class GenerateBody(BaseModel):
+    prompt: str
+    language: Optional[str] = None
+    context: Optional[str] = None
+    max_tokens: Optional[int] = 1024
+    temperature: Optional[float] = 0.7
+    user_tier: Optional[str] = None
+    stream: bool = False  # Newline-delimited {"token": ...} objects instead of one JSON body
+
+
+class CodeBody(BaseModel):
+    code: str
+    language: Optional[str] = None
+    goals: List[str] = []
+    user_tier: Optional[str] = None
+
+
+class CompleteBody(BaseModel):
+    prefix: str
+    suffix: str = ""
+    language: Optional[str] = None
+    max_tokens: int = 64
+    user_tier: Optional[str] = None
+
+
+class GenerateBatchBody(BaseModel):
+    items: List[GenerateBody]
+
+
+class CodeBatchBody(BaseModel):
+    items: List[CodeBody]
+
+
+def split_tokens(text: str) -> List[str]:
+    # Whitespace-delimited pieces, keeping the leading whitespace so they join back losslessly
+    return re.findall(r"\s*\S+|\s+$", text)
+
+
+def first_token_delay() -> float:
+    spread = config.latency_ms * config.jitter
+    return max(0.0, config.latency_ms + random.uniform(-spread, spread)) / 1000
+
+
+def token_interval() -> float:
+    return 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+
+def model_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(config.slots)
+    return _slots
+
+
+async def simulate(token_count: int) -> None:
+    async with model_slots():
+        await asyncio.sleep(first_token_delay() + token_count * token_interval())
+
+
+def token_count(result: Dict[str, Any]) -> int:
+    return len(split_tokens(result["text"]))
+
+
+def generated_text(body: GenerateBody) -> str:
+    language = (body.language or "python").lower()
+    name = re.sub(r"\W+", "_", body.prompt.lower()).strip("_")[:40] or "generated"
+    if language == "javascript":
+        text = f"// {body.prompt}\nfunction {name}() {{\n  // TODO: implement\n  return null;\n}}\n"
+    else:
+        text = f"def {name}():\n    \"\"\"{body.prompt}\"\"\"\n    raise NotImplementedError\n"
+    tokens = split_tokens(text)
+    return "".join(tokens[:body.max_tokens or len(tokens)])
+
+
+def generate_result(body: GenerateBody) -> Dict[str, Any]:
+    return {"text": generated_text(body), "language": body.language, "confidence": 0.5}
+
+
+def explain_result(body: CodeBody) -> Dict[str, Any]:
+    lines = body.code.count("\n") + 1
+    text = f"This {body.language or 'code'} block has {lines} line(s). It starts with: {body.code[:60]!r}"
+    return {"text": text, "language": body.language}
+
+
+def refactor_result(body: CodeBody) -> Dict[str, Any]:
+    text = "\n".join(line.rstrip() for line in body.code.splitlines()) + "\n"
+    return {"text": text, "language": body.language, "summary": [f"Applied goal: {goal}" for goal in body.goals]}
+
+
+def complete_result(body: CompleteBody) -> Dict[str, Any]:
+    # Finish the cursor's line with a call, or open a body after a block header
+    line = body.prefix.rsplit("\n", 1)[-1]
+    indent = line[:len(line) - len(line.lstrip())]
+    if line.rstrip().endswith(":"):
+        text = f"\n{indent}    return None"
+    else:
+        text = "(value)" if re.search(r"\w$", line) else "value"
+    return {"text": "".join(split_tokens(text)[:body.max_tokens]), "language": body.language}
+
+
+async def until_disconnected(request: Request, work: "asyncio.Future") -> bool:
+    # Run `work` unless the client goes away first; True if it finished
+    task = asyncio.ensure_future(work)
+    while not task.done():
+        if await request.is_disconnected():
+            task.cancel()
+            return False
+        await asyncio.wait([task], timeout=0.005)
+    return True
+
+
+async def stream_tokens(tokens: List[str]):
+    async with model_slots():
+        await asyncio.sleep(first_token_delay())
+        for token in tokens:
+            yield json.dumps({"token": token}) + "\n"
+            await asyncio.sleep(token_interval())
+
+
+async def run_batch(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Items decode side by side, so the batch takes as long as its longest item
+    await simulate(max((token_count(result) for result in results), default=0))
+    return {"results": results}
+
+
+@app.post("/v1/generate")
+async def generate(body: GenerateBody):
+    result = generate_result(body)
+    if body.stream:
+        return StreamingResponse(stream_tokens(split_tokens(result["text"])), media_type="application/x-ndjson")
+    await simulate(token_count(result))
+    return result
+
+
+@app.post("/v1/explain")
+async def explain(body: CodeBody):
+    result = explain_result(body)
+    await simulate(token_count(result))
+    return result
+
+
+@app.post("/v1/refactor")
+async def refactor(body: CodeBody):
+    result = refactor_result(body)
+    await simulate(token_count(result))
+    return result
+
+
+@app.post("/v1/complete")
+async def complete(body: CompleteBody, request: Request):
+    result = complete_result(body)
+    await until_disconnected(request, simulate(token_count(result)))
+    return result
+
+
+@app.post("/v1/generate/batch")
+async def generate_batch(body: GenerateBatchBody):
+    return await run_batch([generate_result(item) for item in body.items])
+
+
+@app.post("/v1/explain/batch")
+async def explain_batch(body: CodeBatchBody):
+    return await run_batch([explain_result(item) for item in body.items])
+
+
+@app.post("/v1/refactor/batch")
+async def refactor_batch(body: CodeBatchBody):
+    return await run_batch([refactor_result(item) for item in body.items])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=config.latency_ms)
+    parser.add_argument("--jitter", type=float, default=config.jitter)
+    parser.add_argument("--tokens-per-second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--slots", type=int, default=config.slots)
+    args = parser.parse_args()
+    config.latency_ms = args.latency_ms
+    config.jitter = args.jitter
+    config.tokens_per_second = args.tokens_per_second
+    config.slots = args.slots
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -50,22 +50,26 @@ class ApiClient:
                     return response.text
             return None
         except requests.exceptions.HTTPError as e:
-            error_detail = f"HTTP Error: {e.response.status_code}"
-            try:
-                error_content = e.response.json()
-                error_detail = error_content.get("detail", str(e))
-                if isinstance(error_detail, list):  # Handle FastAPI validation errors
-                    error_detail = "; ".join([err.get("msg", "Validation error") for err in error_detail])
-            except json.JSONDecodeError:
-                error_detail = e.response.text if e.response.text else error_detail
             # Defer messagebox to UI thread
-            return {"error": True, "status_code": e.response.status_code, "detail": error_detail}
+            return self._http_error(e)
         except requests.exceptions.RequestException as e:
             # Defer messagebox to UI thread
             return {"error": True, "status_code": None, "detail": f"Connection Error: {e}"}
         except ValueError as e:  # For unsupported method
             return {"error": True, "status_code": None, "detail": str(e)}
 
+    @staticmethod
+    def _http_error(e: requests.exceptions.HTTPError) -> Dict:
+        error_detail = f"HTTP Error: {e.response.status_code}"
+        try:
+            error_content = e.response.json()
+            error_detail = error_content.get("detail", str(e))
+            if isinstance(error_detail, list):  # Handle FastAPI validation errors
+                error_detail = "; ".join([err.get("msg", "Validation error") for err in error_detail])
+        except json.JSONDecodeError:
+            error_detail = e.response.text if e.response.text else error_detail
+        return {"error": True, "status_code": e.response.status_code, "detail": error_detail}
+
     def login(self, email: str, password: str) -> Dict:  # Return Dict for error handling
         response_data = self._request("POST", "/auth/login",
                                       data={"username": email, "password": password},
@@ -84,14 +88,63 @@ class ApiClient:
     def get_current_user(self) -> Optional[Dict]:
         return self._request("GET", "/auth/me")
 
-    def generate_code(self, prompt: str, language: Optional[str] = None, context: Optional[str] = None) -> Optional[
-        Dict]:
+    @staticmethod
+    def _generation_payload(prompt: str, language: Optional[str], context: Optional[str]) -> Dict:
         payload = {"prompt": prompt}
         if language and language != "Auto-detect":
             payload["language"] = language
         if context:
             payload["context"] = context
-        return self._request("POST", "/assist/generate-code", data=payload)
+        return payload
+
+    def generate_code(self, prompt: str, language: Optional[str] = None, context: Optional[str] = None) -> Optional[
+        Dict]:
+        return self._request("POST", "/assist/generate-code", data=self._generation_payload(prompt, language, context))
+
+    def stream_generate_code(self, prompt: str, language: Optional[str] = None, context: Optional[str] = None,
+                             on_token=None) -> Dict:
+        """
+        Like generate_code, but reads the Server-Sent Events stream and calls `on_token(text)`
+        for each piece as it arrives. Returns the final chunk (warnings, language) or an error dict.
+        """
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        url = f"{self.base_url}/assist/generate-code/stream"
+        try:
+            with requests.post(url, json=self._generation_payload(prompt, language, context), headers=headers,
+                               stream=True, timeout=15) as response:  # Timeout applies between tokens
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    chunk = json.loads(line[len("data:"):])
+                    if chunk.get("done"):
+                        if chunk.get("error"):
+                            return {"error": True, "status_code": None, "detail": chunk["error"]}
+                        return chunk
+                    if on_token:
+                        on_token(chunk.get("token", ""))
+            return {"error": True, "status_code": None, "detail": "Generation stream ended unexpectedly."}
+        except requests.exceptions.HTTPError as e:
+            return self._http_error(e)
+        except requests.exceptions.RequestException as e:
+            return {"error": True, "status_code": None, "detail": f"Connection Error: {e}"}
+        except json.JSONDecodeError as e:
+            return {"error": True, "status_code": None, "detail": f"Malformed stream event: {e}"}
+
+    def run_job(self, operation: str, request: Dict, poll_seconds: float = 10) -> Dict:
+        """
+        Run a long operation ("generate", "explain" or "refactor", e.g. refactoring a large file)
+        as a background job: submit it, then long-poll its result `poll_seconds` at a time, so
+        no single HTTP request comes near the timeout. Returns the operation's response or an error dict.
+        """
+        job = self._request("POST", "/jobs", data={"operation": operation, "request": request})
+        if not job or job.get("error"):
+            return job or {"error": True, "status_code": None, "detail": "Job submission failed."}
+        while True:
+            result = self._request("GET", f"/jobs/{job['id']}/result", params={"wait": poll_seconds})
+            if isinstance(result, dict) and result.get("id") == job["id"] and result.get("status") in ("queued", "running"):
+                continue  # 202: not finished yet
+            return result
 
     def get_plans(self) -> Optional[List[Dict]]:
         return self._request("GET", "/subscriptions/plans")
@@ -548,9 +601,12 @@ class CodeAssistantApp(ctk.CTk):
         context = self.context_entry.get("1.0", tk.END).strip()
         self.output_text.delete("1.0", tk.END)
 
+        def on_token(token):  # Called on the API thread; insert on the UI thread, in arrival order
+            self.after(0, lambda: self.output_text.insert(tk.END, token))
+
         self._execute_api_call(
-            self.api_client.generate_code,
-            (prompt, language, context if context else None),
+            self.api_client.stream_generate_code,
+            (prompt, language, context if context else None, on_token),
             self.generate_button,
             success_message=None,  # Handled by callback
             success_callback=self._generate_code_success,
@@ -558,9 +614,7 @@ class CodeAssistantApp(ctk.CTk):
         )
 
     def _generate_code_success(self, response_data):
-        self.output_text.delete("1.0", tk.END)
-        generated_code = response_data.get("generated_code", "Error: No code generated.")
-        self.output_text.insert("1.0", generated_code)
+        # The code itself was streamed into output_text token by token
         if response_data.get("warnings"):
             warnings_str = "\n\n--- Warnings ---\n" + "\n".join(response_data["warnings"])
             self.output_text.insert(tk.END, warnings_str)